@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark del Cubo di Rubik
+Misura i percorsi critici del modello, del renderer (sul backend senza
+finestra), del risolutore e del generatore di stati, salva i
+risultati come baseline JSON e segnala le regressioni oltre una soglia.
+
+Uso da riga di comando (dalla cartella del progetto):
+    python -m benchmarks [--filter ESPRESSIONE] [--save] [--check] [--baseline FILE] [--threshold 0.25]
+"""
+
+from benchmarks.runner import (
+    BENCHMARKS, SkipBenchmark, benchmark, compare_results, default_baseline_path, load_baseline, measure,
+    run_benchmarks, save_baseline
+)
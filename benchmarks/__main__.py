@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Punto d'ingresso da riga di comando: python -m benchmarks"""
+
+import argparse
+import sys
+
+from benchmarks.runner import (
+    BENCHMARKS, DEFAULT_MIN_TIME, DEFAULT_REPEAT, DEFAULT_THRESHOLD, compare_results, default_baseline_path,
+    format_result, load_baseline, print_comparison, run_benchmarks, save_baseline
+)
+
+
+def main(argv=None):
+    """Esegue i benchmark; con --check termina con codice 1 se c'è una regressione"""
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description="Benchmark del Cubo di Rubik")
+    parser.add_argument('--filter', help="Espressione regolare sui nomi dei benchmark (es. '^model\\.')")
+    parser.add_argument('--list', action='store_true', help="Elenca i benchmark senza eseguirli")
+    parser.add_argument('--baseline', help="File JSON della baseline (predefinito: uno per macchina in benchmarks/baselines)")
+    parser.add_argument('--save', action='store_true', help="Salva i risultati come baseline")
+    parser.add_argument('--check', action='store_true', help="Confronta con la baseline e fallisce se c'è una regressione")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Rallentamento relativo tollerato (predefinito: %(default)s)")
+    parser.add_argument('--min-time', type=float, default=DEFAULT_MIN_TIME, help="Secondi minimi per ripetizione")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="Ripetizioni per benchmark")
+    parser.add_argument('--tables-dir', help="Cartella delle tabelle del risolutore")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        from benchmarks import cases  # Registra i benchmark
+        for name, (unit, _) in BENCHMARKS.items():
+            print(f"{name} ({unit})")
+        return 0
+
+    path = args.baseline or default_baseline_path()
+    baseline = None
+    if args.check:
+        try:
+            baseline = load_baseline(path)
+        except FileNotFoundError:
+            print(f"Baseline {path} assente: eseguire prima con --save")
+            return 2
+
+    results = run_benchmarks(args.filter, args.min_time, args.repeat, {'tables_dir': args.tables_dir},
+                             report=lambda name, result: print(format_result(name, result), flush=True))
+    if not results:
+        print("Nessun benchmark corrisponde al filtro")
+        return 2
+
+    status = 0
+    if baseline is not None:
+        comparison = compare_results(results, baseline, args.threshold)
+        print_comparison(comparison, args.threshold)
+        if any(entry[4] == 'regression' for entry in comparison):
+            status = 1
+    if args.save:
+        if args.filter and baseline is None:
+            try:
+                baseline = load_baseline(path)
+            except FileNotFoundError:
+                baseline = {}
+        # Con un filtro si aggiornano solo i benchmark eseguiti
+        merged = dict(baseline or {}) if args.filter else {}
+        merged.update(results)
+        save_baseline(path, merged)
+        print(f"\nBaseline salvata in {path}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
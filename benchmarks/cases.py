@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark del Modello, del Renderer, del Motore a Lotti, del Risolutore e del Generatore di Stati
+I nomi sono raggruppati per area (model., render., batch., solver., scramble.) così
+che --filter possa selezionarne una. I benchmark del renderer girano sul
+backend senza finestra (headless.py).
+"""
+
+import contextlib
+import os
+import random
+
+import numpy as np
+
+from benchmarks.runner import SkipBenchmark, benchmark
+from rubiks_cube_model import RubiksCubeModel
+from rubiks_cube_moves import FACE_ROTATIONS
+
+SCRAMBLE = "R U2 F' L D B2 R' U F2 D' L2 B U' R2 F"
+SEED = 2024
+
+# Operazioni per chiamata nei benchmark brevi: il costo del ciclo di misura resta trascurabile
+CALLS = 100
+
+
+def _scrambled_model():
+    model = RubiksCubeModel()
+    model.apply_algorithm(SCRAMBLE)
+    return model
+
+
+# === Modello ===
+
+def _rotation_benchmark(method_name):
+    def setup(options):
+        rotate = getattr(_scrambled_model(), method_name)
+
+        def step():
+            for _ in range(CALLS):
+                rotate()
+            return CALLS
+        return step
+    return setup
+
+
+for _face in FACE_ROTATIONS:
+    for _direction in ('clockwise', 'counter_clockwise'):
+        _method = f"rotate_{_face}_{_direction}"
+        benchmark(f"model.{_method}", 'mossa')(_rotation_benchmark(_method))
+
+
+@benchmark('model.get_all_faces', 'chiamata')
+def get_all_faces(options):
+    model = _scrambled_model()
+
+    def step():
+        for _ in range(CALLS):
+            model.get_all_faces()
+        return CALLS
+    return step
+
+
+@benchmark('model.get_all_faces.copy', 'chiamata')
+def get_all_faces_copy(options):
+    model = _scrambled_model()
+
+    def step():
+        for _ in range(CALLS):
+            model.get_all_faces(copy=True)
+        return CALLS
+    return step
+
+
+@benchmark('model.get_all_faces.after_move', 'chiamata')
+def get_all_faces_after_move(options):
+    # La vista va ricostruita a ogni chiamata perché lo stato cambia
+    model = _scrambled_model()
+
+    def step():
+        for _ in range(CALLS):
+            model.apply_move('R')
+            model.get_all_faces()
+        return CALLS
+    return step
+
+
+@benchmark('model.is_solved.solved', 'chiamata')
+def is_solved_solved(options):
+    # Cubo risolto: il controllo deve esaminare tutte le facce
+    model = RubiksCubeModel()
+
+    def step():
+        for _ in range(CALLS):
+            model.is_solved()
+        return CALLS
+    return step
+
+
+@benchmark('model.is_solved.scrambled', 'chiamata')
+def is_solved_scrambled(options):
+    model = _scrambled_model()
+
+    def step():
+        for _ in range(CALLS):
+            model.is_solved()
+        return CALLS
+    return step
+
+
+# === Renderer (senza finestra) ===
+
+@contextlib.contextmanager
+def _quiet():
+    """Scarta i messaggi stampati dal renderer durante la misura"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def _headless_cube():
+    from benchmarks.headless import load_renderer
+    module, clock = load_renderer()
+    with _quiet():
+        cube = module.RubiksCube3D(renderer='headless')
+    return cube, clock
+
+
+@benchmark('render.animate_rotation', 'frame')
+def animate_rotation(options):
+    cube, _ = _headless_cube()
+    moves = ('R', "U'", 'F2', 'M', "x'", 'E2')
+    index = [0]
+
+    def step():
+        frames = cube.frames_drawn
+        with _quiet():
+            cube._animate_rotation(moves[index[0] % len(moves)])
+        index[0] += 1
+        return cube.frames_drawn - frames
+    return step
+
+
+@benchmark('render.update_colors', 'chiamata')
+def update_colors(options):
+    cube, _ = _headless_cube()
+    cube.model.apply_algorithm(SCRAMBLE)
+
+    def step():
+        # Una mossa prima di ogni aggiornamento, come dopo una rotazione nell'interfaccia
+        for _ in range(10):
+            cube.model.apply_move('R')
+            cube.update_colors()
+        return 10
+    return step
+
+
+@benchmark('render.move_queue.script', 'mossa')
+def move_queue_script(options):
+    # Un copione di 100 mosse accodate di colpo: la coda le applica senza animazione
+    cube, _ = _headless_cube()
+    rng = random.Random(SEED)
+    script = [rng.choice(SCRAMBLE.split()) for _ in range(100)]
+
+    def step():
+        with _quiet():
+            cube.move_queue.extend(script)
+            cube.is_animating = True
+            cube._run_move_queue()
+        return len(script)
+    return step
+
+
+@benchmark('render.apply_algorithm', 'mossa')
+def apply_algorithm(options):
+    # Uno scramble di 1000 mosse portato in scena senza animazione
+    cube, _ = _headless_cube()
+    rng = random.Random(SEED)
+    algorithm = ' '.join(rng.choice(SCRAMBLE.split()) for _ in range(1000))
+
+    def step():
+        with _quiet():
+            cube.apply_algorithm(algorithm)
+        return 1000
+    return step
+
+
+@benchmark('render.reset', 'reset')
+def reset(options):
+    # Reset dopo uno scramble: gli oggetti di scena sono riusati, non ricreati
+    cube, _ = _headless_cube()
+
+    def step():
+        with _quiet():
+            for _ in range(10):
+                cube.apply_algorithm(SCRAMBLE)
+                cube.reset()
+        return 10
+    return step
+
+
+# === Motore a lotti ===
+
+# Cubi per lotto: abbastanza da superare le cache, come nei carichi reali
+BATCH_CUBES = 1_000_000
+
+
+@benchmark('batch.apply_move', 'mossa')
+def batch_apply_move(options):
+    from rubiks_cube_batch import BatchCube
+    cubes = BatchCube(BATCH_CUBES)
+
+    def step():
+        cubes.apply_move("R")
+        return len(cubes)
+    return step
+
+
+@benchmark('batch.apply_moves', 'mossa')
+def batch_apply_moves(options):
+    from rubiks_cube_batch import BatchCube, MOVE_NAMES
+    cubes = BatchCube(BATCH_CUBES)
+    moves = np.random.default_rng(SEED).integers(0, len(MOVE_NAMES), BATCH_CUBES)
+
+    def step():
+        cubes.apply_moves(moves)
+        return len(cubes)
+    return step
+
+
+# === Risolutore e generatore di stati ===
+
+@benchmark('solver.twophase', 'cubo')
+def twophase_solver(options):
+    from rubiks_cube_scramble import random_state
+    from rubiks_cube_solver import TABLE_PREFIX, TABLE_VERSION, TwoPhaseSolver, TwoPhaseTables, _table_specs
+    from rubiks_cube_tables import TableStore
+    store = TableStore(options.get('tables_dir'))
+    # Generare le tabelle richiede minuti: il benchmark usa solo quelle già su disco
+    for name, bits, _ in _table_specs(None):
+        if store.open(TABLE_PREFIX + name, TABLE_VERSION, bits) is None:
+            raise SkipBenchmark("tabelle a due fasi assenti (python rubiks_cube_tables.py build)")
+    solver = TwoPhaseSolver(TwoPhaseTables.load(store))
+    rng = random.Random(SEED)
+    states = [random_state(rng) for _ in range(8)]
+
+    def step():
+        for state in states:
+            solver.solve(state)
+        return len(states)
+    return step
+
+
+@benchmark('scramble.random_state', 'stato')
+def random_state_single(options):
+    from rubiks_cube_scramble import random_state
+    rng = random.Random(SEED)
+
+    def step():
+        for _ in range(CALLS):
+            random_state(rng)
+        return CALLS
+    return step
+
+
+@benchmark('scramble.random_facelet_array', 'stato')
+def random_facelet_array(options):
+    from rubiks_cube_scramble import random_facelet_array
+    rng = np.random.default_rng(SEED)
+
+    def step():
+        return random_facelet_array(4096, rng).shape[0]
+    return step
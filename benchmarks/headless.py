@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Renderer Senza Finestra per i Benchmark
+Il disegno usa il backend 'headless' di rubiks_cube_render: geometria vera,
+nessuna finestra, conteggio di oggetti creati e aggiornamenti; il tempo
+misurato è quello del codice Python del renderer. load_renderer() carica una
+copia privata di rubiks_cube_3d con un orologio virtuale: le attese non
+dormono ma fanno avanzare il tempo, così un'animazione disegna tutti i suoi
+frame.
+"""
+
+import importlib.util
+
+
+class HeadlessClock:
+    def __init__(self):
+        """Al posto del modulo time nel renderer: un orologio virtuale che avanza solo con sleep"""
+        self.now = 0.0
+        self.sleeps = 0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps += 1
+        self.now += max(0.0, seconds)
+
+    def __getattr__(self, name):
+        import time
+        return getattr(time, name)
+
+
+def load_renderer():
+    """Copia privata di rubiks_cube_3d con l'orologio virtuale: (modulo, orologio).
+
+    I cubi della copia vanno creati con renderer='headless'.
+    """
+    spec = importlib.util.find_spec('rubiks_cube_3d')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    clock = HeadlessClock()
+    module.time = clock
+    return module, clock
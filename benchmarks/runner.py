@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Esecuzione dei Benchmark e Confronto con le Baseline
+Ogni benchmark è una funzione di preparazione registrata con @benchmark che
+restituisce la funzione da cronometrare; questa, a ogni chiamata, esegue un
+certo numero di operazioni e lo restituisce. Il risultato di un benchmark è
+il tempo per operazione, il migliore su più ripetizioni di durata minima
+fissata. Le baseline sono file JSON con il tempo per operazione di ogni
+benchmark; un tempo oltre la baseline di più della soglia è una regressione.
+"""
+
+import gc
+import json
+import os
+import platform
+import re
+import sys
+import time
+
+BASELINE_VERSION = 1
+DEFAULT_BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+DEFAULT_MIN_TIME = 0.2     # Secondi minimi di ogni ripetizione
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.25   # Rallentamento relativo oltre il quale si segnala una regressione
+
+# Benchmark registrati, nell'ordine di registrazione: nome -> (unità, preparazione)
+BENCHMARKS = {}
+
+
+class SkipBenchmark(Exception):
+    """Sollevata dalla preparazione quando un benchmark non può girare (es. tabelle assenti)"""
+
+
+def benchmark(name, unit):
+    """Decoratore che registra una funzione di preparazione; unit è il nome di una singola operazione"""
+    def register(setup):
+        if name in BENCHMARKS:
+            raise ValueError(f"Benchmark già registrato: {name}")
+        BENCHMARKS[name] = (unit, setup)
+        return setup
+    return register
+
+
+def measure(step, min_time=DEFAULT_MIN_TIME, repeat=DEFAULT_REPEAT):
+    """Secondi per operazione di step (il migliore fra le ripetizioni)"""
+    step()  # Riscaldamento: cache, import pigri, memoizzazioni
+    best = None
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            operations = 0
+            start = time.perf_counter()
+            elapsed = 0.0
+            while elapsed < min_time:
+                operations += step() or 1
+                elapsed = time.perf_counter() - start
+            per_operation = elapsed / operations
+            best = per_operation if best is None else min(best, per_operation)
+    finally:
+        if enabled:
+            gc.enable()
+    return best
+
+
+def run_benchmarks(pattern=None, min_time=DEFAULT_MIN_TIME, repeat=DEFAULT_REPEAT, options=None, report=None):
+    """Esegue i benchmark il cui nome corrisponde all'espressione regolare pattern.
+
+    Restituisce {nome: {'seconds': secondi per operazione, 'unit': unità}};
+    i benchmark saltati hanno 'skipped' con il motivo. report(nome, risultato)
+    è chiamata dopo ogni benchmark. options è passato alle preparazioni.
+    """
+    from benchmarks import cases  # Registra i benchmark
+    options = options or {}
+    selected = re.compile(pattern) if pattern else None
+    results = {}
+    for name, (unit, setup) in BENCHMARKS.items():
+        if selected is not None and not selected.search(name):
+            continue
+        try:
+            step = setup(options)
+            result = {'seconds': measure(step, min_time, repeat), 'unit': unit}
+        except SkipBenchmark as reason:
+            result = {'skipped': str(reason), 'unit': unit}
+        results[name] = result
+        if report is not None:
+            report(name, result)
+    return results
+
+
+# === Baseline ===
+
+def default_baseline_path():
+    """Una baseline per macchina: i tempi non sono confrontabili fra macchine diverse"""
+    return os.path.join(DEFAULT_BASELINE_DIR, f"{platform.node() or 'default'}.json")
+
+
+def save_baseline(path, results):
+    """Scrive i risultati misurati in una baseline JSON"""
+    document = {
+        'version': BASELINE_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.node(),
+        'results': {name: result for name, result in results.items() if 'seconds' in result}
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temporary = path + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(document, file, indent=2, sort_keys=True)
+        file.write('\n')
+    os.replace(temporary, path)
+
+
+def load_baseline(path):
+    """Legge una baseline: {nome: risultato}"""
+    with open(path, encoding='utf-8') as file:
+        document = json.load(file)
+    if document.get('version') != BASELINE_VERSION:
+        raise ValueError(f"{path}: versione della baseline non supportata")
+    return document['results']
+
+
+def compare_results(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Confronta i risultati con una baseline.
+
+    Restituisce una lista di (nome, secondi baseline, secondi attuali, rapporto,
+    esito) con esito 'regression', 'improved', 'ok' o 'new' (assente nella baseline).
+    """
+    comparison = []
+    for name, result in results.items():
+        if 'seconds' not in result:
+            continue
+        if name not in baseline:
+            comparison.append((name, None, result['seconds'], None, 'new'))
+            continue
+        ratio = result['seconds'] / baseline[name]['seconds']
+        if ratio > 1 + threshold:
+            status = 'regression'
+        elif ratio < 1 - threshold:
+            status = 'improved'
+        else:
+            status = 'ok'
+        comparison.append((name, baseline[name]['seconds'], result['seconds'], ratio, status))
+    return comparison
+
+
+def format_result(name, result, width=48):
+    """Riga leggibile di un risultato"""
+    if 'skipped' in result:
+        return f"{name:<{width}} saltato: {result['skipped']}"
+    seconds = result['seconds']
+    return f"{name:<{width}} {seconds * 1e6:12.3f} µs/{result['unit']:<9} {1 / seconds:14,.0f} {result['unit']}/s"
+
+
+def print_comparison(comparison, threshold, stream=sys.stdout):
+    labels = {'regression': "REGRESSIONE", 'improved': "migliorato", 'ok': "ok", 'new': "nuovo"}
+    print(f"\nConfronto con la baseline (soglia {threshold:.0%}):", file=stream)
+    for name, base, current, ratio, status in comparison:
+        if ratio is None:
+            print(f"  {name:<48} {labels[status]}", file=stream)
+        else:
+            print(f"  {name:<48} {base * 1e6:12.3f} -> {current * 1e6:12.3f} µs  "
+                  f"({ratio - 1:+7.1%})  {labels[status]}", file=stream)
@@ -13,7 +13,7 @@ class RubiksCubeApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Cubo di Rubik 3D")
-        self.root.geometry("620x520")
+        self.root.geometry("620x600")
         self.root.resizable(False, False)
         
         # Inizializza il cubo 3D
@@ -125,9 +125,21 @@ class RubiksCubeApp:
                                                               command=self.rotate_right_vertical_counter_clockwise)
         self.btn_right_vertical_counter_clockwise.grid(row=0, column=1)
         
+        # Sezione algoritmo: una sequenza in notazione standard applicata senza animazione
+        algorithm_frame = ttk.LabelFrame(main_frame, text="Algoritmo", padding="10")
+        algorithm_frame.grid(row=2, column=0, columnspan=2, pady=(10, 0), sticky=(tk.W, tk.E))
+        
+        self.algorithm_entry = ttk.Entry(algorithm_frame, width=50)
+        self.algorithm_entry.grid(row=0, column=0, padx=(0, 10))
+        self.algorithm_entry.bind('<Return>', lambda event: self.apply_algorithm())
+        
+        self.btn_apply_algorithm = ttk.Button(algorithm_frame, text="Applica Algoritmo", 
+                                             command=self.apply_algorithm)
+        self.btn_apply_algorithm.grid(row=0, column=1)
+        
         # Sezione controlli
         control_frame = ttk.LabelFrame(main_frame, text="Controlli", padding="10")
-        control_frame.grid(row=2, column=0, columnspan=2, pady=(10, 20), sticky=(tk.W, tk.E))
+        control_frame.grid(row=3, column=0, columnspan=2, pady=(10, 20), sticky=(tk.W, tk.E))
         
         # Pulsante reset
         self.btn_reset = ttk.Button(control_frame, text="Reset Cubo", 
@@ -142,116 +154,92 @@ class RubiksCubeApp:
         # Label di stato
         self.status_label = ttk.Label(main_frame, text="Pronto", 
                                      foreground="green", font=('Arial', 10))
-        self.status_label.grid(row=3, column=0, columnspan=2, pady=(10, 0))
+        self.status_label.grid(row=4, column=0, columnspan=2, pady=(10, 0))
     
     def rotate_up_clockwise(self):
         """Ruota la faccia superiore in senso orario"""
-        if self.is_animating:
-            return
-        
         self.set_animating(True)
         self.status_label.config(text="Rotazione superiore oraria in corso...", foreground="orange")
         self.cube_3d.rotate_face('up', 'clockwise', self.on_rotation_complete)
     
     def rotate_up_counter_clockwise(self):
         """Ruota la faccia superiore in senso antiorario"""
-        if self.is_animating:
-            return
-        
         self.set_animating(True)
         self.status_label.config(text="Rotazione superiore antioraria in corso...", foreground="orange")
         self.cube_3d.rotate_face('up', 'counter-clockwise', self.on_rotation_complete)
     
     def rotate_down_clockwise(self):
         """Ruota la faccia inferiore in senso orario"""
-        if self.is_animating:
-            return
-        
         self.set_animating(True)
         self.status_label.config(text="Rotazione inferiore oraria in corso...", foreground="orange")
         self.cube_3d.rotate_face('down', 'clockwise', self.on_rotation_complete)
     
     def rotate_down_counter_clockwise(self):
         """Ruota la faccia inferiore in senso antiorario"""
-        if self.is_animating:
-            return
-        
         self.set_animating(True)
         self.status_label.config(text="Rotazione inferiore antioraria in corso...", foreground="orange")
         self.cube_3d.rotate_face('down', 'counter-clockwise', self.on_rotation_complete)
     
     def rotate_middle_clockwise(self):
         """Ruota la fascia centrale in senso orario"""
-        if self.is_animating:
-            return
-        
         self.set_animating(True)
         self.status_label.config(text="Rotazione centrale oraria in corso...", foreground="orange")
         self.cube_3d.rotate_face('middle', 'clockwise', self.on_rotation_complete)
     
     def rotate_middle_counter_clockwise(self):
         """Ruota la fascia centrale in senso antiorario"""
-        if self.is_animating:
-            return
-        
         self.set_animating(True)
         self.status_label.config(text="Rotazione centrale antioraria in corso...", foreground="orange")
         self.cube_3d.rotate_face('middle', 'counter-clockwise', self.on_rotation_complete)
     
     def rotate_left_vertical_clockwise(self):
         """Ruota la fascia verticale sinistra in senso orario"""
-        if self.is_animating:
-            return
-        
         self.set_animating(True)
         self.status_label.config(text="Rotazione verticale sinistra oraria in corso...", foreground="orange")
         self.cube_3d.rotate_face('left_vertical', 'clockwise', self.on_rotation_complete)
     
     def rotate_left_vertical_counter_clockwise(self):
         """Ruota la fascia verticale sinistra in senso antiorario"""
-        if self.is_animating:
-            return
-        
         self.set_animating(True)
         self.status_label.config(text="Rotazione verticale sinistra antioraria in corso...", foreground="orange")
         self.cube_3d.rotate_face('left_vertical', 'counter-clockwise', self.on_rotation_complete)
     
     def rotate_center_vertical_clockwise(self):
         """Ruota la fascia verticale centrale in senso orario"""
-        if self.is_animating:
-            return
-        
         self.set_animating(True)
         self.status_label.config(text="Rotazione verticale centrale oraria in corso...", foreground="orange")
         self.cube_3d.rotate_face('center_vertical', 'clockwise', self.on_rotation_complete)
     
     def rotate_center_vertical_counter_clockwise(self):
         """Ruota la fascia verticale centrale in senso antiorario"""
-        if self.is_animating:
-            return
-        
         self.set_animating(True)
         self.status_label.config(text="Rotazione verticale centrale antioraria in corso...", foreground="orange")
         self.cube_3d.rotate_face('center_vertical', 'counter-clockwise', self.on_rotation_complete)
     
     def rotate_right_vertical_clockwise(self):
         """Ruota la fascia verticale destra in senso orario"""
-        if self.is_animating:
-            return
-        
         self.set_animating(True)
         self.status_label.config(text="Rotazione verticale destra oraria in corso...", foreground="orange")
         self.cube_3d.rotate_face('right_vertical', 'clockwise', self.on_rotation_complete)
     
     def rotate_right_vertical_counter_clockwise(self):
         """Ruota la fascia verticale destra in senso antiorario"""
-        if self.is_animating:
-            return
-        
         self.set_animating(True)
         self.status_label.config(text="Rotazione verticale destra antioraria in corso...", foreground="orange")
         self.cube_3d.rotate_face('right_vertical', 'counter-clockwise', self.on_rotation_complete)
     
+    def apply_algorithm(self):
+        """Applica senza animazione l'algoritmo scritto nel campo di testo"""
+        try:
+            applied = self.cube_3d.apply_algorithm(self.algorithm_entry.get(), self.on_algorithm_complete)
+        except ValueError as e:
+            self.status_label.config(text=str(e), foreground="red")
+            return
+        
+        if not applied:
+            # Il messaggio finale arriva da on_algorithm_complete quando la coda si svuota
+            self.status_label.config(text="Algoritmo in coda: sarà applicato a fine rotazione", foreground="orange")
+    
     def reset_cube(self):
         """Resetta il cubo allo stato iniziale"""
         if self.is_animating:
@@ -267,22 +255,22 @@ class RubiksCubeApp:
         self.root.destroy()
     
     def on_rotation_complete(self):
-        """Callback chiamato al completamento di una rotazione"""
+        """Callback chiamato quando la coda delle mosse si è svuotata"""
         self.set_animating(False)
         self.status_label.config(text="Rotazione completata", foreground="blue")
         self.root.after(2000, lambda: self.status_label.config(text="Pronto", foreground="green"))
     
+    def on_algorithm_complete(self):
+        """Callback chiamato quando le mosse dell'algoritmo sono sul cubo"""
+        self.status_label.config(text="Algoritmo applicato", foreground="blue")
+        self.root.after(2000, lambda: self.status_label.config(text="Pronto", foreground="green"))
+    
     def set_animating(self, animating):
-        """Imposta lo stato di animazione e abilita/disabilita i pulsanti"""
+        """Imposta lo stato di animazione e abilita/disabilita il reset"""
+        # I pulsanti delle rotazioni restano attivi: le mosse finiscono nella coda del cubo
         self.is_animating = animating
         state = 'disabled' if animating else 'normal'
         
-        self.btn_up_clockwise.config(state=state)
-        self.btn_up_counter_clockwise.config(state=state)
-        self.btn_middle_clockwise.config(state=state)
-        self.btn_middle_counter_clockwise.config(state=state)
-        self.btn_down_clockwise.config(state=state)
-        self.btn_down_counter_clockwise.config(state=state)
         self.btn_reset.config(state=state)
     
     def update_loop(self):
@@ -5,11 +5,18 @@ Cubo di Rubik 3D - Visualizzazione
 Implementazione completa da zero con VPython
 """
 
-import vpython as vp
 import math
 import threading
 import time
+from functools import lru_cache
 from rubiks_cube_model import RubiksCubeModel
+from rubiks_cube_render import create_renderer
+from rubiks_cube_moves import (
+    AXES, FACE_NAMES, FACE_ROTATIONS, MOVE_GATHERS, MOVE_PERMUTATIONS, FACELET_BY_GEOMETRY, compile_algorithm,
+    move_geometry, rotate_vector, transform
+)
+from rubiks_cube_simplify import simplify_algorithm
+from utils import normalize, quaternion_from_axis_angle, rotate_by_quaternion, slerp
 
 # I colori primigeni, come le quattro qualità elementari della fisica antica
 SOLVED_COLORS = {
@@ -23,12 +30,12 @@ SOLVED_COLORS = {
 
 # La traduzione dei colori in numeri, come il sapiente che riduce le qualità sensibili a proporzioni matematiche
 VPYTHON_COLORS = {
-    "white": vp.vector(1, 1, 1),      # Bianco, somma di tutti i colori, come la luce divina
-    "yellow": vp.vector(1, 0.9, 0),   # Giallo, colore dell'intelletto e della saggezza
-    "blue": vp.vector(0, 0.4, 1),     # Azzurro, colore del cielo e dell'infinito
-    "green": vp.vector(0, 0.8, 0.2),  # Verde, colore della natura e della vita
-    "red": vp.vector(1, 0.1, 0),      # Rosso, colore della passione e del sangue
-    "orange": vp.vector(1, 0.4, 0)    # Arancio, colore del calore e dell'energia
+    "white": (1, 1, 1),      # Bianco, somma di tutti i colori, come la luce divina
+    "yellow": (1, 0.9, 0),   # Giallo, colore dell'intelletto e della saggezza
+    "blue": (0, 0.4, 1),     # Azzurro, colore del cielo e dell'infinito
+    "green": (0, 0.8, 0.2),  # Verde, colore della natura e della vita
+    "red": (1, 0.1, 0),      # Rosso, colore della passione e del sangue
+    "orange": (1, 0.4, 0)    # Arancio, colore del calore e dell'energia
 }
 
 # Mappatura lettere del modello -> nomi colori
@@ -41,15 +48,105 @@ LETTER_TO_COLOR = {
     'O': 'orange'
 }
 
+# Sticker di ogni faccia: normale e coordinate del cubetto (0-2) che formano la chiave (faccia, sx, sy)
+STICKER_FACES = (
+    ('up', (0, 1, 0), (0, 2)),
+    ('down', (0, -1, 0), (0, 2)),
+    ('front', (0, 0, 1), (0, 1)),
+    ('back', (0, 0, -1), (0, 1)),
+    ('right', (1, 0, 0), (2, 1)),
+    ('left', (-1, 0, 0), (2, 1))
+)
+
+# Durata di una mossa e intervallo fra i frame, in secondi di orologio reale
+MOVE_DURATION = 0.6
+FRAME_INTERVAL = 0.02  # 50 FPS
+
+# Coda delle mosse: con più mosse in attesa ognuna dura meno, fino a MIN_MOVE_DURATION;
+# oltre INSTANT_BACKLOG mosse in attesa la coda viene applicata senza animazione
+MIN_MOVE_DURATION = 0.1
+INSTANT_BACKLOG = 12
+
+_IDENTITY = ((1, 0, 0), (0, 1, 0), (0, 0, 1))
+
+
+def _rotation_matrix(axis, quarter_turns):
+    """Matrice intera della rotazione di quarter_turns quarti di giro attorno a un asse"""
+    columns = [rotate_vector(basis, axis, quarter_turns) for basis in _IDENTITY]
+    return tuple(tuple(column[row] for column in columns) for row in range(3))
+
+
+def _multiply(first, second):
+    return tuple(tuple(sum(first[row][k] * second[k][column] for k in range(3)) for column in range(3))
+                 for row in range(3))
+
+
+def _as_tuple(vector):
+    return (vector.x, vector.y, vector.z)
+
+
+# Le 27 posizioni dei cubetti (coordinate 0-2), nell'ordine di create_cube
+_SLOTS = tuple((x, y, z) for x in range(3) for y in range(3) for z in range(3))
+_SLOT_INDEX = {slot: index for index, slot in enumerate(_SLOTS)}
+
+
+def _slot_motion(move):
+    """Effetto di una mossa sulle posizioni: (da quale posizione arriva il cubetto di ogni posizione, rotazione subita)"""
+    axis, layers, quarter_turns = move_geometry(move)
+    turn = _rotation_matrix(axis, quarter_turns)
+    gather = list(range(27))
+    turns = [None] * 27
+    for index, slot in enumerate(_SLOTS):
+        if slot['xyz'.index(axis)] - 1 in layers:
+            centered = rotate_vector(tuple(c - 1 for c in slot), axis, quarter_turns)
+            target = _SLOT_INDEX[tuple(c + 1 for c in centered)]
+            gather[target] = index
+            turns[target] = turn
+    return gather, turns
+
+
+_MOVE_SLOT_MOTIONS = {move: _slot_motion(move) for move in MOVE_PERMUTATIONS}
+
+
+@lru_cache(maxsize=256)
+def _compile_slot_motion(moves):
+    """Compone l'effetto sulle posizioni di un'intera sequenza normalizzata (memoizzata)"""
+    gather = tuple(range(27))
+    turns = (_IDENTITY,) * 27
+    for move in moves:
+        move_gather, move_turns = _MOVE_SLOT_MOTIONS[move]
+        gather = tuple(gather[source] for source in move_gather)
+        turns = tuple(turns[source] if turn is None else _multiply(turn, turns[source])
+                      for source, turn in zip(move_gather, move_turns))
+    return gather, turns
+
+
 class RubiksCube3D:
-    def __init__(self):
-        """Inizializza il cubo 3D"""
+    def __init__(self, renderer=None):
+        """Inizializza il cubo 3D.
+        
+        renderer è il backend di disegno: 'vpython' (predefinito), 'headless'
+        per usarlo senza finestra, oppure un backend già creato.
+        """
+        # Backend di disegno: VPython è importato solo se richiesto
+        self.renderer = create_renderer(renderer)
+        
         # Modello logico
         self.model = RubiksCubeModel()
         
         # Stato animazione
         self.is_animating = False
-        self.animation_callback = None
+        self.move_duration = MOVE_DURATION
+        self.frames_drawn = 0
+        self.frames_skipped = 0  # Frame saltati per restare nella durata della mossa
+        
+        # Coda delle mosse in attesa, servita da un solo thread alla volta
+        self.move_queue = []
+        self._flush_queue = False  # La prossima volta la coda si applica tutta senza animazione
+        self.moves_animated = 0
+        self.moves_applied_instantly = 0
+        self._queue_callbacks = []
+        self._queue_lock = threading.Lock()
         
         # Parametri grafici
         self.cube_size = 0.9
@@ -58,18 +155,24 @@ class RubiksCube3D:
         
         # Colori delle facce
         self.colors = {
-            'W': VPYTHON_COLORS["white"],
-            'Y': VPYTHON_COLORS["yellow"],
-            'B': VPYTHON_COLORS["blue"],
-            'G': VPYTHON_COLORS["green"],
-            'R': VPYTHON_COLORS["red"],
-            'O': VPYTHON_COLORS["orange"]
+            'W': self.renderer.vector(*VPYTHON_COLORS["white"]),
+            'Y': self.renderer.vector(*VPYTHON_COLORS["yellow"]),
+            'B': self.renderer.vector(*VPYTHON_COLORS["blue"]),
+            'G': self.renderer.vector(*VPYTHON_COLORS["green"]),
+            'R': self.renderer.vector(*VPYTHON_COLORS["red"]),
+            'O': self.renderer.vector(*VPYTHON_COLORS["orange"])
         }
         
         # Sistema di posizioni logiche per tracciare le trasformazioni
         # Simile al sistema ThreeJS con currentPosition
         self.logical_positions = {}
         
+        # Colori VPython per byte di lettera del modello
+        self._palette = {ord(letter): color for letter, color in self.colors.items()}
+        
+        # Versione del modello a cui corrispondono i colori degli sticker
+        self._colors_version = None
+        
         # Inizializza la scena 3D
         self.setup_scene()
         self.create_cube()
@@ -77,20 +180,21 @@ class RubiksCube3D:
     
     def setup_scene(self):
         """Configura la scena 3D"""
-        # Crea la scena VPython
+        # Crea la scena
+        vp = self.renderer
         self.scene = vp.canvas(
             title="Cubo di Rubik 3D",
             width=800,
             height=600,
-            background=vp.color.gray(0.95)  # Sfondo molto più chiaro
+            background=vp.gray(0.95)  # Sfondo molto più chiaro
         )
         
         # Le luci, come i luminari che Dio pose nel firmamento per rischiarare la terra
-        vp.distant_light(direction=vp.vector(1,2,1), color=vp.color.gray(0.9))
-        vp.distant_light(direction=vp.vector(-1,-2,-0.5), color=vp.color.gray(0.7))
-        vp.distant_light(direction=vp.vector(0,1,0), color=vp.color.gray(0.5))
+        vp.distant_light(direction=vp.vector(1,2,1), color=vp.gray(0.9))
+        vp.distant_light(direction=vp.vector(-1,-2,-0.5), color=vp.gray(0.7))
+        vp.distant_light(direction=vp.vector(0,1,0), color=vp.gray(0.5))
         # La luce ambiente, come l'etere che tutto permea
-        self.scene.ambient = vp.color.gray(0.3)
+        self.scene.ambient = vp.gray(0.3)
         
         # Posiziona la camera per una vista ottimale
         self.scene.camera.pos = vp.vector(6, 4, 6)
@@ -98,10 +202,17 @@ class RubiksCube3D:
         self.scene.up = vp.vector(0, 1, 0)
     
     def create_cube(self):
-        """Crea la struttura 3D del cubo"""
+        """Crea la struttura 3D del cubo (una sola volta: reset e riallineamento riusano gli oggetti)"""
         self.cubies = {}  # Cubetti individuali
         self.stickers = {}  # Sticker colorati
+        self.cubie_stickers = {}  # Sticker di ogni cubetto, per cubetto di partenza
+        self.sticker_at = [None] * 54  # Chiave dello sticker che occupa ogni facelet
+        self._pushed_colors = {}  # Ultimo colore scritto su ogni sticker
+        self._colors_version = self.model.version
         self.logical_positions = {}  # Reset delle posizioni logiche
+        self.orientations = {}  # Rotazione (matrice intera) di ogni cubetto rispetto alla posa iniziale
+        self._home_poses = {}  # (oggetto, posizione, asse, verticale) iniziali per cubetto
+        vp = self.renderer
         
         # Crea i 27 cubetti (3x3x3)
         for x in range(3):
@@ -118,12 +229,12 @@ class RubiksCube3D:
                     cubie = vp.box(
                         pos=pos,
                         size=vp.vector(self.cube_size, self.cube_size, self.cube_size),
-                        color=vp.color.gray(0.2),
+                        color=vp.gray(0.2),
                         ambient=0.2,
                         diffuse=0.7,
                         specular=0.8,
                         shininess=1.0,
-                        emissive=vp.color.gray(0.05)
+                        emissive=vp.gray(0.05)
                     )
                     self.cubies[(x, y, z)] = cubie
                     
@@ -132,342 +243,344 @@ class RubiksCube3D:
                     
                     # Crea gli sticker sulle facce esterne
                     self.create_stickers(x, y, z, pos)
+                    
+                    # Posa iniziale di cubetto e sticker, da cui si ricavano le posizioni esatte
+                    self.orientations[(x, y, z)] = _IDENTITY
+                    self._home_poses[(x, y, z)] = [
+                        (obj, _as_tuple(obj.pos), _as_tuple(obj.axis), _as_tuple(obj.up))
+                        for obj in [cubie] + self.cubie_stickers[(x, y, z)]
+                    ]
+        
+        # Sticker di ogni facelet nella posa iniziale, per riportarli a casa senza ricrearli
+        self._home_sticker_at = list(self.sticker_at)
     
     def create_stickers(self, x, y, z, pos):
-        """Crea gli sticker colorati per un cubetto"""
+        """Crea gli sticker colorati per un cubetto e li registra nell'indice cubetto -> sticker"""
         sticker_thickness = 0.02
         offset = (self.cube_size + sticker_thickness) / 2
+        position = (x - 1, y - 1, z - 1)
+        stickers = self.cubie_stickers.setdefault((x, y, z), [])
+        vp = self.renderer
         
-        # Sticker sulla faccia superiore (y = 2)
-        if y == 2:
-            color_letter = self.model.faces['up'][x][z]
-            current_color = LETTER_TO_COLOR[color_letter]
-            sticker = vp.box(
-                pos=pos + vp.vector(0, offset, 0),
-                size=vp.vector(self.sticker_size, sticker_thickness, self.sticker_size),
-                color=VPYTHON_COLORS[current_color],
-                shininess=0.5
-            )
-            self.stickers[('up', x, z)] = sticker
-        
-        # Sticker sulla faccia inferiore (y = 0)
-        if y == 0:
-            color_letter = self.model.faces['down'][x][z]
-            current_color = LETTER_TO_COLOR[color_letter]
-            sticker = vp.box(
-                pos=pos + vp.vector(0, -offset, 0),
-                size=vp.vector(self.sticker_size, sticker_thickness, self.sticker_size),
-                color=VPYTHON_COLORS[current_color],
-                shininess=0.5
-            )
-            self.stickers[('down', x, z)] = sticker
-        
-        # Sticker sulla faccia frontale (z = 2)
-        if z == 2:
-            color_letter = self.model.faces['front'][x][y]
-            current_color = LETTER_TO_COLOR[color_letter]
-            sticker = vp.box(
-                pos=pos + vp.vector(0, 0, offset),
-                size=vp.vector(self.sticker_size, self.sticker_size, sticker_thickness),
-                color=VPYTHON_COLORS[current_color],
-                shininess=0.5
-            )
-            self.stickers[('front', x, y)] = sticker
-        
-        # Sticker sulla faccia posteriore (z = 0)
-        if z == 0:
-            color_letter = self.model.faces['back'][x][y]
-            current_color = LETTER_TO_COLOR[color_letter]
-            sticker = vp.box(
-                pos=pos + vp.vector(0, 0, -offset),
-                size=vp.vector(self.sticker_size, self.sticker_size, sticker_thickness),
-                color=VPYTHON_COLORS[current_color],
-                shininess=0.5
-            )
-            self.stickers[('back', x, y)] = sticker
-        
-        # Sticker sulla faccia destra (x = 2)
-        if x == 2:
-            color_letter = self.model.faces['right'][z][y]
-            current_color = LETTER_TO_COLOR[color_letter]
-            sticker = vp.box(
-                pos=pos + vp.vector(offset, 0, 0),
-                size=vp.vector(sticker_thickness, self.sticker_size, self.sticker_size),
-                color=VPYTHON_COLORS[current_color],
-                shininess=0.5
-            )
-            self.stickers[('right', z, y)] = sticker
-        
-        # Sticker sulla faccia sinistra (x = 0)
-        if x == 0:
-            color_letter = self.model.faces['left'][z][y]
-            current_color = LETTER_TO_COLOR[color_letter]
-            sticker = vp.box(
-                pos=pos + vp.vector(-offset, 0, 0),
-                size=vp.vector(sticker_thickness, self.sticker_size, self.sticker_size),
-                color=VPYTHON_COLORS[current_color],
-                shininess=0.5
-            )
-            self.stickers[('left', z, y)] = sticker
+        for face_name, normal, key_axes in STICKER_FACES:
+            # Lo sticker esiste solo se il cubetto sta sulla faccia
+            if all(component == 0 or component == coordinate for component, coordinate in zip(normal, position)):
+                # Facelet del modello nella stessa posizione e con la stessa normale
+                index = FACELET_BY_GEOMETRY[(position, normal)]
+                color_letter = self.model.facelets[index]
+                size = [self.sticker_size if component == 0 else sticker_thickness for component in normal]
+                sticker = vp.box(
+                    pos=pos + vp.vector(*normal) * offset,
+                    size=vp.vector(*size),
+                    color=self._palette[color_letter],
+                    shininess=0.5
+                )
+                key = (face_name,) + tuple((x, y, z)[axis] for axis in key_axes)
+                self.stickers[key] = sticker
+                self.sticker_at[index] = key
+                self._pushed_colors[key] = color_letter
+                stickers.append(sticker)
     
     def update_colors(self, faces_to_update=None):
-        """Aggiorna i colori degli sticker basandosi sul modello logico"""
-        all_faces = self.model.get_all_faces()
+        """Porta i colori degli sticker allo stato del modello, scrivendo solo quelli cambiati"""
+        # Nessun lavoro se il modello non è cambiato dall'ultimo aggiornamento completo
+        if faces_to_update is None and self.model.version == self._colors_version:
+            return
         
-        # Se non specificato, aggiorna tutte le facce
         if faces_to_update is None:
-            faces_to_update = all_faces.keys()
+            indices = range(54)
+            self._colors_version = self.model.version
+        else:
+            indices = [FACE_NAMES.index(name) * 9 + offset
+                       for name in faces_to_update if name in FACE_NAMES for offset in range(9)]
         
-        # Aggiorna solo le facce specificate
-        for face_name in faces_to_update:
-            if face_name in all_faces:
-                face_data = all_faces[face_name]
-                for i in range(3):
-                    for j in range(3):
-                        color_char = face_data[i][j]
-                        sticker_key = (face_name, j, i)
-                        if sticker_key in self.stickers:
-                            self.stickers[sticker_key].color = self.colors[color_char]
+        facelets = self.model.state_view()
+        sticker_at = self.sticker_at
+        pushed = self._pushed_colors
+        for index in indices:
+            color_letter = facelets[index]
+            key = sticker_at[index]
+            # Ogni scrittura di un attributo VPython è un messaggio al browser
+            if pushed[key] != color_letter:
+                self.stickers[key].color = self._palette[color_letter]
+                pushed[key] = color_letter
     
     def reset(self):
         """Resetta il cubo allo stato iniziale"""
         if self.is_animating:
             return
         
-        # Rimuovi tutti gli oggetti esistenti
-        for cubie in self.cubies.values():
-            cubie.visible = False
-            del cubie
-        for sticker in self.stickers.values():
-            sticker.visible = False
-            del sticker
-        
         # Resetta il modello logico
         self.model.reset()
         
-        # Ricrea il cubo da zero
-        self.create_cube()
-        self.update_colors()
+        # Gli stessi oggetti tornano nella posa iniziale con i colori del modello
+        self.realign_physical_objects()
         
         print("Cubo resettato allo stato iniziale")
     
     def rotate_face(self, face_name, direction, callback=None):
         """Ruota una faccia del cubo con animazione"""
-        if self.is_animating:
+        if face_name not in FACE_ROTATIONS:
+            print(f"Rotazione di {face_name} non supportata")
+            if callback:
+                callback()
             return
         
-        if face_name not in ['up', 'down', 'middle', 'left_vertical', 'center_vertical', 'right_vertical']:
-            print(f"Rotazione di {face_name} non ancora implementata")
+        clockwise_move, counter_clockwise_move = FACE_ROTATIONS[face_name]
+        move = clockwise_move if direction == 'clockwise' else counter_clockwise_move
+        self.rotate_move(move, callback)
+    
+    def rotate_move(self, move, callback=None):
+        """Accoda una mossa in notazione standard (es. "F", "S'", "x2") da eseguire con animazione.
+        
+        Non blocca e non scarta mai: se un'animazione è in corso la mossa
+        aspetta in coda. callback è chiamato quando la coda si svuota.
+        """
+        if move not in MOVE_PERMUTATIONS:
+            print(f"Mossa {move} non supportata")
             if callback:
                 callback()
             return
         
-        # Avvia l'animazione in un thread separato
-        self.is_animating = True
-        self.animation_callback = callback
-        
-        animation_thread = threading.Thread(
-            target=self._animate_rotation,
-            args=(face_name, direction)
-        )
+        with self._queue_lock:
+            self.move_queue.append(move)
+            if callback and callback not in self._queue_callbacks:
+                self._queue_callbacks.append(callback)
+            if self.is_animating:
+                return
+            self.is_animating = True
+        self._start_move_queue()
+    
+    def _start_move_queue(self):
+        """Avvia il servizio della coda in un thread separato (is_animating già impostato)"""
+        animation_thread = threading.Thread(target=self._run_move_queue)
         animation_thread.daemon = True
         animation_thread.start()
     
-    def _animate_rotation(self, face_name, direction):
-        """Anima la rotazione della faccia usando il sistema di pivot groups"""
+    def _run_move_queue(self):
+        """Esegue le mosse in coda finché non ne arrivano più"""
+        while True:
+            with self._queue_lock:
+                # Le mosse non ancora eseguite si semplificano insieme a quelle appena
+                # arrivate: "R R'" sparisce, "U U" diventa "U2"
+                queued, _ = simplify_algorithm(self.move_queue)
+                backlog = len(queued)
+                if backlog == 0:
+                    self.move_queue = []
+                    self.is_animating = False
+                    callbacks, self._queue_callbacks = self._queue_callbacks, []
+                    break
+                instant = backlog > INSTANT_BACKLOG or self._flush_queue
+                self._flush_queue = False
+                if instant:
+                    moves, self.move_queue = queued, []
+                else:
+                    moves, self.move_queue = queued[:1], list(queued[1:])
+            
+            if instant:
+                self._apply_moves_instantly(moves)
+            else:
+                # Più mosse aspettano, più in fretta gira ciascuna
+                self._animate_rotation(moves[0], max(MIN_MOVE_DURATION, self.move_duration / backlog))
+        
+        for callback in callbacks:
+            callback()
+    
+    def apply_algorithm(self, moves, callback=None):
+        """Porta il cubo allo stato finale di un algoritmo (stringa o sequenza di mosse) senza animarlo.
+        
+        Restituisce True se le mosse sono già sul cubo. Se la coda sta
+        animando restituisce False: le mosse si accodano e la coda intera
+        viene applicata senza animazione appena finisce la mossa in corso.
+        callback è chiamato quando le mosse sono sul cubo, subito o quando
+        la coda si svuota. Solleva ValueError per una notazione non valida.
+        """
+        compiled = compile_algorithm(moves)
+        with self._queue_lock:
+            if self.is_animating:
+                self.move_queue.extend(compiled.moves)
+                self._flush_queue = True
+                if callback and callback not in self._queue_callbacks:
+                    self._queue_callbacks.append(callback)
+                return False
+            self.is_animating = True
+        try:
+            self._apply_moves_instantly(compiled.moves)
+        finally:
+            with self._queue_lock:
+                # Le mosse accodate nel frattempo partono ora, nell'ordine d'arrivo
+                self.is_animating = bool(self.move_queue)
+            if self.is_animating:
+                self._start_move_queue()
+        if callback:
+            callback()
+        return True
+    
+    def _apply_moves_instantly(self, moves):
+        """Applica una sequenza di mosse a modello e scena senza animarla"""
         try:
-            # Parametri animazione
-            total_angle = math.pi / 2  # 90 gradi
-            if direction == 'counter-clockwise':
-                total_angle = -total_angle
+            compiled = compile_algorithm(moves)
             
-            steps = 30  # Numero di frame dell'animazione
-            angle_per_step = total_angle / steps
+            # Il modello e gli sticker con un'unica permutazione delle facelet
+            self.model.apply_algorithm(compiled)
+            self.sticker_at = list(compiled.gather(self.sticker_at))
             
-            # Determina asse, layer e origine di rotazione basandosi sulle posizioni logiche
-            axis, layer, rotation_axis, rotation_origin = self._get_rotation_params(face_name)
+            # Posizioni e orientamenti dei cubetti con un'unica permutazione delle posizioni
+            gather, turns = _compile_slot_motion(compiled.moves)
+            occupants = [None] * 27
+            for key, pos in self.logical_positions.items():
+                occupants[_SLOT_INDEX[(round(pos['x']), round(pos['y']), round(pos['z']))]] = key
+            for index, (source, turn) in enumerate(zip(gather, turns)):
+                key = occupants[source]
+                x, y, z = _SLOTS[index]
+                self.logical_positions[key] = {'x': x, 'y': y, 'z': z}
+                if turn is not _IDENTITY:
+                    self.orientations[key] = _multiply(turn, self.orientations[key])
+            
+            # Una sola sistemazione delle pose e un solo aggiornamento (differenziale) dei colori
+            self.fix_rotation_precision()
+            self.update_colors()
+            self.moves_applied_instantly += len(compiled)
+            print(f"Applicate {len(compiled)} mosse senza animazione")
+        except Exception as e:
+            print(f"Errore durante l'applicazione delle mosse: {e}")
+    
+    def _animate_rotation(self, move, duration=None):
+        """Anima una mossa ruotando gli strati indicati dalla sua geometria (durata in secondi)"""
+        try:
+            # Asse, strati e verso derivano dalla stessa tabella che genera le permutazioni del modello
+            axis, layers, quarter_turns = move_geometry(move)
+            total_angle = quarter_turns * math.pi / 2
+            
+            rotation_axis, rotation_origin = self._get_rotation_params(axis)
             
             # Trova i cubetti da ruotare basandosi sulle posizioni logiche correnti
-            cubies_to_rotate = []
-            for (x, y, z), cubie in self.cubies.items():
-                logical_pos = self.logical_positions[(x, y, z)]
-                if round(logical_pos[axis]) == layer:
-                    cubies_to_rotate.append((x, y, z))
+            cubies_to_rotate = [cubie_key for cubie_key, logical_pos in self.logical_positions.items()
+                                if round(logical_pos[axis]) - 1 in layers]
             
-            # Raccogli tutti gli oggetti da ruotare (cubetti + sticker)
+            # Il cubetto e i suoi sticker, dall'indice precalcolato
             objects_to_rotate = []
-            
-            # Aggiungi i cubetti
             for cubie_key in cubies_to_rotate:
                 objects_to_rotate.append(self.cubies[cubie_key])
+                objects_to_rotate.extend(self.cubie_stickers[cubie_key])
             
-            # Aggiungi gli sticker associati ai cubetti da ruotare
-            for cubie_key in cubies_to_rotate:
-                x, y, z = cubie_key
-                # Aggiungi tutti gli sticker di questo cubetto
-                for sticker_key, sticker in self.stickers.items():
-                    if len(sticker_key) == 3:  # (face, sx, sy)
-                        face, sx, sy = sticker_key
-                        # Verifica se questo sticker appartiene al cubetto corrente
-                        if self._sticker_belongs_to_cubie(face, sx, sy, x, y, z):
-                            objects_to_rotate.append(sticker)
-            
-            print(f"Animando rotazione {direction} della faccia {face_name}...")
+            print(f"Animando la mossa {move}...")
             print(f"Oggetti da ruotare: {len(objects_to_rotate)}")
             
-            # Esegui l'animazione
-            for step in range(steps):
+            # L'intero strato diventa un solo oggetto composto: un aggiornamento per frame
+            # invece di uno per ogni cubetto e sticker. VPython nasconde gli originali.
+            layer = self.renderer.compound(objects_to_rotate)
+            try:
+                self._play_rotation(layer, rotation_axis, rotation_origin, total_angle,
+                                    self.move_duration if duration is None else duration)
+                
+                # Aggiorna le posizioni logiche dopo la rotazione
+                self._update_logical_positions(axis, layers, quarter_turns)
+                
+                # Gli originali tornano nelle posizioni esatte, senza errori accumulati
+                self.fix_rotation_precision(cubies_to_rotate)
+            finally:
+                # Eliminato davvero (anche dal browser): nasconderlo lascerebbe una mesh per mossa
+                layer.delete()
                 for obj in objects_to_rotate:
-                    obj.rotate(
-                        angle=angle_per_step,
-                        axis=rotation_axis,
-                        origin=rotation_origin
-                    )
-                time.sleep(0.02)  # 50 FPS
+                    obj.visible = True
+            
+            # Gli sticker si sono spostati con la stessa permutazione delle facelet
+            self.sticker_at = list(MOVE_GATHERS[move](self.sticker_at))
             
-            # Aggiorna le posizioni logiche dopo la rotazione
-            self._update_logical_positions(axis, layer, total_angle)
+            # Applica la stessa mossa al modello logico
+            self.model.apply_move(move)
             
-            # Applica la rotazione logica al modello
-            self._apply_logical_rotation(face_name, direction)
+            # I colori hanno viaggiato con gli sticker: il confronto non scrive nulla
+            # se la scena è coerente con il modello
+            self.update_colors()
             
+            self.moves_animated += 1
             print("Rotazione completata")
             
         except Exception as e:
             print(f"Errore durante l'animazione: {e}")
-        
-        finally:
-            # Termina l'animazione
-            self.is_animating = False
-            if self.animation_callback:
-                self.animation_callback()
     
-    def _get_rotation_params(self, face_name):
-        """Determina i parametri di rotazione per una faccia"""
-        if face_name == 'up':
-            return 'y', 2, vp.vector(0, 1, 0), vp.vector(0, (self.cube_size + self.gap), 0)
-        elif face_name == 'down':
-            return 'y', 0, vp.vector(0, 1, 0), vp.vector(0, -(self.cube_size + self.gap), 0)
-        elif face_name == 'middle':
-            return 'y', 1, vp.vector(0, 1, 0), vp.vector(0, 0, 0)
-        elif face_name == 'left_vertical':
-            return 'x', 0, vp.vector(1, 0, 0), vp.vector(-(self.cube_size + self.gap), 0, 0)
-        elif face_name == 'center_vertical':
-            return 'x', 1, vp.vector(1, 0, 0), vp.vector(0, 0, 0)
-        elif face_name == 'right_vertical':
-            return 'x', 2, vp.vector(1, 0, 0), vp.vector((self.cube_size + self.gap), 0, 0)
-        else:
-            raise ValueError(f"Face name non supportato: {face_name}")
+    def _play_rotation(self, layer, rotation_axis, rotation_origin, total_angle, duration):
+        """Ruota l'oggetto composto di total_angle in duration secondi di orologio reale.
+        
+        Ogni frame calcola l'orientamento assoluto interpolando (slerp) fra il
+        quaternione iniziale e quello finale, quindi non accumula errori; se un
+        frame arriva in ritardo quelli persi sono saltati e la mossa finisce
+        comunque in tempo.
+        """
+        start_orientation = (0.0, 0.0, 0.0, 1.0)
+        end_orientation = normalize(quaternion_from_axis_angle(rotation_axis, total_angle))
+        origin = _as_tuple(rotation_origin)
+        offset = tuple(a - b for a, b in zip(_as_tuple(layer.pos), origin))
+        axis, up = _as_tuple(layer.axis), _as_tuple(layer.up)
+        
+        vector = self.renderer.vector
+        start = time.monotonic()
+        last_frame = -1
+        while True:
+            elapsed = time.monotonic() - start
+            progress = min(1.0, elapsed / duration) if duration > 0 else 1.0
+            orientation = slerp(start_orientation, end_orientation, progress)
+            layer.pos = vector(*(a + b for a, b in zip(origin, rotate_by_quaternion(orientation, offset))))
+            layer.axis = vector(*rotate_by_quaternion(orientation, axis))
+            layer.up = vector(*rotate_by_quaternion(orientation, up))
+            # Frame della griglia di FRAME_INTERVAL: quelli fra l'ultimo disegnato e questo sono saltati
+            frame = max(last_frame + 1, int(elapsed / FRAME_INTERVAL))
+            self.frames_drawn += 1
+            self.frames_skipped += max(0, frame - last_frame - 1)
+            last_frame = frame
+            if progress >= 1.0:
+                return
+            time.sleep(max(0.0, start + (frame + 1) * FRAME_INTERVAL - time.monotonic()))
     
-    def _sticker_belongs_to_cubie(self, face, sx, sy, x, y, z):
-        """Verifica se uno sticker appartiene a un cubetto specifico"""
-        if face == 'up' and y == 2:
-            return sx == x and sy == z
-        elif face == 'down' and y == 0:
-            return sx == x and sy == z
-        elif face == 'front' and z == 2:
-            return sx == x and sy == y
-        elif face == 'back' and z == 0:
-            return sx == x and sy == y
-        elif face == 'right' and x == 2:
-            return sx == z and sy == y
-        elif face == 'left' and x == 0:
-            return sx == z and sy == y
-        return False
+    def _get_rotation_params(self, axis):
+        """Restituisce il vettore dell'asse di rotazione e l'origine (il centro del cubo)"""
+        # L'asse passa per il centro del cubo: lo stesso punto va bene per ogni strato
+        return self.renderer.vector(*AXES[axis]), self.renderer.vector(0, 0, 0)
     
-    def _update_logical_positions(self, axis, layer, angle):
-        """Aggiorna le posizioni logiche dopo una rotazione (simile a ThreeJS)"""
-        direction = 1 if angle > 0 else -1
-        
-        for (x, y, z), pos in self.logical_positions.items():
-            if round(pos[axis]) == layer:
-                # Converte a coordinate centrate su 0
-                cx = pos['x'] - 1
-                cy = pos['y'] - 1
-                cz = pos['z'] - 1
-                
-                # Applica la rotazione secondo l'asse
-                if axis == 'y':  # Rotazione attorno all'asse Y (up, down, middle)
-                    new_x = cz * direction
-                    new_z = -cx * direction
-                    new_y = cy
-                elif axis == 'x':  # Rotazione attorno all'asse X (left_vertical)
-                    new_y = -cz * direction
-                    new_z = cy * direction
-                    new_x = cx
-                elif axis == 'z':  # Rotazione attorno all'asse Z (front, back)
-                    new_x = -cy * direction
-                    new_y = cx * direction
-                    new_z = cz
+    def _update_logical_positions(self, axis, layers, quarter_turns):
+        """Aggiorna le posizioni logiche e gli orientamenti dopo una rotazione (simile a ThreeJS)"""
+        turn = _rotation_matrix(axis, quarter_turns)
+        for key, pos in self.logical_positions.items():
+            if round(pos[axis]) - 1 in layers:
+                # Ruota le coordinate centrate su 0 con la stessa funzione usata per le facelet
+                x, y, z = rotate_vector((pos['x'] - 1, pos['y'] - 1, pos['z'] - 1), axis, quarter_turns)
                 
                 # Riconverte a coordinate del cubo (0-2)
-                self.logical_positions[(x, y, z)] = {
-                    'x': new_x + 1,
-                    'y': new_y + 1,
-                    'z': new_z + 1
-                }
+                self.logical_positions[key] = {'x': x + 1, 'y': y + 1, 'z': z + 1}
+                self.orientations[key] = _multiply(turn, self.orientations[key])
     
-    def _apply_logical_rotation(self, face_name, direction):
-        """Applica la rotazione al modello logico"""
-        if face_name == 'up':
-            if direction == 'clockwise':
-                self.model.rotate_up_clockwise()
-            else:
-                self.model.rotate_up_counter_clockwise()
-        elif face_name == 'down':
-            if direction == 'clockwise':
-                self.model.rotate_down_clockwise()
-            else:
-                self.model.rotate_down_counter_clockwise()
-        elif face_name == 'middle':
-            if direction == 'clockwise':
-                self.model.rotate_middle_clockwise()
-            else:
-                self.model.rotate_middle_counter_clockwise()
-        elif face_name == 'left_vertical':
-            if direction == 'clockwise':
-                self.model.rotate_left_vertical_clockwise()
-            else:
-                self.model.rotate_left_vertical_counter_clockwise()
-        elif face_name == 'center_vertical':
-            if direction == 'clockwise':
-                self.model.rotate_center_vertical_clockwise()
-            else:
-                self.model.rotate_center_vertical_counter_clockwise()
-        elif face_name == 'right_vertical':
-            if direction == 'clockwise':
-                self.model.rotate_right_vertical_clockwise()
-            else:
-                self.model.rotate_right_vertical_counter_clockwise()
-
-    def fix_rotation_precision(self, rotated_objects, face_name):
-        """Corregge le imprecisioni di rotazione senza distruggere gli oggetti"""
-        # Dopo l'animazione, gli oggetti potrebbero avere piccole imprecisioni di posizione
-        # dovute agli errori di arrotondamento dei calcoli in virgola mobile
-        # Questa funzione corregge solo le posizioni mantenendo i colori attuali
-        
-        # Per ora, manteniamo gli oggetti così come sono dopo l'animazione
-        # I colori dell'ultimo frame dell'animazione vengono conservati
-        pass
+    def fix_rotation_precision(self, cubie_keys=None):
+        """Riporta cubetti e sticker nelle posizioni esatte date dal loro orientamento logico"""
+        # Le rotazioni in virgola mobile accumulano piccoli errori: posizione, asse e
+        # verticale di ogni oggetto sono ricalcolati dalla posa iniziale con matrici intere
+        vector = self.renderer.vector
+        for key in self.cubies if cubie_keys is None else cubie_keys:
+            orientation = self.orientations[key]
+            for obj, pos, axis, up in self._home_poses[key]:
+                obj.pos = vector(*transform(orientation, pos))
+                obj.axis = vector(*transform(orientation, axis))
+                obj.up = vector(*transform(orientation, up))
     
     def realign_physical_objects(self):
         """Riposiziona fisicamente tutti gli oggetti secondo lo stato logico del cubo"""
-        # Rimuovi tutti gli oggetti esistenti
-        for cubie in self.cubies.values():
-            cubie.visible = False
-            del cubie
-        for sticker in self.stickers.values():
-            sticker.visible = False
-            del sticker
+        # Nessun oggetto nuovo: ogni cubetto torna nella sua posa iniziale riscrivendo
+        # posizione, asse e verticale, e gli sticker prendono i colori del modello
+        for key in self.cubies:
+            self.logical_positions[key] = {'x': key[0], 'y': key[1], 'z': key[2]}
+            self.orientations[key] = _IDENTITY
+        self.sticker_at = list(self._home_sticker_at)
+        self.fix_rotation_precision()
         
-        # Pulisci i dizionari
-        self.cubies.clear()
-        self.stickers.clear()
+        # Un'animazione interrotta può aver lasciato nascosti gli originali
+        for obj in list(self.cubies.values()) + list(self.stickers.values()):
+            if not obj.visible:
+                obj.visible = True
         
-        # Ricrea il cubo da zero nella posizione corretta
-        # I colori vengono applicati automaticamente durante la creazione degli sticker
-        # basandosi sullo stato corrente del modello logico
-        self.create_cube()
+        # Gli sticker sono cambiati anche se il modello no: il confronto va rifatto
+        self._colors_version = None
+        self.update_colors()
     
     def update(self):
         """Aggiorna la visualizzazione (chiamato dal loop principale)"""
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Operazioni Vettoriali sulle Permutazioni dei Cubetti
+Funzioni NumPy su matrici di permutazioni (una permutazione per riga),
+condivise da risolutore, generatore di stati e codifica binaria: rango
+lessicografico, permutazione dal rango e parità.
+"""
+
+from math import factorial
+
+import numpy as np
+
+_FACTORIALS = np.array([factorial(n) for n in range(13)], dtype=np.int64)
+
+
+def rank_rows(permutations):
+    """Rango lessicografico di ogni riga di una matrice di permutazioni (K, n)"""
+    size = permutations.shape[1]
+    ranks = np.zeros(permutations.shape[0], dtype=np.int64)
+    for i in range(size):
+        smaller = (permutations[:, i + 1:] < permutations[:, i:i + 1]).sum(axis=1)
+        ranks = ranks * (size - i) + smaller
+    return ranks
+
+
+def unrank_rows(ranks, size):
+    """Permutazioni di size elementi dai loro ranghi lessicografici (inverso di rank_rows)"""
+    ranks = np.asarray(ranks, dtype=np.int64)
+    available = np.ones((ranks.size, size), dtype=bool)
+    result = np.empty((ranks.size, size), dtype=np.int8)
+    rows = np.arange(ranks.size)
+    for i in range(size):
+        digit = ranks // _FACTORIALS[size - 1 - i] % (size - i)
+        # Sceglie il digit-esimo elemento non ancora usato
+        chosen = np.argmax(available & (np.cumsum(available, axis=1) == digit[:, None] + 1), axis=1)
+        result[:, i] = chosen
+        available[rows, chosen] = False
+    return result
+
+
+def parity_rows(permutations):
+    """Parità (0 o 1) di ogni riga di una matrice di permutazioni"""
+    size = permutations.shape[1]
+    inversions = np.zeros(permutations.shape[0], dtype=np.int64)
+    for i in range(size - 1):
+        inversions += (permutations[:, i + 1:] < permutations[:, i:i + 1]).sum(axis=1)
+    return inversions & 1
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motore a lotti del Cubo di Rubik
+Mantiene N stati in un array NumPy (N, 54) di uint8 e applica le mosse a
+tutti i cubi insieme tramite raccolte con indici precalcolati.
+"""
+
+import numpy as np
+
+from rubiks_cube_moves import SOLVED_STATE, MOVE_PERMUTATIONS, compile_algorithm
+
+# Nomi delle mosse nell'ordine delle righe di PERMUTATION_ARRAY
+MOVE_NAMES = tuple(MOVE_PERMUTATIONS)
+MOVE_INDEX = {name: index for index, name in enumerate(MOVE_NAMES)}
+
+# Una riga di 54 indici di raccolta per ogni mossa
+PERMUTATION_ARRAY = np.array([MOVE_PERMUTATIONS[name] for name in MOVE_NAMES], dtype=np.int32)
+
+# Righe elaborate per blocco: indici e dati del blocco restano nella cache del processore
+CHUNK_ROWS = 4096
+
+SOLVED_ARRAY = np.frombuffer(SOLVED_STATE, dtype=np.uint8)
+
+# Indici delle facelet centrali di ogni faccia
+_CENTERS = np.arange(4, 54, 9)
+
+
+def move_indices(moves):
+    """Converte una sequenza di mosse (nomi o indici) in un array di indici di mossa"""
+    if isinstance(moves, np.ndarray) and moves.dtype.kind in 'iu':
+        return moves
+    return np.array([MOVE_INDEX[move] if isinstance(move, str) else move for move in moves], dtype=np.intp)
+
+
+class BatchCube:
+    def __init__(self, count=0, states=None):
+        """Crea un lotto di count cubi risolti, oppure a partire da un array (N, 54) di stati"""
+        if states is None:
+            self.states = np.tile(SOLVED_ARRAY, (count, 1))
+        else:
+            states = np.array(states, dtype=np.uint8)
+            if states.ndim != 2 or states.shape[1] != 54:
+                raise ValueError(f"Gli stati devono avere forma (N, 54), ricevuta {states.shape}")
+            self.states = states
+        # Buffer di appoggio riusato dalle raccolte per non allocare a ogni mossa
+        self._buffer = np.empty_like(self.states)
+
+    def __len__(self):
+        return self.states.shape[0]
+
+    @classmethod
+    def from_models(cls, models):
+        """Crea il lotto dagli stati di una sequenza di RubiksCubeModel"""
+        models = list(models)
+        states = np.frombuffer(b''.join(model.get_state() for model in models), dtype=np.uint8)
+        return cls(states=states.reshape(len(models), 54))
+
+    def to_models(self):
+        """Restituisce un RubiksCubeModel per ogni cubo del lotto"""
+        from rubiks_cube_model import RubiksCubeModel
+        models = []
+        for row in self.states:
+            model = RubiksCubeModel()
+            model.set_state(row.tobytes())
+            models.append(model)
+        return models
+
+    def reset(self):
+        """Riporta tutti i cubi allo stato risolto"""
+        self.states[:] = SOLVED_ARRAY
+
+    def _swap(self):
+        """Scambia lo stato con il buffer appena riempito"""
+        self.states, self._buffer = self._buffer, self.states
+
+    def apply_move(self, move):
+        """Applica la stessa mossa (nome o indice) a tutti i cubi con un'unica raccolta"""
+        self._gather(PERMUTATION_ARRAY[MOVE_INDEX[move] if isinstance(move, str) else move])
+
+    def _gather(self, permutation):
+        """Raccoglie tutte le righe secondo la stessa permutazione di 54 indici"""
+        states, buffer = self.states, self._buffer
+        for start in range(0, len(self), CHUNK_ROWS):
+            stop = start + CHUNK_ROWS
+            np.take(states[start:stop], permutation, axis=1, out=buffer[start:stop])
+        self._swap()
+
+    def apply_moves(self, moves):
+        """Applica a ogni cubo la propria mossa: moves ha una mossa (nome o indice) per riga"""
+        indices = move_indices(moves)
+        if indices.shape != (len(self),):
+            raise ValueError(f"Serve una mossa per cubo: {len(self)} attese, {indices.shape[0]} ricevute")
+        flat_states, buffer = self.states.ravel(), self._buffer
+        # Con più di 2^31 facelet gli indici piatti non stanno in 32 bit
+        index_type = np.int32 if flat_states.size < 2 ** 31 else np.int64
+        for start in range(0, len(self), CHUNK_ROWS):
+            stop = min(start + CHUNK_ROWS, len(self))
+            # Indici piatti: riga * 54 + permutazione della mossa scelta per quella riga
+            flat = PERMUTATION_ARRAY[indices[start:stop]].astype(index_type, copy=False)
+            flat += np.arange(start * 54, stop * 54, 54, dtype=index_type)[:, None]
+            np.take(flat_states, flat, out=buffer[start:stop])
+        self._swap()
+
+    def apply_sequence(self, moves):
+        """Applica la stessa sequenza di mosse a tutti i cubi, mossa per mossa"""
+        for move in moves:
+            self.apply_move(move)
+
+    def apply_algorithm(self, moves):
+        """Applica lo stesso algoritmo a tutti i cubi con un solo passaggio sulla permutazione compilata"""
+        self._gather(np.array(compile_algorithm(moves).permutation, dtype=np.int32))
+
+    def is_solved(self):
+        """Maschera booleana (N,) dei cubi con ogni faccia di colore uniforme"""
+        faces = self.states.reshape(-1, 6, 9)
+        return (faces == self.states[:, _CENTERS][:, :, None]).all(axis=(1, 2))
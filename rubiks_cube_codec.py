@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Codifica Binaria Compatta degli Stati del Cubo di Rubik
+Due codifiche a lunghezza fissa:
+- 'cubie' (9 byte): coordinate dei cubetti in 66 bit, 27 per gli angoli
+  (permutazione * 2187 + torsione) e 39 per gli spigoli (metà del rango
+  della permutazione * 2048 + inversione). La parità degli spigoli è
+  ricavata da quella degli angoli, quindi si codificano solo stati legali
+  con i centri al loro posto: gli altri sollevano ValueError;
+- 'facelet3' (21 byte): le 54 facelet a 3 bit ciascuna, per qualunque
+  colorazione con i colori dello schema standard.
+Il formato 'facelet' (54 byte, una lettera per facelet) è quello di BatchCube.
+
+Un file di stati è un'intestazione di 64 byte seguita da record di
+lunghezza fissa e si apre con mmap direttamente come array NumPy (N, byte
+per record), senza creare oggetti Python per ogni stato.
+
+Uso da riga di comando:
+    python rubiks_cube_codec.py convert INGRESSO USCITA [--kind cubie|facelet3|facelet]
+    python rubiks_cube_codec.py info FILE
+
+I file di stati hanno estensione .rcs per convenzione.
+"""
+
+import argparse
+import os
+import struct
+import sys
+
+import numpy as np
+
+from rubiks_cube_arrays import parity_rows, rank_rows, unrank_rows
+from rubiks_cube_cubie import (
+    CubieCube, CORNER_FACELETS, EDGE_FACELETS, CORNER_FACES, EDGE_FACES, N_TWIST, N_FLIP, cube_facelets
+)
+from rubiks_cube_moves import FACE_NAMES, SOLVED_FACE_COLORS
+from rubiks_cube_scramble import arrays_to_facelets
+
+# Byte per record di ogni codifica
+RECORD_SIZES = {'cubie': 9, 'facelet3': 21, 'facelet': 54}
+
+EDGE_BITS = 39      # ceil(log2(12! / 2 * 2048))
+CORNER_BITS = 27    # ceil(log2(8! * 2187))
+
+STATE_FILE_MAGIC = b'RCST'
+STATE_FILE_VERSION = 1
+# magic, versione, codifica, numero di record
+_STATE_HEADER = struct.Struct('<4sH10sQ')
+STATE_HEADER_SIZE = 64
+
+# Stati convertiti per blocco nelle operazioni sui file
+CODEC_CHUNK = 1 << 16
+
+_COLOR_LETTERS = bytes(ord(SOLVED_FACE_COLORS[name]) for name in FACE_NAMES)
+# Codice 0..5 (indice in FACE_NAMES) di ogni lettera di colore; 255 per le altre
+_COLOR_CODES = np.full(256, 255, dtype=np.uint8)
+_COLOR_CODES[np.frombuffer(_COLOR_LETTERS, dtype=np.uint8)] = np.arange(6)
+_COLOR_ARRAY = np.frombuffer(_COLOR_LETTERS, dtype=np.uint8)
+
+
+def _build_piece_lookups():
+    """Tabelle dai codici dei colori al cubetto: angoli letti dalla faccia U/D in senso orario, spigoli in coppia"""
+    corners = np.full((6, 6, 6), -1, dtype=np.int8)
+    for corner, faces in enumerate(CORNER_FACES):
+        corners[tuple(FACE_NAMES.index(face) for face in faces)] = corner
+    edges = np.full((6, 6), -1, dtype=np.int8)
+    flips = np.zeros((6, 6), dtype=np.int8)
+    for edge, (first, second) in enumerate(EDGE_FACES):
+        a, b = FACE_NAMES.index(first), FACE_NAMES.index(second)
+        edges[a, b], edges[b, a] = edge, edge
+        flips[b, a] = 1
+    return corners, edges, flips
+
+
+_CORNER_LOOKUP, _EDGE_LOOKUP, _FLIP_LOOKUP = _build_piece_lookups()
+
+# Facelet centrali: il centro della faccia i ha il codice di colore i
+_CENTER_FACELETS = [index * 9 + 4 for index in range(6)]
+
+
+# === Conversioni vettoriali fra facelet e cubetti ===
+
+def facelets_to_arrays(states):
+    """Matrici (cp, co, ep, eo) da una matrice (N, 54) di facelet; ValueError se uno stato non è legale"""
+    codes = _COLOR_CODES[np.asarray(states, dtype=np.uint8)]
+    if (codes == 255).any():
+        raise ValueError("Colore di facelet fuori dallo schema standard")
+    if (codes[:, _CENTER_FACELETS] != np.arange(6)).any():
+        # Con i centri spostati (es. dopo M o x) i cubetti letti descriverebbero un altro stato
+        raise ValueError("Centri fuori dalla posizione standard")
+    rows = np.arange(codes.shape[0])
+    cp = np.empty((codes.shape[0], 8), dtype=np.int8)
+    co = np.empty((codes.shape[0], 8), dtype=np.int8)
+    for position, facelets in enumerate(CORNER_FACELETS):
+        colors = codes[:, facelets]
+        # La torsione è la posizione del colore U/D (codici 0 e 1)
+        twist = np.argmax(colors <= 1, axis=1)
+        cp[:, position] = _CORNER_LOOKUP[colors[rows, twist], colors[rows, (twist + 1) % 3],
+                                         colors[rows, (twist + 2) % 3]]
+        co[:, position] = twist
+    ep = _EDGE_LOOKUP[codes[:, [first for first, _ in EDGE_FACELETS]], codes[:, [second for _, second in EDGE_FACELETS]]]
+    eo = _FLIP_LOOKUP[codes[:, [first for first, _ in EDGE_FACELETS]], codes[:, [second for _, second in EDGE_FACELETS]]]
+    if ((cp < 0).any() or (ep < 0).any()
+            or not (np.sort(cp, axis=1) == np.arange(8)).all() or not (np.sort(ep, axis=1) == np.arange(12)).all()):
+        raise ValueError("Cubetti mancanti, duplicati o con colori impossibili")
+    if (co.sum(axis=1) % 3).any() or (eo.sum(axis=1) % 2).any():
+        raise ValueError("Orientamento totale degli angoli o degli spigoli non valido")
+    if (parity_rows(cp) != parity_rows(ep)).any():
+        raise ValueError("Parità di angoli e spigoli discordanti")
+    return cp, co, ep, eo
+
+
+# === Codifica 'cubie' (9 byte) ===
+
+def encode_cubie_arrays(cp, co, ep, eo):
+    """Record (N, 9) dalle matrici dei cubetti; ValueError se le parità di angoli e spigoli differiscono"""
+    # Il record conserva solo metà del rango degli spigoli: la parità è quella degli angoli
+    if (parity_rows(cp) != parity_rows(ep)).any():
+        raise ValueError("Parità di angoli e spigoli discordanti")
+    twist = (co[:, :7].astype(np.int64) * 3 ** np.arange(6, -1, -1)).sum(axis=1)
+    flip = (eo[:, :11].astype(np.int64) << np.arange(10, -1, -1)).sum(axis=1)
+    corner_index = (rank_rows(cp) * N_TWIST + twist).astype(np.uint64)
+    edge_index = ((rank_rows(ep) >> 1) * N_FLIP + flip).astype(np.uint64)
+    # 66 bit: i 2 più alti degli angoli nel primo byte, il resto in un intero a 64 bit big-endian
+    records = np.empty((cp.shape[0], 9), dtype=np.uint8)
+    records[:, 0] = corner_index >> np.uint64(64 - EDGE_BITS)
+    low = (corner_index << np.uint64(EDGE_BITS)) | edge_index
+    records[:, 1:] = low.astype('>u8').view(np.uint8).reshape(-1, 8)
+    return records
+
+
+def decode_cubie_arrays(records):
+    """Matrici (cp, co, ep, eo) dai record (N, 9)"""
+    records = np.ascontiguousarray(records, dtype=np.uint8).reshape(-1, 9)
+    low = records[:, 1:].copy().view('>u8').ravel().astype(np.uint64)
+    corner_index = (records[:, 0].astype(np.uint64) << np.uint64(64 - EDGE_BITS)) | (low >> np.uint64(EDGE_BITS))
+    edge_index = low & np.uint64((1 << EDGE_BITS) - 1)
+    corners, twist = np.divmod(corner_index.astype(np.int64), N_TWIST)
+    edges_half, flip = np.divmod(edge_index.astype(np.int64), N_FLIP)
+    cp = unrank_rows(corners, 8)
+    ep = unrank_rows(edges_half * 2, 12)
+    # Il rango dispari (ultimi due spigoli scambiati) ha la parità opposta: si sceglie quella degli angoli
+    swap = parity_rows(ep) != parity_rows(cp)
+    ep[swap, 10], ep[swap, 11] = ep[swap, 11], ep[swap, 10]
+    co = np.empty((records.shape[0], 8), dtype=np.int8)
+    for i in range(6, -1, -1):
+        twist, co[:, i] = np.divmod(twist, 3)
+    co[:, 7] = -co[:, :7].sum(axis=1) % 3
+    eo = np.empty((records.shape[0], 12), dtype=np.int8)
+    for i in range(10, -1, -1):
+        flip, eo[:, i] = np.divmod(flip, 2)
+    eo[:, 11] = eo[:, :11].sum(axis=1) % 2
+    return cp, co, ep, eo
+
+
+def encode_cubie(cube):
+    """9 byte di uno stato legale (CubieCube, modello, stato immutabile o 54 facelet)"""
+    if not isinstance(cube, CubieCube):
+        # Dalle facelet, con gli stessi controlli (centri compresi) dei file di stati
+        facelets = np.frombuffer(cube_facelets(cube), dtype=np.uint8)
+        return encode_states(facelets, 'cubie')[0].tobytes()
+    cube.verify()
+    return encode_cubie_arrays(*(np.array([values], dtype=np.int8) for values in
+                                 (cube.cp, cube.co, cube.ep, cube.eo)))[0].tobytes()
+
+
+def decode_cubie(data):
+    """CubieCube da 9 byte"""
+    cp, co, ep, eo = decode_cubie_arrays(np.frombuffer(bytes(data), dtype=np.uint8))
+    return CubieCube(cp[0].tolist(), co[0].tolist(), ep[0].tolist(), eo[0].tolist())
+
+
+# === Codifica 'facelet3' (21 byte) ===
+
+def encode_facelet3_array(states):
+    """Record (N, 21) da una matrice (N, 54) di facelet, 3 bit per facelet"""
+    codes = _COLOR_CODES[np.asarray(states, dtype=np.uint8)]
+    if (codes == 255).any():
+        raise ValueError("Colore di facelet fuori dallo schema standard")
+    bits = np.unpackbits(codes[:, :, None], axis=2)[:, :, 5:].reshape(codes.shape[0], 162)
+    return np.packbits(bits, axis=1)
+
+
+def decode_facelet3_array(records):
+    """Matrice (N, 54) di facelet dai record (N, 21)"""
+    records = np.asarray(records, dtype=np.uint8).reshape(-1, 21)
+    bits = np.unpackbits(records, axis=1)[:, :162].reshape(-1, 54, 3)
+    codes = (bits[:, :, 0] << 2) | (bits[:, :, 1] << 1) | bits[:, :, 2]
+    if (codes > 5).any():
+        raise ValueError("Codice di colore non valido")
+    return _COLOR_ARRAY[codes]
+
+
+def encode_facelet3(facelets):
+    """21 byte da 54 facelet (bytes o str)"""
+    if isinstance(facelets, str):
+        facelets = facelets.encode('ascii')
+    return encode_facelet3_array(np.frombuffer(bytes(facelets), dtype=np.uint8)[None, :])[0].tobytes()
+
+
+def decode_facelet3(data):
+    """54 facelet (bytes) da 21 byte"""
+    return decode_facelet3_array(np.frombuffer(bytes(data), dtype=np.uint8))[0].tobytes()
+
+
+# === Conversioni fra formati ===
+
+def encode_states(states, kind):
+    """Record di una codifica da una matrice (N, 54) di facelet"""
+    states = np.asarray(states, dtype=np.uint8).reshape(-1, 54)
+    if kind == 'cubie':
+        return encode_cubie_arrays(*facelets_to_arrays(states))
+    if kind == 'facelet3':
+        return encode_facelet3_array(states)
+    if kind == 'facelet':
+        return states
+    raise ValueError(f"Codifica non supportata: {kind}")
+
+
+def decode_states(records, kind):
+    """Matrice (N, 54) di facelet dai record di una codifica"""
+    if kind == 'cubie':
+        return arrays_to_facelets(*decode_cubie_arrays(records))
+    if kind == 'facelet3':
+        return decode_facelet3_array(records)
+    if kind == 'facelet':
+        return np.asarray(records, dtype=np.uint8).reshape(-1, 54)
+    raise ValueError(f"Codifica non supportata: {kind}")
+
+
+# === File di stati ===
+
+class StateFileWriter:
+    def __init__(self, path, kind='cubie'):
+        """Scrittura in coda di un file di stati; il numero di record è aggiornato alla chiusura"""
+        if kind not in RECORD_SIZES:
+            raise ValueError(f"Codifica non supportata: {kind}")
+        self.path = path
+        self.kind = kind
+        self.count = 0
+        self._file = open(path, 'wb')
+        self._write_header()
+
+    def _write_header(self):
+        header = _STATE_HEADER.pack(STATE_FILE_MAGIC, STATE_FILE_VERSION, self.kind.encode('ascii'), self.count)
+        self._file.seek(0)
+        self._file.write(header.ljust(STATE_HEADER_SIZE, b'\0'))
+
+    def write(self, states):
+        """Aggiunge una matrice (N, 54) di facelet (o uno stato da 54 byte)"""
+        if isinstance(states, (bytes, bytearray, str)):
+            states = np.frombuffer(states.encode('ascii') if isinstance(states, str) else bytes(states),
+                                   dtype=np.uint8)
+        self._append(encode_states(states, self.kind))
+
+    def write_cubies(self, cp, co, ep, eo):
+        """Aggiunge stati dati come matrici dei cubetti, senza passare dalle facelet"""
+        if self.kind != 'cubie':
+            return self.write(arrays_to_facelets(cp, co, ep, eo))
+        self._append(encode_cubie_arrays(cp, co, ep, eo))
+
+    def _append(self, records):
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(np.ascontiguousarray(records).tobytes())
+        self.count += records.shape[0]
+
+    def close(self):
+        if not self._file.closed:
+            self._write_header()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class StateFile:
+    def __init__(self, path):
+        """Apre un file di stati con mmap: records è un array NumPy (N, byte per record) in sola lettura"""
+        with open(path, 'rb') as file:
+            header = file.read(STATE_HEADER_SIZE)
+        if len(header) < STATE_HEADER_SIZE:
+            raise ValueError(f"{path}: intestazione incompleta")
+        magic, version, kind, count = _STATE_HEADER.unpack_from(header)
+        if magic != STATE_FILE_MAGIC or version != STATE_FILE_VERSION:
+            raise ValueError(f"{path}: non è un file di stati (o versione non supportata)")
+        self.path = path
+        self.kind = kind.rstrip(b'\0').decode('ascii')
+        if self.kind not in RECORD_SIZES:
+            raise ValueError(f"{path}: codifica sconosciuta {self.kind}")
+        self.record_size = RECORD_SIZES[self.kind]
+        if os.path.getsize(path) < STATE_HEADER_SIZE + count * self.record_size:
+            raise ValueError(f"{path}: file troncato")
+        self.records = (np.memmap(path, dtype=np.uint8, mode='r', offset=STATE_HEADER_SIZE,
+                                  shape=(count, self.record_size))
+                        if count else np.empty((0, self.record_size), dtype=np.uint8))
+
+    def __len__(self):
+        return self.records.shape[0]
+
+    def __getitem__(self, index):
+        """Facelet (bytes) di uno stato, oppure matrice (K, 54) per una fetta"""
+        if isinstance(index, slice):
+            return decode_states(self.records[index], self.kind)
+        return decode_states(self.records[index], self.kind)[0].tobytes()
+
+    def chunks(self, size=CODEC_CHUNK):
+        """Blocchi consecutivi di stati come matrici (K, 54) di facelet"""
+        for start in range(0, len(self), size):
+            yield self[start:start + size]
+
+
+def write_state_file(path, states, kind='cubie'):
+    """Scrive una matrice (N, 54) di facelet in un file di stati"""
+    with StateFileWriter(path, kind) as writer:
+        states = np.asarray(states, dtype=np.uint8).reshape(-1, 54)
+        for start in range(0, states.shape[0], CODEC_CHUNK):
+            writer.write(states[start:start + CODEC_CHUNK])
+        return writer.count
+
+
+def main(argv=None):
+    """Punto d'ingresso da riga di comando: converte file di record da 54 byte o descrive un file di stati"""
+    parser = argparse.ArgumentParser(description="File di stati compatti del Cubo di Rubik")
+    commands = parser.add_subparsers(dest='command', required=True)
+    convert = commands.add_parser('convert', help="Converte record grezzi da 54 byte (o un file di stati)")
+    convert.add_argument('input')
+    convert.add_argument('output')
+    convert.add_argument('--kind', choices=tuple(RECORD_SIZES), default='cubie')
+    info = commands.add_parser('info', help="Descrive un file di stati")
+    info.add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'info':
+        states = StateFile(args.path)
+        size = os.path.getsize(args.path)
+        print(f"{args.path}: {len(states)} stati, codifica {states.kind} "
+              f"({states.record_size} byte per stato, {size} byte in totale)")
+        return 0
+
+    with open(args.input, 'rb') as file:
+        is_state_file = file.read(4) == STATE_FILE_MAGIC
+    if is_state_file:
+        blocks = StateFile(args.input).chunks()
+    else:
+        raw = np.memmap(args.input, dtype=np.uint8, mode='r')
+        if raw.size % 54:
+            raise ValueError(f"{args.input}: la dimensione non è un multiplo di 54 byte")
+        raw = raw.reshape(-1, 54)
+        blocks = (raw[start:start + CODEC_CHUNK] for start in range(0, raw.shape[0], CODEC_CHUNK))
+    with StateFileWriter(args.output, args.kind) as writer:
+        for block in blocks:
+            writer.write(block)
+    print(f"{writer.count} stati scritti in {args.output} ({args.kind})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modello a Cubetti del Cubo di Rubik
+Rappresenta lo stato con la permutazione e l'orientamento degli 8 angoli e
+dei 12 spigoli, con le coordinate intere usate dai risolutori e la
+conversione rapida da e verso le facelet di RubiksCubeModel.
+"""
+
+from math import comb, factorial
+from operator import itemgetter
+
+from rubiks_cube_moves import (
+    FACE_NAMES, SOLVED_FACE_COLORS, SOLVED_STATE, FACE_MOVES, MOVE_GATHERS, facelet_index
+)
+
+# Angoli e spigoli nella numerazione classica dei risolutori a due fasi
+CORNER_NAMES = ('URF', 'UFL', 'ULB', 'UBR', 'DFR', 'DLF', 'DBL', 'DRB')
+EDGE_NAMES = ('UR', 'UF', 'UL', 'UB', 'DR', 'DF', 'DL', 'DB', 'FR', 'FL', 'BL', 'BR')
+
+N_TWIST = 3 ** 7        # Orientamenti degli angoli
+N_FLIP = 2 ** 11        # Orientamenti degli spigoli
+N_CORNERS = factorial(8)    # Permutazioni degli angoli
+N_EDGES = factorial(12)     # Permutazioni degli spigoli
+N_SLICE = comb(12, 4)           # Posizioni (senza ordine) dei 4 spigoli della fascia centrale
+N_SLICE_SORTED = N_SLICE * 24   # Posizioni e ordine dei 4 spigoli della fascia centrale
+N_UD_EDGES = factorial(8)       # Permutazioni degli 8 spigoli U/D (valida nel sottogruppo G1)
+
+# I 4 spigoli della fascia centrale (FR, FL, BL, BR) sono gli ultimi della numerazione
+SLICE_EDGES = (8, 9, 10, 11)
+
+_FACE_LETTERS = {'U': 'up', 'R': 'right', 'F': 'front', 'D': 'down', 'L': 'left', 'B': 'back'}
+
+
+def _facelet(name):
+    """Converte un nome come 'U9' (faccia + posizione 1..9) nell'indice dello stato piatto"""
+    position = int(name[1]) - 1
+    return facelet_index(_FACE_LETTERS[name[0]], position // 3, position % 3)
+
+
+# Facelet di ogni posizione d'angolo, partendo da quella U/D e procedendo in senso orario
+CORNER_FACELETS = tuple(tuple(_facelet(name) for name in names.split()) for names in (
+    'U9 R1 F3', 'U7 F1 L3', 'U1 L1 B3', 'U3 B1 R3',
+    'D3 F9 R7', 'D1 L9 F7', 'D7 B9 L7', 'D9 R9 B7'
+))
+
+# Facelet di ogni posizione di spigolo; la prima è quella di riferimento per l'orientamento
+EDGE_FACELETS = tuple(tuple(_facelet(name) for name in names.split()) for names in (
+    'U6 R2', 'U8 F2', 'U4 L2', 'U2 B2', 'D6 R8', 'D2 F8',
+    'D4 L8', 'D8 B8', 'F6 R4', 'F4 L6', 'B6 L4', 'B4 R6'
+))
+
+# Facce (nomi di FACE_NAMES) che colorano ogni cubetto nello stato risolto
+CORNER_FACES = tuple(tuple(_FACE_LETTERS[letter] for letter in names) for names in (
+    'URF', 'UFL', 'ULB', 'UBR', 'DFR', 'DLF', 'DBL', 'DRB'
+))
+EDGE_FACES = tuple(tuple(_FACE_LETTERS[letter] for letter in names) for names in (
+    'UR', 'UF', 'UL', 'UB', 'DR', 'DF', 'DL', 'DB', 'FR', 'FL', 'BL', 'BR'
+))
+
+_CENTER_FACELETS = tuple(index * 9 + 4 for index in range(6))
+
+
+def _permutation_rank(permutation):
+    """Rango lessicografico (codice di Lehmer) di una permutazione"""
+    size = len(permutation)
+    rank = 0
+    for i in range(size):
+        smaller = 0
+        for j in range(i + 1, size):
+            if permutation[j] < permutation[i]:
+                smaller += 1
+        rank = rank * (size - i) + smaller
+    return rank
+
+
+def _permutation_unrank(rank, size):
+    """Permutazione di size elementi con il rango lessicografico indicato"""
+    digits = []
+    for radix in range(1, size + 1):
+        digits.append(rank % radix)
+        rank //= radix
+    available = list(range(size))
+    return [available.pop(digit) for digit in reversed(digits)]
+
+
+def _permutation_parity(permutation):
+    """Parità di una permutazione: 0 se pari, 1 se dispari"""
+    parity = 0
+    for i in range(len(permutation)):
+        for j in range(i + 1, len(permutation)):
+            if permutation[j] < permutation[i]:
+                parity ^= 1
+    return parity
+
+
+class CubieCube:
+    def __init__(self, cp=None, co=None, ep=None, eo=None):
+        """Inizializza il cubo a cubetti (per default nello stato risolto)"""
+        self.cp = list(cp) if cp is not None else list(range(8))     # Angolo presente in ogni posizione
+        self.co = list(co) if co is not None else [0] * 8            # Torsione di ogni angolo (0..2)
+        self.ep = list(ep) if ep is not None else list(range(12))    # Spigolo presente in ogni posizione
+        self.eo = list(eo) if eo is not None else [0] * 12           # Inversione di ogni spigolo (0..1)
+
+    def __eq__(self, other):
+        if not isinstance(other, CubieCube):
+            return NotImplemented
+        return (self.cp == other.cp and self.co == other.co
+                and self.ep == other.ep and self.eo == other.eo)
+
+    def __repr__(self):
+        return f"CubieCube(cp={self.cp}, co={self.co}, ep={self.ep}, eo={self.eo})"
+
+    def copy(self):
+        """Restituisce una copia indipendente"""
+        return CubieCube(self.cp, self.co, self.ep, self.eo)
+
+    def is_solved(self):
+        """Controlla se ogni cubetto è al suo posto e ben orientato"""
+        return self == SOLVED_CUBIE
+
+    # === Composizione e mosse ===
+
+    def multiply(self, other):
+        """Applica la trasformazione other dopo lo stato corrente (prodotto self * other)"""
+        cp, co, ep, eo = self.cp, self.co, self.ep, self.eo
+        self.cp = [cp[i] for i in other.cp]
+        self.co = [(co[i] + twist) % 3 for i, twist in zip(other.cp, other.co)]
+        self.ep = [ep[i] for i in other.ep]
+        self.eo = [(eo[i] + flip) % 2 for i, flip in zip(other.ep, other.eo)]
+
+    def apply_move(self, move):
+        """Applica una delle 18 mosse di faccia tramite le tabelle di transizione precalcolate"""
+        corner_gather, corner_twist, edge_gather, edge_flip = CUBIE_MOVE_TABLES[move]
+        self.co = [(co + twist) % 3 for co, twist in zip(corner_gather(self.co), corner_twist)]
+        self.cp = list(corner_gather(self.cp))
+        self.eo = [eo ^ flip for eo, flip in zip(edge_gather(self.eo), edge_flip)]
+        self.ep = list(edge_gather(self.ep))
+
+    def inverse(self):
+        """Restituisce il cubo inverso (lo stato che annulla questo)"""
+        inverse = CubieCube()
+        for position, corner in enumerate(self.cp):
+            inverse.cp[corner] = position
+            inverse.co[corner] = (3 - self.co[position]) % 3
+        for position, edge in enumerate(self.ep):
+            inverse.ep[edge] = position
+            inverse.eo[edge] = self.eo[position]
+        return inverse
+
+    # === Coordinate intere ===
+
+    def get_twist(self):
+        """Coordinata di orientamento degli angoli (0..2186)"""
+        twist = 0
+        for co in self.co[:7]:
+            twist = twist * 3 + co
+        return twist
+
+    def set_twist(self, twist):
+        """Imposta l'orientamento degli angoli; l'ultimo angolo chiude la somma modulo 3"""
+        total = 0
+        for i in range(6, -1, -1):
+            self.co[i] = twist % 3
+            total += self.co[i]
+            twist //= 3
+        self.co[7] = -total % 3
+
+    def get_flip(self):
+        """Coordinata di orientamento degli spigoli (0..2047)"""
+        flip = 0
+        for eo in self.eo[:11]:
+            flip = flip * 2 + eo
+        return flip
+
+    def set_flip(self, flip):
+        """Imposta l'orientamento degli spigoli; l'ultimo spigolo chiude la somma modulo 2"""
+        total = 0
+        for i in range(10, -1, -1):
+            self.eo[i] = flip % 2
+            total += self.eo[i]
+            flip //= 2
+        self.eo[11] = total % 2
+
+    def get_corners(self):
+        """Coordinata di permutazione degli angoli (0..40319)"""
+        return _permutation_rank(self.cp)
+
+    def set_corners(self, index):
+        """Imposta la permutazione degli angoli dalla sua coordinata"""
+        self.cp = _permutation_unrank(index, 8)
+
+    def get_edges(self):
+        """Coordinata di permutazione degli spigoli (0..479001599)"""
+        return _permutation_rank(self.ep)
+
+    def set_edges(self, index):
+        """Imposta la permutazione degli spigoli dalla sua coordinata"""
+        self.ep = _permutation_unrank(index, 12)
+
+    def get_slice(self):
+        """Coordinata delle posizioni occupate dagli spigoli della fascia centrale (0..494)"""
+        return self.get_slice_sorted() // 24
+
+    def get_slice_sorted(self):
+        """Coordinata di posizioni e ordine degli spigoli della fascia centrale (0..11879).
+
+        Vale meno di 24 quando i quattro spigoli sono nella fascia centrale.
+        """
+        combination = 0
+        found = 0
+        slice_edges = []
+        for position in range(11, -1, -1):
+            if self.ep[position] >= 8:
+                combination += comb(11 - position, found + 1)
+                slice_edges.append(self.ep[position] - 8)
+                found += 1
+        slice_edges.reverse()
+        return combination * 24 + _permutation_rank(slice_edges)
+
+    def set_slice_sorted(self, index):
+        """Imposta posizioni e ordine degli spigoli della fascia centrale; gli altri in ordine"""
+        combination, order = divmod(index, 24)
+        slice_edges = [edge + 8 for edge in _permutation_unrank(order, 4)]
+        other_edges = iter(range(8))
+        remaining = 4
+        ep = []
+        for position in range(12):
+            if remaining and combination >= comb(11 - position, remaining):
+                combination -= comb(11 - position, remaining)
+                ep.append(slice_edges[4 - remaining])
+                remaining -= 1
+            else:
+                ep.append(next(other_edges))
+        self.ep = ep
+
+    def get_ud_edges(self):
+        """Coordinata di permutazione degli 8 spigoli U/D (0..40319), definita solo in G1"""
+        return _permutation_rank(self.ep[:8])
+
+    def set_ud_edges(self, index):
+        """Imposta la permutazione degli spigoli U/D lasciando in ordine quelli della fascia centrale"""
+        self.ep = _permutation_unrank(index, 8) + list(SLICE_EDGES)
+
+    def corner_parity(self):
+        """Parità della permutazione degli angoli"""
+        return _permutation_parity(self.cp)
+
+    def edge_parity(self):
+        """Parità della permutazione degli spigoli"""
+        return _permutation_parity(self.ep)
+
+    def verify(self):
+        """Controlla che lo stato sia raggiungibile con mosse legali; solleva ValueError altrimenti"""
+        if sorted(self.cp) != list(range(8)) or sorted(self.ep) != list(range(12)):
+            raise ValueError("Cubetti mancanti o duplicati")
+        if sum(self.co) % 3 != 0:
+            raise ValueError("Torsione totale degli angoli non valida")
+        if sum(self.eo) % 2 != 0:
+            raise ValueError("Inversione totale degli spigoli non valida")
+        if self.corner_parity() != self.edge_parity():
+            raise ValueError("Parità di angoli e spigoli discordanti")
+
+    # === Conversione da e verso le facelet ===
+
+    @classmethod
+    def from_facelets(cls, facelets):
+        """Costruisce il cubo da 54 facelet (bytes o str); i centri definiscono i colori delle facce"""
+        if isinstance(facelets, str):
+            facelets = facelets.encode('ascii')
+        if len(facelets) != 54:
+            raise ValueError(f"Lo stato deve avere 54 facelet, ricevute {len(facelets)}")
+        face_of_color = {facelets[center]: name for center, name in zip(_CENTER_FACELETS, FACE_NAMES)}
+        if len(face_of_color) != 6:
+            raise ValueError("I sei centri devono avere colori distinti")
+        try:
+            faces = [face_of_color[color] for color in facelets]
+        except KeyError:
+            raise ValueError("Colore di facelet non corrispondente a nessun centro")
+
+        cube = cls()
+        for position, corner_facelets in enumerate(CORNER_FACELETS):
+            for twist in range(3):
+                if faces[corner_facelets[twist]] in ('up', 'down'):
+                    break
+            else:
+                raise ValueError(f"Angolo {CORNER_NAMES[position]} senza colore U/D")
+            key = (faces[corner_facelets[twist]],
+                   faces[corner_facelets[(twist + 1) % 3]],
+                   faces[corner_facelets[(twist + 2) % 3]])
+            if key not in _CORNER_BY_FACES:
+                raise ValueError(f"Angolo {CORNER_NAMES[position]} con colori impossibili")
+            cube.cp[position] = _CORNER_BY_FACES[key]
+            cube.co[position] = twist
+        for position, (first, second) in enumerate(EDGE_FACELETS):
+            key = (faces[first], faces[second])
+            if key in _EDGE_BY_FACES:
+                cube.ep[position], cube.eo[position] = _EDGE_BY_FACES[key], 0
+            elif key[::-1] in _EDGE_BY_FACES:
+                cube.ep[position], cube.eo[position] = _EDGE_BY_FACES[key[::-1]], 1
+            else:
+                raise ValueError(f"Spigolo {EDGE_NAMES[position]} con colori impossibili")
+        return cube
+
+    def to_facelets(self, face_colors=None):
+        """Restituisce le 54 facelet come bytes; face_colors mappa faccia -> lettera del colore"""
+        if face_colors is None:
+            face_colors = SOLVED_FACE_COLORS
+        colors = {name: ord(face_colors[name]) for name in FACE_NAMES}
+        facelets = bytearray(54)
+        for center, name in zip(_CENTER_FACELETS, FACE_NAMES):
+            facelets[center] = colors[name]
+        for position, corner_facelets in enumerate(CORNER_FACELETS):
+            corner_faces = CORNER_FACES[self.cp[position]]
+            twist = self.co[position]
+            for n in range(3):
+                facelets[corner_facelets[(n + twist) % 3]] = colors[corner_faces[n]]
+        for position, edge_facelets in enumerate(EDGE_FACELETS):
+            edge_faces = EDGE_FACES[self.ep[position]]
+            flip = self.eo[position]
+            for n in range(2):
+                facelets[edge_facelets[(n + flip) % 2]] = colors[edge_faces[n]]
+        return bytes(facelets)
+
+    @classmethod
+    def from_faces(cls, faces):
+        """Costruisce il cubo dal dizionario di matrici 3x3 di RubiksCubeModel.faces"""
+        return cls.from_facelets(''.join(color for name in FACE_NAMES for row in faces[name] for color in row))
+
+    def to_faces(self, face_colors=None):
+        """Restituisce lo stato nel formato di RubiksCubeModel.faces"""
+        letters = self.to_facelets(face_colors).decode('ascii')
+        return {
+            name: [list(letters[index * 9 + row * 3:index * 9 + row * 3 + 3]) for row in range(3)]
+            for index, name in enumerate(FACE_NAMES)
+        }
+
+
+_CORNER_BY_FACES = {faces: corner for corner, faces in enumerate(CORNER_FACES)}
+_EDGE_BY_FACES = {faces: edge for edge, faces in enumerate(EDGE_FACES)}
+
+SOLVED_CUBIE = CubieCube()
+
+
+def cube_facelets(cube):
+    """Le 54 facelet (bytes) di un modello, uno stato immutabile, un CubieCube, una stringa o un dizionario di facce"""
+    if isinstance(cube, CubieCube):
+        return cube.to_facelets()
+    if hasattr(cube, 'get_state'):
+        return bytes(cube.get_state())
+    if hasattr(cube, 'facelets'):
+        return bytes(cube.facelets)
+    if isinstance(cube, dict):
+        return ''.join(color for name in FACE_NAMES for row in cube[name] for color in row).encode('ascii')
+    if isinstance(cube, str):
+        return cube.encode('ascii')
+    return bytes(cube)
+
+
+def to_cubie(cube):
+    """Converte in CubieCube un modello, uno stato immutabile, 54 facelet o un dizionario di facce"""
+    if isinstance(cube, CubieCube):
+        return cube.copy()
+    return CubieCube.from_facelets(cube_facelets(cube))
+
+
+def _build_cubie_move_tables():
+    """Ricava le tabelle di transizione di ogni mossa di faccia dalla sua permutazione di facelet"""
+    tables = {}
+    for move in FACE_MOVES:
+        cube = CubieCube.from_facelets(bytes(MOVE_GATHERS[move](SOLVED_STATE)))
+        tables[move] = (itemgetter(*cube.cp), tuple(cube.co), itemgetter(*cube.ep), tuple(cube.eo))
+    return tables
+
+
+# Per ogni mossa: raccolta degli angoli, torsioni aggiunte, raccolta degli spigoli, inversioni aggiunte
+CUBIE_MOVE_TABLES = _build_cubie_move_tables()
+
+# Le stesse mosse come CubieCube, da comporre con multiply
+CUBIE_MOVES = {
+    move: CubieCube(corner_gather(range(8)), corner_twist, edge_gather(range(12)), edge_flip)
+    for move, (corner_gather, corner_twist, edge_gather, edge_flip) in CUBIE_MOVE_TABLES.items()
+}
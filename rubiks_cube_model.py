@@ -3,35 +3,162 @@
 """
 Modello Logico del Cubo di Rubik
 Implementazione completa da zero
+Lo stato è un bytearray piatto di 54 facelet (9 per faccia, nell'ordine di
+FACE_NAMES) e ogni mossa è una permutazione precalcolata in rubiks_cube_moves.
+I metodi rotate_<nome>_clockwise/counter_clockwise sono generati dalla tabella
+FACE_ROTATIONS.
+Il modello conta le facelet diverse dal centro della propria faccia e a ogni
+mossa ricalcola il conteggio solo per le facce che la mossa tocca:
+is_solved() è un confronto con zero. Con la variabile d'ambiente
+RUBIKS_CUBE_DEBUG (o debug=True) ogni is_solved() verifica il conteggio
+con la scansione completa.
+Le facce sono esposte come viste in sola lettura (tuple di righe di lettere)
+ricostruite solo quando lo stato cambia, e version aumenta a ogni modifica:
+chi legge lo stato può saltare il lavoro se version non è cambiata. Le
+copie modificabili si chiedono esplicitamente con copy=True. Il bytearray
+delle facelet è uno solo per tutta la vita del modello (le mosse lo
+riscrivono sul posto) ed è esposto solo in sola lettura, così le viste
+restano aggiornate e nessuno può desincronizzare i conteggi.
 """
 
+import os
+from operator import itemgetter, ne
+from types import MappingProxyType
+
+from rubiks_cube_moves import (
+    FACE_NAMES, SOLVED_STATE, MOVE_GATHERS, MOVE_PERMUTATIONS, FACE_ROTATIONS, compile_algorithm
+)
+
+DEBUG_ENV = 'RUBIKS_CUBE_DEBUG'
+
+# Centro della faccia di ogni facelet
+_CENTER_GATHER = itemgetter(*(index // 9 * 9 + 4 for index in range(54)))
+
+
+def count_mismatches(facelets):
+    """Facelet diverse dal centro della propria faccia (0 se e solo se il cubo è risolto)"""
+    return sum(map(ne, facelets, _CENTER_GATHER(facelets)))
+
+
+def _face_mismatches(facelets):
+    """Facelet fuori posto di ciascuna faccia"""
+    return [9 - facelets.count(facelets[start + 4], start, start + 9) for start in range(0, 54, 9)]
+
+
+def _affected_faces(permutation):
+    """Facce il cui conteggio può cambiare con la permutazione, come (faccia, inizio, fine, centro)"""
+    faces = sorted({index // 9 for index, source in enumerate(permutation) if source != index})
+    return tuple((face, face * 9, face * 9 + 9, face * 9 + 4) for face in faces)
+
+
+MOVE_AFFECTED_FACES = {move: _affected_faces(permutation) for move, permutation in MOVE_PERMUTATIONS.items()}
+
+
 class RubiksCubeModel:
-    def __init__(self):
-        """Inizializza il cubo nello stato risolto"""
+    def __init__(self, debug=None):
+        """Inizializza il cubo nello stato risolto; debug attiva la verifica del conteggio in is_solved"""
+        self.debug = bool(os.environ.get(DEBUG_ENV)) if debug is None else debug
+        self._views = None
+        self._views_version = None
+        self._facelets = bytearray(SOLVED_STATE)
+        self._state_view = memoryview(self._facelets).toreadonly()
         self.reset()
     
     def reset(self):
         """Resetta il cubo allo stato risolto con colori diversi per ogni faccia"""
-        # Ogni faccia è una matrice 3x3 con un colore uniforme
-        # W=Bianco, Y=Giallo, R=Rosso, O=Arancione, B=Blu, G=Verde
-        self.faces = {
-            'up': [['W', 'W', 'W'], ['W', 'W', 'W'], ['W', 'W', 'W']],      # Superiore - Bianco
-            'down': [['Y', 'Y', 'Y'], ['Y', 'Y', 'Y'], ['Y', 'Y', 'Y']],    # Inferiore - Giallo
-            'front': [['B', 'B', 'B'], ['B', 'B', 'B'], ['B', 'B', 'B']],   # Frontale - Blu
-            'back': [['G', 'G', 'G'], ['G', 'G', 'G'], ['G', 'G', 'G']],    # Posteriore - Verde
-            'right': [['R', 'R', 'R'], ['R', 'R', 'R'], ['R', 'R', 'R']],   # Destra - Rosso
-            'left': [['O', 'O', 'O'], ['O', 'O', 'O'], ['O', 'O', 'O']]     # Sinistra - Arancione
-        }
-    
-    def get_face(self, face_name):
-        """Restituisce una copia della faccia specificata"""
-        if face_name in self.faces:
-            return [row[:] for row in self.faces[face_name]]  # Copia profonda
+        # 54 lettere ASCII: W=Bianco, Y=Giallo, R=Rosso, O=Arancione, B=Blu, G=Verde
+        self.facelets = SOLVED_STATE
+    
+    @property
+    def facelets(self):
+        """Le 54 facelet come memoryview in sola lettura; assegnarle ricalcola il conteggio delle facelet fuori posto"""
+        return self._state_view
+    
+    @facelets.setter
+    def facelets(self, facelets):
+        if len(facelets) != 54:
+            raise ValueError(f"Lo stato deve avere 54 facelet, ricevute {len(facelets)}")
+        # Sul posto: le viste già restituite continuano a mostrare lo stato corrente
+        self._facelets[:] = facelets
+        self._face_counts = _face_mismatches(self._facelets)
+        self._mismatches = sum(self._face_counts)
+        self._version = getattr(self, '_version', -1) + 1
+    
+    @property
+    def version(self):
+        """Contatore delle modifiche allo stato"""
+        return self._version
+    
+    @property
+    def mismatches(self):
+        """Facelet diverse dal centro della propria faccia: 0 se risolto, euristica economica altrimenti"""
+        return self._mismatches
+    
+    @property
+    def faces(self):
+        """Vista in sola lettura dello stato: sei matrici 3x3 di lettere (tuple di righe)"""
+        return self.get_all_faces()
+    
+    @faces.setter
+    def faces(self, faces):
+        """Carica lo stato da un dizionario di sei matrici 3x3 di lettere"""
+        self.facelets = bytearray(
+            ''.join(color for name in FACE_NAMES for row in faces[name] for color in row).encode('ascii')
+        )
+    
+    def get_face(self, face_name, copy=False):
+        """Restituisce la faccia specificata come vista (tupla di tre righe) o, con copy=True, come liste"""
+        if face_name in FACE_NAMES:
+            face = self.get_all_faces()[face_name]
+            return [list(row) for row in face] if copy else face
         return None
     
-    def get_all_faces(self):
-        """Restituisce una copia di tutte le facce"""
-        return {name: self.get_face(name) for name in self.faces.keys()}
+    def get_all_faces(self, copy=False):
+        """Restituisce tutte le facce: la vista in sola lettura della versione corrente, o una copia con copy=True"""
+        if self._views_version != self._version:
+            letters = self._facelets.decode('ascii')
+            self._views = MappingProxyType({
+                name: (letters[start:start + 3], letters[start + 3:start + 6], letters[start + 6:start + 9])
+                for name, start in zip(FACE_NAMES, range(0, 54, 9))
+            })
+            self._views_version = self._version
+        if copy:
+            return {name: [list(row) for row in face] for name, face in self._views.items()}
+        return self._views
+    
+    def state_view(self):
+        """Le 54 facelet come memoryview in sola lettura, senza copia, che segue le mosse successive"""
+        return self._state_view
+    
+    def get_state(self):
+        """Restituisce lo stato come bytes immutabili di 54 lettere"""
+        return bytes(self._facelets)
+    
+    def set_state(self, state):
+        """Imposta lo stato da una sequenza di 54 lettere (bytes o str)"""
+        if isinstance(state, str):
+            state = state.encode('ascii')
+        if len(state) != 54:
+            raise ValueError(f"Lo stato deve avere 54 facelet, ricevute {len(state)}")
+        self.facelets = state
+    
+    def apply_move(self, move):
+        """Applica una mossa in notazione standard (es. "U", "R'", "M2") con un'unica raccolta"""
+        facelets = self._facelets
+        facelets[:] = MOVE_GATHERS[move](facelets)
+        # Si ricontano solo le facce che la mossa tocca
+        counts = self._face_counts
+        mismatches = self._mismatches
+        for face, start, end, center in MOVE_AFFECTED_FACES[move]:
+            count = 9 - facelets.count(facelets[center], start, end)
+            mismatches += count - counts[face]
+            counts[face] = count
+        self._mismatches = mismatches
+        self._version += 1
+    
+    def apply_algorithm(self, moves):
+        """Applica un intero algoritmo (stringa o sequenza di mosse) come un'unica permutazione compilata"""
+        self.facelets = compile_algorithm(moves).gather(self._facelets)
     
     def rotate_face_clockwise(self, face_matrix):
         """Ruota una matrice 3x3 di 90° in senso orario"""
@@ -41,191 +168,27 @@ class RubiksCubeModel:
         """Ruota una matrice 3x3 di 90° in senso antiorario"""
         return [[face_matrix[j][2-i] for j in range(3)] for i in range(3)]
     
-    def rotate_up_clockwise(self):
-        """Ruota la faccia superiore in senso orario"""
-        # 1. Ruota la faccia superiore stessa
-        self.faces['up'] = self.rotate_face_clockwise(self.faces['up'])
-        
-        # 2. Ruota le righe superiori delle facce adiacenti
-        # Salva la riga superiore della faccia frontale
-        temp_row = self.faces['front'][0][:]
-        
-        # Sposta le righe: front <- right <- back <- left <- front
-        self.faces['front'][0] = self.faces['right'][0][:]
-        self.faces['right'][0] = self.faces['back'][0][:]
-        self.faces['back'][0] = self.faces['left'][0][:]
-        self.faces['left'][0] = temp_row
-    
-    def rotate_up_counter_clockwise(self):
-        """Ruota la faccia superiore in senso antiorario"""
-        # 1. Ruota la faccia superiore stessa
-        self.faces['up'] = self.rotate_face_counter_clockwise(self.faces['up'])
-        
-        # 2. Ruota le righe superiori delle facce adiacenti
-        # Salva la riga superiore della faccia frontale
-        temp_row = self.faces['front'][0][:]
-        
-        # Sposta le righe: front <- left <- back <- right <- front
-        self.faces['front'][0] = self.faces['left'][0][:]
-        self.faces['left'][0] = self.faces['back'][0][:]
-        self.faces['back'][0] = self.faces['right'][0][:]
-        self.faces['right'][0] = temp_row
-    
-    def rotate_down_clockwise(self):
-        """Ruota la faccia inferiore in senso orario"""
-        # 1. Ruota la faccia inferiore stessa
-        self.faces['down'] = self.rotate_face_clockwise(self.faces['down'])
-        
-        # 2. Ruota le righe inferiori delle facce adiacenti
-        # Salva la riga inferiore della faccia frontale
-        temp_row = self.faces['front'][2][:]
-        
-        # Sposta le righe: front <- left <- back <- right <- front (stesso verso della superiore)
-        self.faces['front'][2] = self.faces['left'][2][:]
-        self.faces['left'][2] = self.faces['back'][2][:]
-        self.faces['back'][2] = self.faces['right'][2][:]
-        self.faces['right'][2] = temp_row
-    
-    def rotate_down_counter_clockwise(self):
-        """Ruota la faccia inferiore in senso antiorario"""
-        # 1. Ruota la faccia inferiore stessa
-        self.faces['down'] = self.rotate_face_counter_clockwise(self.faces['down'])
-        
-        # 2. Ruota le righe inferiori delle facce adiacenti
-        # Salva la riga inferiore della faccia frontale
-        temp_row = self.faces['front'][2][:]
-        
-        # Sposta le righe: front <- right <- back <- left <- front (opposto della superiore)
-        self.faces['front'][2] = self.faces['right'][2][:]
-        self.faces['right'][2] = self.faces['back'][2][:]
-        self.faces['back'][2] = self.faces['left'][2][:]
-        self.faces['left'][2] = temp_row
-    
-    def rotate_middle_clockwise(self):
-        """Ruota la fascia centrale orizzontale in senso orario"""
-        # Salva la riga centrale della faccia frontale
-        temp_row = self.faces['front'][1][:]
-        
-        # Sposta le righe centrali: front <- left <- back <- right <- front
-        self.faces['front'][1] = self.faces['left'][1][:]
-        self.faces['left'][1] = self.faces['back'][1][:]
-        self.faces['back'][1] = self.faces['right'][1][:]
-        self.faces['right'][1] = temp_row
-    
-    def rotate_middle_counter_clockwise(self):
-        """Ruota la fascia centrale orizzontale in senso antiorario"""
-        # Salva la riga centrale della faccia frontale
-        temp_row = self.faces['front'][1][:]
-        
-        # Sposta le righe centrali: front <- right <- back <- left <- front
-        self.faces['front'][1] = self.faces['right'][1][:]
-        self.faces['right'][1] = self.faces['back'][1][:]
-        self.faces['back'][1] = self.faces['left'][1][:]
-        self.faces['left'][1] = temp_row
-    
-    def rotate_left_vertical_clockwise(self):
-        """Ruota la fascia verticale sinistra in senso orario (vista da sinistra)"""
-        # 1. Ruota la faccia sinistra stessa
-        self.faces['left'] = self.rotate_face_clockwise(self.faces['left'])
-        
-        # 2. Ruota le colonne sinistre delle facce adiacenti
-        # Salva la colonna sinistra della faccia superiore
-        temp_col = [self.faces['up'][i][0] for i in range(3)]
-        
-        # Sposta le colonne: up <- back <- down <- front <- up
-        # Nota: la faccia back è vista da dietro, quindi le colonne sono invertite
-        for i in range(3):
-            self.faces['up'][i][0] = self.faces['front'][i][0]
-            self.faces['front'][i][0] = self.faces['down'][i][0]
-            self.faces['down'][i][0] = self.faces['back'][2-i][2]  # Colonna destra di back (invertita)
-            self.faces['back'][2-i][2] = temp_col[i]
-    
-    def rotate_left_vertical_counter_clockwise(self):
-        """Ruota la fascia verticale sinistra in senso antiorario (vista da sinistra)"""
-        # 1. Ruota la faccia sinistra stessa
-        self.faces['left'] = self.rotate_face_counter_clockwise(self.faces['left'])
-        
-        # 2. Ruota le colonne sinistre delle facce adiacenti
-        # Salva la colonna sinistra della faccia superiore
-        temp_col = [self.faces['up'][i][0] for i in range(3)]
-        
-        # Sposta le colonne: up <- back <- down <- front <- up (direzione opposta)
-        for i in range(3):
-            self.faces['up'][i][0] = self.faces['back'][2-i][2]  # Colonna destra di back (invertita)
-            self.faces['back'][2-i][2] = self.faces['down'][i][0]
-            self.faces['down'][i][0] = self.faces['front'][i][0]
-            self.faces['front'][i][0] = temp_col[i]
-    
-    def rotate_center_vertical_clockwise(self):
-        """Ruota la fascia verticale centrale in senso orario (vista da sinistra)"""
-        # Salva la colonna centrale della faccia superiore
-        temp_col = [self.faces['up'][i][1] for i in range(3)]
-        
-        # Sposta le colonne centrali: up <- front <- down <- back <- up
-        for i in range(3):
-            self.faces['up'][i][1] = self.faces['front'][i][1]
-            self.faces['front'][i][1] = self.faces['down'][i][1]
-            self.faces['down'][i][1] = self.faces['back'][2-i][1]  # Colonna centrale di back (invertita)
-            self.faces['back'][2-i][1] = temp_col[i]
-    
-    def rotate_center_vertical_counter_clockwise(self):
-        """Ruota la fascia verticale centrale in senso antiorario (vista da sinistra)"""
-        # Salva la colonna centrale della faccia superiore
-        temp_col = [self.faces['up'][i][1] for i in range(3)]
-        
-        # Sposta le colonne centrali: up <- back <- down <- front <- up (direzione opposta)
-        for i in range(3):
-            self.faces['up'][i][1] = self.faces['back'][2-i][1]  # Colonna centrale di back (invertita)
-            self.faces['back'][2-i][1] = self.faces['down'][i][1]
-            self.faces['down'][i][1] = self.faces['front'][i][1]
-            self.faces['front'][i][1] = temp_col[i]
-    
-    def rotate_right_vertical_clockwise(self):
-        """Ruota la fascia verticale destra in senso orario (vista da sinistra)"""
-        # 1. Ruota la faccia destra stessa
-        self.faces['right'] = self.rotate_face_clockwise(self.faces['right'])
-        
-        # 2. Ruota le colonne destre delle facce adiacenti
-        # Salva la colonna destra della faccia superiore
-        temp_col = [self.faces['up'][i][2] for i in range(3)]
-        
-        # Sposta le colonne: up <- front <- down <- back <- up
-        for i in range(3):
-            self.faces['up'][i][2] = self.faces['front'][i][2]
-            self.faces['front'][i][2] = self.faces['down'][i][2]
-            self.faces['down'][i][2] = self.faces['back'][2-i][0]  # Colonna sinistra di back (invertita)
-            self.faces['back'][2-i][0] = temp_col[i]
-    
-    def rotate_right_vertical_counter_clockwise(self):
-        """Ruota la fascia verticale destra in senso antiorario (vista da sinistra)"""
-        # 1. Ruota la faccia destra stessa
-        self.faces['right'] = self.rotate_face_counter_clockwise(self.faces['right'])
-        
-        # 2. Ruota le colonne destre delle facce adiacenti
-        # Salva la colonna destra della faccia superiore
-        temp_col = [self.faces['up'][i][2] for i in range(3)]
-        
-        # Sposta le colonne: up <- back <- down <- front <- up (direzione opposta)
-        for i in range(3):
-            self.faces['up'][i][2] = self.faces['back'][2-i][0]  # Colonna sinistra di back (invertita)
-            self.faces['back'][2-i][0] = self.faces['down'][i][2]
-            self.faces['down'][i][2] = self.faces['front'][i][2]
-            self.faces['front'][i][2] = temp_col[i]
-    
     def is_solved(self):
-        """Controlla se il cubo è risolto (ogni faccia ha un colore uniforme)"""
-        for face_name, face in self.faces.items():
-            first_color = face[0][0]
-            for row in face:
-                for color in row:
-                    if color != first_color:
-                        return False
-        return True
+        """Controlla se il cubo è risolto (ogni faccia ha un colore uniforme) in tempo costante"""
+        if self.debug:
+            self._check_mismatches()
+        return self._mismatches == 0
+    
+    def _check_mismatches(self):
+        """Confronta il conteggio incrementale con la scansione completa delle facce"""
+        facelets = self._facelets
+        expected = count_mismatches(facelets)
+        solved = all(facelets[start:start + 9] == facelets[start:start + 1] * 9 for start in range(0, 54, 9))
+        if (expected != self._mismatches or self._face_counts != _face_mismatches(facelets)
+                or solved != (self._mismatches == 0)):
+            raise AssertionError(
+                f"Conteggio delle facelet fuori posto errato: {self._mismatches} invece di {expected}"
+            )
     
     def print_state(self):
         """Stampa lo stato corrente del cubo per debug"""
         print("\n=== STATO CUBO DI RUBIK ===")
-        for face_name, face in self.faces.items():
+        for face_name, face in self.get_all_faces().items():
             print(f"{face_name.upper()}:")
             for row in face:
                 print(f"  {' '.join(row)}")
@@ -234,6 +197,25 @@ class RubiksCubeModel:
     def get_face_colors(self):
         """Restituisce i colori centrali di ogni faccia (per identificazione)"""
         return {
-            face_name: face[1][1]  # Colore centrale
-            for face_name, face in self.faces.items()
-        }
\ No newline at end of file
+            face_name: chr(self.facelets[index * 9 + 4])  # Colore centrale
+            for index, face_name in enumerate(FACE_NAMES)
+        }
+
+
+def _make_rotation(method_name, move, description):
+    """Crea un metodo di rotazione che applica una mossa della tabella"""
+    def rotate(self):
+        self.apply_move(move)
+    rotate.__name__ = method_name
+    rotate.__qualname__ = f"RubiksCubeModel.{method_name}"
+    rotate.__doc__ = f"Ruota {description} ({move})"
+    return rotate
+
+
+# Un metodo orario e uno antiorario per ogni rotazione con nome
+for _name, (_clockwise, _counter_clockwise) in FACE_ROTATIONS.items():
+    for _suffix, _move, _sense in (('clockwise', _clockwise, 'orario'),
+                                   ('counter_clockwise', _counter_clockwise, 'antiorario')):
+        _method_name = f'rotate_{_name}_{_suffix}'
+        setattr(RubiksCubeModel, _method_name,
+                _make_rotation(_method_name, _move, f"{_name} in senso {_sense}"))
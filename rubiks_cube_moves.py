@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tabelle di permutazione delle mosse del Cubo di Rubik
+Lo stato del cubo è una sequenza piatta di 54 facelet; ogni mossa è una
+permutazione precalcolata di 54 indici, così applicarla è un'unica raccolta
+(gather): nuovo_stato[i] = stato[permutazione[i]].
+"""
+
+import re
+from functools import lru_cache
+from operator import itemgetter
+
+# Ordine delle facce nello stato piatto (lo stesso del dizionario storico 'faces')
+FACE_NAMES = ('up', 'down', 'front', 'back', 'right', 'left')
+
+# Colore di ogni faccia nello stato risolto
+SOLVED_FACE_COLORS = {
+    'up': 'W',
+    'down': 'Y',
+    'front': 'B',
+    'back': 'G',
+    'right': 'R',
+    'left': 'O'
+}
+
+# Stato risolto: 9 lettere per faccia, nell'ordine di FACE_NAMES
+SOLVED_STATE = ''.join(SOLVED_FACE_COLORS[name] * 9 for name in FACE_NAMES).encode('ascii')
+
+# Assi di rotazione: vettore unitario dell'asse positivo
+AXES = {
+    'x': (1, 0, 0),   # Da sinistra verso destra
+    'y': (0, 1, 0),   # Dal basso verso l'alto
+    'z': (0, 0, 1)    # Dal retro verso il fronte
+}
+
+# Coordinate 3D (x, y, z in -1..1) e normale di ogni facelet (face, row, col).
+# Le righe delle facce laterali vanno dall'alto verso il basso; la colonna 0 è
+# quella di sinistra guardando la faccia dall'esterno. Sulla faccia superiore la
+# riga 0 è quella posteriore, su quella inferiore la riga 0 è quella frontale.
+_FACE_GEOMETRY = {
+    'up': (lambda r, c: (c - 1, 1, r - 1), (0, 1, 0)),
+    'down': (lambda r, c: (c - 1, -1, 1 - r), (0, -1, 0)),
+    'front': (lambda r, c: (c - 1, 1 - r, 1), (0, 0, 1)),
+    'back': (lambda r, c: (1 - c, 1 - r, -1), (0, 0, -1)),
+    'right': (lambda r, c: (1, 1 - r, 1 - c), (1, 0, 0)),
+    'left': (lambda r, c: (-1, 1 - r, c - 1), (-1, 0, 0))
+}
+
+
+def facelet_index(face_name, row, col):
+    """Restituisce l'indice nello stato piatto della facelet (faccia, riga, colonna)"""
+    return FACE_NAMES.index(face_name) * 9 + row * 3 + col
+
+
+def _build_facelet_geometry():
+    """Calcola posizione e normale di ciascuna delle 54 facelet"""
+    geometry = []
+    for face_name in FACE_NAMES:
+        position_of, normal = _FACE_GEOMETRY[face_name]
+        for row in range(3):
+            for col in range(3):
+                geometry.append((position_of(row, col), normal))
+    return tuple(geometry)
+
+
+FACELET_GEOMETRY = _build_facelet_geometry()
+# Indice della facelet con una data (posizione, normale)
+FACELET_BY_GEOMETRY = {geometry: index for index, geometry in enumerate(FACELET_GEOMETRY)}
+
+
+def rotate_vector(vector, axis, quarter_turns):
+    """Ruota un vettore intero attorno a un asse di quarter_turns * 90° (regola della mano destra)"""
+    x, y, z = vector
+    for _ in range(quarter_turns % 4):
+        if axis == 'x':
+            x, y, z = x, -z, y
+        elif axis == 'y':
+            x, y, z = z, y, -x
+        else:
+            x, y, z = -y, x, z
+    return (x, y, z)
+
+
+def transform(matrix, vector):
+    """Applica una matrice 3x3 (tupla di righe) a un vettore"""
+    return tuple(sum(matrix[row][column] * vector[column] for column in range(3)) for row in range(3))
+
+
+def layer_permutation(axis, layers, quarter_turns):
+    """Costruisce la permutazione (gather) che ruota gli strati indicati attorno a un asse.
+
+    layers contiene le coordinate (-1, 0, 1) lungo l'asse degli strati che girano;
+    quarter_turns positivo ruota in senso antiorario guardando dal lato positivo dell'asse.
+    """
+    axis_component = 'xyz'.index(axis)
+    permutation = list(range(54))
+    for source, (position, normal) in enumerate(FACELET_GEOMETRY):
+        if position[axis_component] not in layers:
+            continue
+        target = FACELET_BY_GEOMETRY[(
+            rotate_vector(position, axis, quarter_turns),
+            rotate_vector(normal, axis, quarter_turns)
+        )]
+        permutation[target] = source
+    return tuple(permutation)
+
+
+# Mosse di base: asse, strati coinvolti e quarti di giro del senso orario
+# (orario guardando la faccia che dà il nome alla mossa). Ogni mossa, compresi
+# inverse e mezzi giri, è generata da questa sola tabella.
+BASE_MOVES = {
+    # Facce esterne
+    'U': ('y', (1,), -1),
+    'D': ('y', (-1,), 1),
+    'R': ('x', (1,), -1),
+    'L': ('x', (-1,), 1),
+    'F': ('z', (1,), -1),
+    'B': ('z', (-1,), 1),
+    # Strati centrali: E segue D, M segue L, S segue F
+    'E': ('y', (0,), 1),
+    'M': ('x', (0,), 1),
+    'S': ('z', (0,), -1),
+    # Mosse larghe: faccia esterna più strato centrale
+    'Uw': ('y', (1, 0), -1),
+    'Dw': ('y', (-1, 0), 1),
+    'Rw': ('x', (1, 0), -1),
+    'Lw': ('x', (-1, 0), 1),
+    'Fw': ('z', (1, 0), -1),
+    'Bw': ('z', (-1, 0), 1),
+    # Rotazioni dell'intero cubo: x segue R, y segue U, z segue F
+    'x': ('x', (-1, 0, 1), -1),
+    'y': ('y', (-1, 0, 1), -1),
+    'z': ('z', (-1, 0, 1), -1)
+}
+
+# Suffissi della notazione e quarti di giro corrispondenti, rispetto al senso orario
+MOVE_SUFFIXES = {'': 1, "'": -1, '2': 2}
+
+# Le 18 mosse delle facce esterne nell'ordine usato dai modelli a cubetti
+# (asse U, R, F, D, L, B; per ognuno quarto orario, mezzo giro, quarto antiorario)
+FACE_MOVES = tuple(face + suffix for face in 'URFDLB' for suffix in ('', '2', "'"))
+
+# Rotazioni con nome usate dall'interfaccia: mossa oraria e antioraria di ciascuna.
+# Le fasce verticali storiche girano tutte nello stesso verso (il fronte sale).
+FACE_ROTATIONS = {
+    'up': ('U', "U'"),
+    'down': ('D', "D'"),
+    'middle': ('E', "E'"),
+    'left_vertical': ("L'", 'L'),
+    'center_vertical': ("M'", 'M'),
+    'right_vertical': ('R', "R'"),
+    'front': ('F', "F'"),
+    'back': ('B', "B'"),
+    'right': ('R', "R'"),
+    'left': ('L', "L'"),
+    'standing': ('S', "S'")
+}
+
+
+def move_geometry(move):
+    """Restituisce asse, strati e quarti di giro effettivi (con segno) di una mossa (es. R', x2)"""
+    for suffix in ("'", '2'):
+        if move.endswith(suffix):
+            base = move[:-1]
+            break
+    else:
+        base, suffix = move, ''
+    if base not in BASE_MOVES:
+        raise ValueError(f"Mossa sconosciuta: {move}")
+    axis, layers, quarter_turns = BASE_MOVES[base]
+    return axis, layers, quarter_turns * MOVE_SUFFIXES[suffix]
+
+
+def _build_move_permutations():
+    """Genera la permutazione di ogni mossa base in ciascuno dei suoi tre sensi"""
+    permutations = {}
+    for name in BASE_MOVES:
+        for suffix in MOVE_SUFFIXES:
+            permutations[name + suffix] = layer_permutation(*move_geometry(name + suffix))
+    return permutations
+
+
+MOVE_PERMUTATIONS = _build_move_permutations()
+
+# Per ogni mossa un itemgetter precompilato: applicarlo a uno stato restituisce
+# la tupla delle facelet permutate in un solo passaggio in C
+MOVE_GATHERS = {name: itemgetter(*permutation) for name, permutation in MOVE_PERMUTATIONS.items()}
+
+
+# === Algoritmi: notazione e compilazione ===
+
+_MOVE_TOKEN = re.compile(r"\s*([A-Za-z]w?)(2'|'2|2|'|)")
+
+
+@lru_cache(maxsize=1024)
+def parse_algorithm(text):
+    """Converte un algoritmo in notazione standard (es. "R U R' U'") nella tupla dei nomi canonici"""
+    text = text.replace('’', "'").replace('′', "'").rstrip()
+    moves = []
+    position = 0
+    while position < len(text):
+        match = _MOVE_TOKEN.match(text, position)
+        if not match:
+            raise ValueError(f"Notazione non valida vicino a '{text[position:].strip()}'")
+        base, suffix = match.groups()
+        if base in 'udrlfb':
+            base = base.upper() + 'w'  # Notazione alternativa delle mosse larghe (r = Rw)
+        move = base + ('2' if '2' in suffix else suffix)
+        if move not in MOVE_PERMUTATIONS:
+            raise ValueError(f"Mossa sconosciuta: {base + suffix}")
+        moves.append(move)
+        position = match.end()
+    return tuple(moves)
+
+
+def normalize_algorithm(moves):
+    """Riduce un algoritmo (stringa o sequenza di mosse) alla tupla dei nomi canonici"""
+    if isinstance(moves, str):
+        return parse_algorithm(moves)
+    moves = tuple(moves)
+    if all(move in MOVE_PERMUTATIONS for move in moves):
+        return moves
+    normalized = []
+    for move in moves:
+        normalized.extend(parse_algorithm(move))
+    return tuple(normalized)
+
+
+def compose_permutations(first, second):
+    """Permutazione equivalente ad applicare first e poi second"""
+    return tuple(first[index] for index in second)
+
+
+class CompiledAlgorithm:
+    def __init__(self, moves, permutation):
+        """Algoritmo compilato: la sequenza di mosse ridotta a una sola permutazione"""
+        self.moves = moves
+        self.permutation = permutation
+        self.gather = itemgetter(*permutation)
+
+    def __len__(self):
+        return len(self.moves)
+
+    def __repr__(self):
+        return f"CompiledAlgorithm({' '.join(self.moves)!r})"
+
+    def apply(self, state):
+        """Applica l'intero algoritmo a uno stato di 54 facelet con un'unica raccolta"""
+        return bytes(self.gather(state))
+
+
+@lru_cache(maxsize=1024)
+def _compile_normalized(moves):
+    """Compone le permutazioni di una sequenza già normalizzata (memoizzata)"""
+    permutation = tuple(range(54))
+    for move in moves:
+        permutation = compose_permutations(permutation, MOVE_PERMUTATIONS[move])
+    return CompiledAlgorithm(moves, permutation)
+
+
+def compile_algorithm(moves):
+    """Compila un algoritmo in un'unica permutazione, con cache LRU sulla sequenza normalizzata"""
+    if isinstance(moves, CompiledAlgorithm):
+        return moves
+    return _compile_normalized(normalize_algorithm(moves))
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Risolutore Ottimo del Cubo di Rubik (IDA* con database di pattern)
+Trova soluzioni di lunghezza minima nella metrica a mezzi giri (HTM, 18 mosse)
+o a quarti di giro (QTM, 12 mosse). L'euristica è il massimo di tre database
+di pattern a 4 bit per voce: angoli (88.179.840 voci) e due gruppi disgiunti
+di 6 spigoli (42.577.920 voci ciascuno). Le mosse inutili (stessa faccia due
+volte, facce opposte in ordine inverso) sono escluse da tabelle di successori.
+
+Uso da riga di comando:
+    python rubiks_cube_optimal.py "R U R' U'" [--metric qtm] [--timeout SECONDI]
+"""
+
+import argparse
+import sys
+import time
+from itertools import permutations
+
+import numpy as np
+
+from rubiks_cube_cubie import CUBIE_MOVES, N_TWIST, N_CORNERS, SOLVED_CUBIE, to_cubie
+from rubiks_cube_moves import FACE_MOVES
+from rubiks_cube_solver import (
+    N_MOVES, TABLE_PREFIX, TABLE_VERSION, build_corners_move_table, build_twist_move_table,
+    build_pruning_table, breadth_first_depths, named_progress, print_progress
+)
+from rubiks_cube_tables import TableStore, nibble_at
+
+# Mosse ammesse in ogni metrica (indici in FACE_MOVES)
+METRIC_MOVES = {
+    'htm': tuple(range(N_MOVES)),
+    'qtm': tuple(move for move in range(N_MOVES) if FACE_MOVES[move][1:] != '2'),
+}
+
+# Gruppi di spigoli dei due database (indici in EDGE_NAMES): UR UF UL UB DR DF e DL DB FR FL BL BR
+EDGE_GROUPS = ((0, 1, 2, 3, 4, 5), (6, 7, 8, 9, 10, 11))
+EDGE_GROUP_SIZE = 6
+N_EDGE_PLACEMENTS = 12 * 11 * 10 * 9 * 8 * 7           # Posizioni ordinate di 6 spigoli su 12
+N_EDGE_GROUP = N_EDGE_PLACEMENTS << EDGE_GROUP_SIZE     # ... per i 2^6 orientamenti
+N_CORNER_STATES = N_CORNERS * N_TWIST
+
+# Pesi del rango lessicografico di una disposizione di 6 posizioni su 12
+_PLACEMENT_WEIGHTS = np.array([np.prod(np.arange(7, 12 - i), dtype=np.int64) for i in range(EDGE_GROUP_SIZE)])
+
+OPTIMAL_TABLE_VERSION = 1
+OPTIMAL_TABLE_PREFIX = 'optimal_'
+
+
+# === Coordinate dei gruppi di spigoli ===
+
+def _rank_placements(placements):
+    """Rango lessicografico di ogni riga di una matrice (K, 6) di posizioni distinte in 0..11"""
+    ranks = np.zeros(placements.shape[0], dtype=np.int64)
+    for i in range(EDGE_GROUP_SIZE):
+        earlier_smaller = (placements[:, :i] < placements[:, i:i + 1]).sum(axis=1)
+        ranks += (placements[:, i] - earlier_smaller) * _PLACEMENT_WEIGHTS[i]
+    return ranks
+
+
+def edge_group_coordinate(cube, edges):
+    """Coordinata di un gruppo di spigoli: rango delle posizioni * 64 + orientamenti (un bit per spigolo)"""
+    positions = [cube.ep.index(edge) for edge in edges]
+    rank = 0
+    orientation = 0
+    for i, position in enumerate(positions):
+        earlier_smaller = sum(1 for earlier in positions[:i] if earlier < position)
+        rank += (position - earlier_smaller) * int(_PLACEMENT_WEIGHTS[i])
+        orientation = orientation << 1 | cube.eo[position]
+    return rank << EDGE_GROUP_SIZE | orientation
+
+
+def build_edge_group_move_table():
+    """Tabella (N_EDGE_PLACEMENTS, 18) con rango delle nuove posizioni * 64 + bit degli spigoli girati.
+
+    La tabella non dipende da quali spigoli formano il gruppo; la nuova
+    coordinata si ottiene con tabella[coordinata >> 6] ^ (coordinata & 63).
+    """
+    # permutations() elenca le disposizioni proprio in ordine di rango lessicografico
+    placements = np.array(list(permutations(range(12), EDGE_GROUP_SIZE)), dtype=np.int64)
+    bit_weights = 1 << np.arange(EDGE_GROUP_SIZE - 1, -1, -1)
+    table = np.empty((N_EDGE_PLACEMENTS, N_MOVES), dtype=np.uint32)
+    for m in range(N_MOVES):
+        move = CUBIE_MOVES[FACE_MOVES[m]]
+        # Lo spigolo in posizione p finisce nella posizione q con move.ep[q] == p
+        destination = np.argsort(move.ep)[placements]
+        flips = np.array(move.eo)[destination]
+        table[:, m] = (_rank_placements(destination) << EDGE_GROUP_SIZE) | (flips * bit_weights).sum(axis=1)
+    return table
+
+
+class EdgeGroupNeighbours:
+    def __init__(self, edge_move):
+        """Vicini nello spazio di un gruppo di spigoli; edge_move è una tabella salvata o un array NumPy.
+
+        Una tabella salvata viene riaperta con mmap nei processi della visita parallela, senza copie.
+        """
+        self.edge_move = edge_move
+        self._array = None
+
+    def __getstate__(self):
+        return {'edge_move': self.edge_move, '_array': None}
+
+    def __call__(self, indices, move):
+        if self._array is None:
+            table = self.edge_move
+            self._array = (table.to_numpy() if hasattr(table, 'to_numpy') else np.asarray(table)).reshape(-1, N_MOVES)
+        return self._array[indices >> EDGE_GROUP_SIZE, move].astype(np.int64) ^ (indices & 63)
+
+
+def build_edge_group_pruning_table(edge_move, moves, goal, workers=None, progress=None):
+    """Distanza minima dalla coordinata goal di un gruppo di spigoli, per ogni coordinata"""
+    return breadth_first_depths(N_EDGE_GROUP, EdgeGroupNeighbours(edge_move), moves, start=goal,
+                                workers=workers, progress=progress)
+
+
+# === Tabelle ===
+
+def _table_specs(metric, stored, workers=None, progress=None):
+    """Attributo, nome su disco, versione, bit per voce e funzione generatrice di ogni tabella.
+
+    stored(attribute) restituisce una tabella già aperta. Le tabelle delle mosse
+    su angoli sono condivise con il risolutore a due fasi.
+    """
+    moves = METRIC_MOVES[metric]
+
+    def move_array(attribute):
+        return stored(attribute).to_numpy().reshape(-1, N_MOVES)
+
+    specs = [
+        ('twist_move', TABLE_PREFIX + 'twist_move', TABLE_VERSION, 16, build_twist_move_table),
+        ('corners_move', TABLE_PREFIX + 'corners_move', TABLE_VERSION, 16, build_corners_move_table),
+        ('edge_move', OPTIMAL_TABLE_PREFIX + 'edge_move', OPTIMAL_TABLE_VERSION, 32, build_edge_group_move_table),
+        ('corners_prune', f'{OPTIMAL_TABLE_PREFIX}corners_prune_{metric}', OPTIMAL_TABLE_VERSION, 4,
+         lambda: build_pruning_table(move_array('corners_move')[:, moves], move_array('twist_move')[:, moves],
+                                     N_TWIST, moves, workers, named_progress(progress, 'corners_prune'))),
+    ]
+    for group, edges in enumerate(EDGE_GROUPS):
+        attribute = f'edges{group}_prune'
+        specs.append((attribute, f'{OPTIMAL_TABLE_PREFIX}{attribute}_{metric}', OPTIMAL_TABLE_VERSION, 4,
+                      lambda goal=edge_group_coordinate(SOLVED_CUBIE, edges), attribute=attribute:
+                      build_edge_group_pruning_table(stored('edge_move'), moves, goal, workers,
+                                                     named_progress(progress, attribute))))
+    return specs
+
+
+class OptimalTables:
+    def __init__(self, metric, twist_move, corners_move, edge_move, corners_prune, edges0_prune, edges1_prune):
+        """Tabelle del risolutore ottimo per una metrica; database di pattern impacchettati a 4 bit"""
+        self.metric = metric
+        self.twist_move = twist_move
+        self.corners_move = corners_move
+        self.edge_move = edge_move
+        self.corners_prune = corners_prune
+        self.edges0_prune = edges0_prune
+        self.edges1_prune = edges1_prune
+
+    @classmethod
+    def load(cls, metric='htm', store=None, rebuild=False, verbose=False, workers=None, progress=None):
+        """Apre le tabelle dall'archivio su disco (mmap), generando quelle mancanti (anche alcuni minuti).
+
+        workers e progress(name, depth, count, reached) sono passati alle
+        visite in ampiezza dei database di pattern.
+        """
+        if metric not in METRIC_MOVES:
+            raise ValueError(f"Metrica non supportata: {metric}")
+        store = store if store is not None else TableStore()
+        start = time.perf_counter()
+        loaded = {}
+        progress = progress if progress is not None or not verbose else print_progress
+        for attribute, name, version, bits, builder in _table_specs(metric, loaded.__getitem__, workers, progress):
+            loaded[attribute] = store.load(name, version, bits, builder, rebuild)
+            if verbose:
+                print(f"[{time.perf_counter() - start:7.2f}s] Tabella {name} pronta")
+        return cls(metric, **{attribute: table.data for attribute, table in loaded.items()})
+
+
+def _successors(metric):
+    """Per ogni contesto di ricerca, le coppie (mossa, contesto successivo) ammesse.
+
+    In HTM il contesto è l'ultima faccia girata (0 = nessuna): la stessa faccia
+    non si ripete e di due facce opposte si prova un solo ordine. In QTM il
+    contesto ricorda l'ultimo quarto di giro e se è già stato ripetuto: la
+    stessa mossa è ammessa due volte di seguito, mai la sua inversa.
+    """
+    moves = METRIC_MOVES[metric]
+    if metric == 'htm':
+        contexts = [None] + list(range(6))
+        return tuple(
+            tuple((move, move // 3 + 1) for move in moves
+                  if last_face is None or (move // 3 != last_face and move // 3 != last_face - 3))
+            for last_face in contexts
+        )
+
+    contexts = [(None, 0)] + [(move, count) for move in moves for count in (1, 2)]
+    context_index = {context: index for index, context in enumerate(contexts)}
+    successors = []
+    for last_move, count in contexts:
+        allowed = []
+        for move in moves:
+            face = move // 3
+            if last_move is None:
+                allowed.append((move, context_index[move, 1]))
+            elif face == last_move // 3:
+                if move == last_move and count == 1:
+                    allowed.append((move, context_index[move, 2]))
+            elif face != last_move // 3 - 3:
+                allowed.append((move, context_index[move, 1]))
+        successors.append(tuple(allowed))
+    return tuple(successors)
+
+
+SUCCESSORS = {metric: _successors(metric) for metric in METRIC_MOVES}
+
+
+class OptimalSolver:
+    def __init__(self, metric='htm', tables=None):
+        """Crea il risolutore ottimo; senza tabelle apre (o genera) quelle condivise della metrica"""
+        self.tables = tables if tables is not None else get_tables(metric)
+        self.metric = self.tables.metric
+        self.nodes_expanded = 0
+        self.nodes_by_depth = {}
+        self.elapsed = 0.0
+
+    @property
+    def nodes_per_second(self):
+        """Nodi espansi al secondo nell'ultima ricerca"""
+        return self.nodes_expanded / self.elapsed if self.elapsed else 0.0
+
+    def heuristic(self, corners, twist, edges0, edges1):
+        """Limite inferiore delle mosse mancanti: massimo dei tre database di pattern"""
+        tables = self.tables
+        return max(nibble_at(tables.corners_prune, corners * N_TWIST + twist),
+                   nibble_at(tables.edges0_prune, edges0),
+                   nibble_at(tables.edges1_prune, edges1))
+
+    def solve(self, cube, max_length=None, timeout=None):
+        """Restituisce una soluzione ottima come lista di mosse in notazione standard.
+
+        Solleva ValueError se lo stato non è legale o se non esiste una soluzione
+        di al più max_length mosse, TimeoutError se la ricerca supera timeout
+        secondi. Dopo la ricerca nodes_expanded, nodes_by_depth, elapsed e
+        nodes_per_second descrivono il lavoro svolto.
+        """
+        cubie = to_cubie(cube)
+        cubie.verify()
+        self.nodes_expanded = 0
+        self.nodes_by_depth = {}
+        self._path = []
+        self._deadline = time.perf_counter() + timeout if timeout is not None else None
+        start = time.perf_counter()
+        try:
+            corners, twist = cubie.get_corners(), cubie.get_twist()
+            edges0, edges1 = (edge_group_coordinate(cubie, edges) for edges in EDGE_GROUPS)
+            depth = self.heuristic(corners, twist, edges0, edges1)
+            if depth == 0:
+                return []
+            # Diametri noti: 20 mosse in HTM, 26 in QTM
+            limit = max_length if max_length is not None else (20 if self.metric == 'htm' else 26)
+            while depth <= limit:
+                expanded = self.nodes_expanded
+                found = self._search(corners, twist, edges0, edges1, depth, 0)
+                self.nodes_by_depth[depth] = self.nodes_expanded - expanded
+                if found:
+                    return [FACE_MOVES[move] for move in self._path]
+                depth += 1
+            raise ValueError(f"Nessuna soluzione di al più {limit} mosse")
+        finally:
+            self.elapsed = time.perf_counter() - start
+
+    def _search(self, corners, twist, edges0, edges1, togo, context):
+        """Espande un nodo con ancora togo mosse a disposizione; True quando il cubo è risolto"""
+        self.nodes_expanded += 1
+        if not self.nodes_expanded & 0x3FFF and self._deadline is not None \
+                and time.perf_counter() > self._deadline:
+            raise TimeoutError(f"Tempo esaurito dopo {self.nodes_expanded} nodi espansi")
+
+        tables = self.tables
+        twist_move, corners_move, edge_move = tables.twist_move, tables.corners_move, tables.edge_move
+        corners_prune, edges0_prune, edges1_prune = tables.corners_prune, tables.edges0_prune, tables.edges1_prune
+        for move, next_context in SUCCESSORS[self.metric][context]:
+            new_corners = corners_move[corners * 18 + move]
+            new_twist = twist_move[twist * 18 + move]
+            index = new_corners * N_TWIST + new_twist
+            if corners_prune[index >> 1] >> ((index & 1) << 2) & 15 >= togo:
+                continue
+            new_edges0 = edge_move[(edges0 >> 6) * 18 + move] ^ (edges0 & 63)
+            if edges0_prune[new_edges0 >> 1] >> ((new_edges0 & 1) << 2) & 15 >= togo:
+                continue
+            new_edges1 = edge_move[(edges1 >> 6) * 18 + move] ^ (edges1 & 63)
+            if edges1_prune[new_edges1 >> 1] >> ((new_edges1 & 1) << 2) & 15 >= togo:
+                continue
+            self._path.append(move)
+            # Con togo == 1 tutte e tre le distanze sono 0: ogni cubetto è al suo posto
+            if togo == 1 or self._search(new_corners, new_twist, new_edges0, new_edges1, togo - 1, next_context):
+                return True
+            self._path.pop()
+        return False
+
+    def report(self):
+        """Riepilogo dell'ultima ricerca: nodi espansi, tempo e velocità"""
+        lines = [f"Nodi espansi: {self.nodes_expanded} in {self.elapsed:.3f} s "
+                 f"({self.nodes_per_second:,.0f} nodi/s)"]
+        for depth, nodes in self.nodes_by_depth.items():
+            lines.append(f"  profondità {depth:2}: {nodes} nodi")
+        return "\n".join(lines)
+
+
+_default_tables = {}
+
+
+def get_tables(metric='htm'):
+    """Tabelle condivise del risolutore ottimo per una metrica, aperte (o generate) al primo utilizzo"""
+    if metric not in _default_tables:
+        _default_tables[metric] = OptimalTables.load(metric)
+    return _default_tables[metric]
+
+
+def solve_optimal(cube, metric='htm', max_length=None, timeout=None):
+    """Risolve un cubo (modello, stato, facelet o CubieCube) con il minimo numero di mosse"""
+    return OptimalSolver(metric).solve(cube, max_length=max_length, timeout=timeout)
+
+
+def main(argv=None):
+    """Punto d'ingresso da riga di comando: risolve in modo ottimo lo stato ottenuto da un algoritmo"""
+    parser = argparse.ArgumentParser(description="Soluzione ottima del Cubo di Rubik con IDA*")
+    parser.add_argument('algorithm', help="Mosse che portano allo stato da risolvere, es. \"R U R' U'\"")
+    parser.add_argument('--metric', choices=tuple(METRIC_MOVES), default='htm')
+    parser.add_argument('--timeout', type=float, help="Tempo massimo di ricerca in secondi")
+    args = parser.parse_args(argv)
+
+    from rubiks_cube_model import RubiksCubeModel
+    model = RubiksCubeModel()
+    model.apply_algorithm(args.algorithm)
+    solver = OptimalSolver(tables=OptimalTables.load(args.metric, verbose=True))
+    solution = solver.solve(model, timeout=args.timeout)
+    print(f"Soluzione ({len(solution)} mosse, {args.metric.upper()}): {' '.join(solution)}")
+    print(solver.report())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
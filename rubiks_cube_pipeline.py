@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Risoluzione in Blocco del Cubo di Rubik
+Legge un flusso di stati da file o dallo standard input, li distribuisce a
+un ProcessPoolExecutor e scrive le soluzioni nello stesso ordine
+dell'ingresso. I processi aprono le tabelle dall'archivio su disco con mmap
+e ne condividono le pagine fisiche. Il numero di stati in lavorazione è
+limitato, così la lettura non corre più avanti della risoluzione; ogni
+stato ha un tempo massimo. Alla fine sono riportati il numero di cubi al
+secondo e i percentili della latenza.
+
+Formati d'ingresso:
+- jsonl: una riga JSON per stato, un oggetto con "state" (54 facelet) oppure
+  "scramble" (mosse dallo stato risolto) e facoltativamente "id", oppure
+  direttamente una stringa con le facelet o le mosse;
+- binary: record consecutivi di 54 byte (come scritti da rubiks_cube_scramble.py);
+- states: file di stati compatti (rubiks_cube_codec.py), aperto con mmap.
+
+Uso da riga di comando:
+    python rubiks_cube_pipeline.py INGRESSO [--output USCITA] [--format jsonl|binary|states]
+        [--solver twophase|optimal] [--workers N] [--max-in-flight N] [--timeout SECONDI]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from rubiks_cube_model import RubiksCubeModel
+from rubiks_cube_tables import TableStore
+
+BINARY_RECORD_SIZE = 54
+
+# Stati in lavorazione per processo quando max_in_flight non è indicato
+IN_FLIGHT_PER_WORKER = 4
+
+PERCENTILES = (50, 90, 99)
+
+
+# === Lettura dell'ingresso ===
+
+def _state_from_text(text):
+    """54 facelet da una stringa di facelet o da una sequenza di mosse; ValueError per altri valori"""
+    if not isinstance(text, str):
+        raise ValueError(f"lo stato deve essere una stringa, non {type(text).__name__}")
+    text = text.strip()
+    if len(text) == 54 and text.isalpha() and len(set(text)) == 6:
+        return text.encode('ascii')
+    model = RubiksCubeModel()
+    model.apply_algorithm(text)
+    return model.get_state()
+
+
+def read_jsonl(lines):
+    """Coppie (id, stato) dalle righe JSONL; lo stato è un'eccezione se la riga non è valida"""
+    for number, line in enumerate(lines):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line.strip():
+            continue
+        item_id = number
+        try:
+            item = json.loads(line)
+            if isinstance(item, dict):
+                item_id = item.get('id', number)
+                text = item['state'] if 'state' in item else item['scramble']
+            else:
+                text = item
+            yield item_id, _state_from_text(text)
+        except (ValueError, KeyError, TypeError) as error:
+            yield item_id, ValueError(f"Riga {number + 1} non valida: {error}")
+
+
+def read_binary(stream):
+    """Coppie (numero del record, stato) da record binari di 54 byte"""
+    number = 0
+    while True:
+        record = stream.read(BINARY_RECORD_SIZE)
+        if not record:
+            return
+        if len(record) < BINARY_RECORD_SIZE:
+            yield number, ValueError(f"Record {number} troncato ({len(record)} byte)")
+            return
+        yield number, record
+        number += 1
+
+
+def read_state_file(path):
+    """Coppie (numero del record, stato) da un file di stati, decodificato a blocchi"""
+    from rubiks_cube_codec import StateFile
+    number = 0
+    for block in StateFile(path).chunks():
+        for row in block:
+            yield number, row.tobytes()
+            number += 1
+
+
+# === Lato processo di lavoro ===
+
+_worker_solver = None
+
+
+def _init_worker(solver, metric, tables_dir):
+    """Inizializzazione di un processo: apre con mmap le tabelle già presenti su disco"""
+    global _worker_solver
+    _worker_solver = _make_solver(solver, metric, TableStore(tables_dir))
+
+
+def _make_solver(solver, metric, store):
+    """Crea il risolutore richiesto sulle tabelle dell'archivio (generandole se mancano)"""
+    if solver == 'twophase':
+        from rubiks_cube_solver import TwoPhaseSolver, TwoPhaseTables
+        return TwoPhaseSolver(TwoPhaseTables.load(store))
+    if solver == 'optimal':
+        from rubiks_cube_optimal import OptimalSolver, OptimalTables
+        return OptimalSolver(tables=OptimalTables.load(metric, store))
+    raise ValueError(f"Risolutore non supportato: {solver}")
+
+
+def _solve_item(state, max_length, timeout):
+    """Risolve uno stato nel processo di lavoro; restituisce (soluzione o None, errore o None, secondi)"""
+    start = time.perf_counter()
+    try:
+        if max_length is None:
+            solution = _worker_solver.solve(state, timeout=timeout)
+        else:
+            solution = _worker_solver.solve(state, max_length=max_length, timeout=timeout)
+        return solution, None, time.perf_counter() - start
+    except TimeoutError:
+        return None, 'timeout', time.perf_counter() - start
+    except ValueError as error:
+        return None, str(error), time.perf_counter() - start
+    except Exception as error:
+        # Un errore imprevisto su un record (es. binario malformato) non deve fermare la pipeline
+        return None, f"{type(error).__name__}: {error}", time.perf_counter() - start
+
+
+# === Statistiche ===
+
+class PipelineStats:
+    def __init__(self):
+        """Contatori e latenze di una esecuzione della pipeline"""
+        self.solved = 0
+        self.failed = 0
+        self.latencies = []        # Dall'invio al processo fino al risultato
+        self.solve_times = []      # Tempo di risoluzione misurato nel processo
+        self.start = time.perf_counter()
+        self.elapsed = 0.0
+
+    def record(self, result):
+        if result['error'] is None:
+            self.solved += 1
+        else:
+            self.failed += 1
+        if 'latency' in result:
+            self.latencies.append(result['latency'])
+            self.solve_times.append(result['time'])
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.start
+
+    @property
+    def cubes_per_second(self):
+        total = self.solved + self.failed
+        return total / self.elapsed if self.elapsed else 0.0
+
+    @staticmethod
+    def percentile(values, percent):
+        """Percentile con il metodo del rango più vicino"""
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        rank = max(1, -(-percent * len(ordered) // 100))
+        return ordered[int(rank) - 1]
+
+    def report(self):
+        lines = [f"Cubi: {self.solved} risolti, {self.failed} non risolti in {self.elapsed:.2f} s "
+                 f"({self.cubes_per_second:.1f} cubi/s)"]
+        for name, values in (("Latenza", self.latencies), ("Risoluzione", self.solve_times)):
+            if values:
+                parts = [f"p{percent} {self.percentile(values, percent) * 1000:.1f} ms" for percent in PERCENTILES]
+                lines.append(f"{name}: " + ", ".join(parts) + f", max {max(values) * 1000:.1f} ms")
+        return "\n".join(lines)
+
+
+# === Pipeline ===
+
+def solve_stream(items, solver='twophase', metric='htm', workers=None, max_in_flight=None,
+                 timeout=10.0, max_length=None, tables_dir=None, stats=None):
+    """Risolve un flusso di coppie (id, stato) e produce i risultati nell'ordine d'ingresso.
+
+    Ogni risultato è un dizionario con index, id, solution (lista di mosse o
+    None), length, error, time (secondi nel processo) e latency (secondi
+    dall'invio). Al più max_in_flight stati sono in lavorazione: la lettura
+    dell'ingresso avanza solo quando il risultato più vecchio è stato prodotto.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * IN_FLIGHT_PER_WORKER
+    stats = stats if stats is not None else PipelineStats()
+    # Le tabelle mancanti sono generate qui una sola volta, prima di avviare i processi
+    _make_solver(solver, metric, TableStore(tables_dir))
+
+    pending = deque()
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(solver, metric, tables_dir)) as executor:
+        def collect():
+            index, item_id, submitted, future = pending.popleft()
+            solution, error, elapsed = future.result()
+            result = {'index': index, 'id': item_id, 'solution': solution,
+                      'length': len(solution) if solution is not None else None,
+                      'error': error, 'time': elapsed, 'latency': time.perf_counter() - submitted}
+            stats.record(result)
+            return result
+
+        for index, (item_id, state) in enumerate(items):
+            if isinstance(state, Exception):
+                # Errore di lettura: va in uscita dopo i risultati che lo precedono
+                while pending:
+                    yield collect()
+                result = {'index': index, 'id': item_id, 'solution': None, 'length': None, 'error': str(state)}
+                stats.record(result)
+                yield result
+                continue
+            if len(pending) >= max_in_flight:
+                yield collect()
+            pending.append((index, item_id, time.perf_counter(),
+                            executor.submit(_solve_item, state, max_length, timeout)))
+        while pending:
+            yield collect()
+    stats.finish()
+
+
+def _format_result(result):
+    """Riga JSONL di un risultato"""
+    output = {'index': result['index'], 'id': result['id']}
+    if result['error'] is None:
+        output['solution'] = ' '.join(result['solution'])
+        output['length'] = result['length']
+    else:
+        output['error'] = result['error']
+    if 'time' in result:
+        output['time'] = round(result['time'], 6)
+    return json.dumps(output, ensure_ascii=False)
+
+
+def main(argv=None):
+    """Punto d'ingresso da riga di comando"""
+    parser = argparse.ArgumentParser(description="Risoluzione in blocco di stati del Cubo di Rubik")
+    parser.add_argument('input', help="File d'ingresso ('-' per lo standard input)")
+    parser.add_argument('--output', default='-', help="File JSONL dei risultati ('-' per lo standard output)")
+    parser.add_argument('--format', choices=('jsonl', 'binary', 'states'),
+                        help="Formato d'ingresso (predefinito: binary per i file .bin, states per i file .rcs, "
+                             "altrimenti jsonl)")
+    parser.add_argument('--solver', choices=('twophase', 'optimal'), default='twophase')
+    parser.add_argument('--metric', choices=('htm', 'qtm'), default='htm', help="Metrica del risolutore ottimo")
+    parser.add_argument('--workers', type=int, help="Processi di lavoro (predefinito: uno per processore)")
+    parser.add_argument('--max-in-flight', type=int, help="Stati in lavorazione al massimo")
+    parser.add_argument('--timeout', type=float, default=10.0, help="Tempo massimo per stato in secondi")
+    parser.add_argument('--max-length', type=int, help="Lunghezza massima delle soluzioni")
+    parser.add_argument('--tables-dir', help="Cartella delle tabelle")
+    args = parser.parse_args(argv)
+
+    file_format = args.format or {'.bin': 'binary', '.rcs': 'states'}.get(os.path.splitext(args.input)[1], 'jsonl')
+    if file_format == 'states' and args.input == '-':
+        parser.error("un file di stati non può essere letto dallo standard input")
+    # Un file di stati si apre da solo con mmap: il flusso serve solo agli altri formati
+    if file_format == 'states':
+        source = None
+    elif args.input == '-':
+        source = sys.stdin.buffer
+    else:
+        source = open(args.input, 'rb')
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    stats = PipelineStats()
+    try:
+        if file_format == 'states':
+            items = read_state_file(args.input)
+        else:
+            items = read_binary(source) if file_format == 'binary' else read_jsonl(source)
+        for result in solve_stream(items, args.solver, args.metric, args.workers, args.max_in_flight,
+                                   args.timeout, args.max_length, args.tables_dir, stats):
+            output.write(_format_result(result) + '\n')
+    finally:
+        if source is not None and source is not sys.stdin.buffer:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    print(stats.report(), file=sys.stderr)
+    return 0 if stats.failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Backend di Disegno del Cubo 3D
+RubiksCube3D non importa VPython direttamente: usa un backend scelto alla
+costruzione, che fornisce vettori, box, oggetti composti, canvas e luci.
+
+- 'vpython': il disegno vero; VPython (che avvia un server web e apre il
+  browser) è importato solo quando questo backend viene creato.
+- 'headless': nessuna finestra, nessuna dipendenza. Gli oggetti sono semplici
+  contenitori di attributi con vettori veri, quindi la geometria del renderer
+  resta verificabile; il backend conta oggetti creati, eliminati e
+  aggiornamenti e, con record=True, registra ogni operazione in events. Serve per server, batch,
+  controlli automatici e benchmark.
+"""
+
+import math
+
+
+class Vector:
+    __slots__ = ('x', 'y', 'z')
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        """Vettore a tre componenti con le operazioni di vpython.vector usate dal renderer"""
+        self.x, self.y, self.z = float(x), float(y), float(z)
+
+    def __add__(self, other):
+        return Vector(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other):
+        return Vector(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __mul__(self, factor):
+        return Vector(self.x * factor, self.y * factor, self.z * factor)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, factor):
+        return Vector(self.x / factor, self.y / factor, self.z / factor)
+
+    def __neg__(self):
+        return Vector(-self.x, -self.y, -self.z)
+
+    def __eq__(self, other):
+        return isinstance(other, Vector) and (self.x, self.y, self.z) == (other.x, other.y, other.z)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"<{self.x:.6g}, {self.y:.6g}, {self.z:.6g}>"
+
+    def dot(self, other):
+        return self.x * other.x + self.y * other.y + self.z * other.z
+
+    def cross(self, other):
+        return Vector(self.y * other.z - self.z * other.y,
+                      self.z * other.x - self.x * other.z,
+                      self.x * other.y - self.y * other.x)
+
+    def mag(self):
+        return math.sqrt(self.dot(self))
+
+    def norm(self):
+        length = self.mag()
+        return self / length if length else Vector()
+
+    def rotate(self, angle=0.0, axis=None):
+        """Rotazione di Rodrigues attorno a un asse passante per l'origine"""
+        axis = (axis or Vector(0, 0, 1)).norm()
+        cosine, sine = math.cos(angle), math.sin(angle)
+        return self * cosine + axis.cross(self) * sine + axis * (axis.dot(self) * (1 - cosine))
+
+
+class SceneObject:
+    def __init__(self, renderer, kind, pos=None, axis=None, up=None, size=None, color=None, visible=True,
+                 **attributes):
+        """Oggetto di scena senza finestra: la creazione non conta come aggiornamento"""
+        self.__dict__.update(
+            _renderer=renderer,
+            kind=kind,
+            pos=pos if pos is not None else Vector(),
+            axis=axis if axis is not None else Vector(1, 0, 0),
+            up=up if up is not None else Vector(0, 1, 0),
+            size=size if size is not None else Vector(1, 1, 1),
+            color=color if color is not None else Vector(1, 1, 1),
+            visible=visible,
+            **attributes
+        )
+        renderer._created(self)
+
+    def __setattr__(self, name, value):
+        self.__dict__[name] = value
+        self._renderer._updated(self, name, value)
+
+    def rotate(self, angle=0.0, axis=None, origin=None):
+        """Una sola rotazione (un aggiornamento) che cambia posizione, asse e verticale"""
+        state = self.__dict__
+        origin = origin if origin is not None else state['pos']
+        state['pos'] = origin + (state['pos'] - origin).rotate(angle, axis)
+        state['axis'] = state['axis'].rotate(angle, axis)
+        state['up'] = state['up'].rotate(angle, axis)
+        self._renderer._updated(self, 'rotate', angle)
+
+    def delete(self):
+        """Toglie l'oggetto dalla scena, come delete() di VPython"""
+        if self.__dict__.get('deleted'):
+            return
+        self.__dict__.update(visible=False, deleted=True)
+        self._renderer._deleted(self)
+
+
+class _Camera:
+    def __init__(self):
+        self.pos = Vector(0, 0, 2)
+        self.axis = Vector(0, 0, -2)
+
+
+class HeadlessRenderer:
+    name = 'headless'
+
+    def __init__(self, record=False):
+        """Backend senza finestra; con record=True ogni operazione finisce in events"""
+        self.record = record
+        self.events = []            # (operazione, oggetto, attributo, valore)
+        self.objects_created = 0
+        self.objects_deleted = 0
+        self.updates = 0            # In VPython ogni aggiornamento è un messaggio al browser
+
+    @property
+    def live_objects(self):
+        """Oggetti creati e non ancora eliminati: quelli che la scena deve ancora tenere"""
+        return self.objects_created - self.objects_deleted
+
+    def _created(self, obj):
+        self.objects_created += 1
+        if self.record:
+            self.events.append(('create', obj, obj.kind, None))
+
+    def _deleted(self, obj):
+        self.objects_deleted += 1
+        if self.record:
+            self.events.append(('delete', obj, obj.kind, None))
+
+    def _updated(self, obj, name, value):
+        self.updates += 1
+        if self.record:
+            self.events.append(('update', obj, name, value))
+
+    def vector(self, x=0.0, y=0.0, z=0.0):
+        return Vector(x, y, z)
+
+    def gray(self, level):
+        return Vector(level, level, level)
+
+    def box(self, **attributes):
+        return SceneObject(self, 'box', **attributes)
+
+    def compound(self, objects, **attributes):
+        """Come in VPython: un oggetto nuovo, gli originali diventano invisibili e non si muovono con esso"""
+        for item in objects:
+            item.__dict__['visible'] = False
+        return SceneObject(self, 'compound', **attributes)
+
+    def canvas(self, **attributes):
+        scene = SceneObject(self, 'canvas', **attributes)
+        scene.__dict__['camera'] = _Camera()
+        return scene
+
+    def distant_light(self, **attributes):
+        return SceneObject(self, 'distant_light', **attributes)
+
+    def rate(self, frequency):
+        """Nessuna attesa: il ritmo dei frame non conta senza finestra"""
+
+
+class VPythonRenderer:
+    name = 'vpython'
+
+    def __init__(self):
+        """Backend VPython: l'import (e quindi il server del browser) avviene solo qui"""
+        import vpython
+        self.vector = vpython.vector
+        self.gray = vpython.color.gray
+        self.box = vpython.box
+        self.compound = vpython.compound
+        self.canvas = vpython.canvas
+        self.distant_light = vpython.distant_light
+        self.rate = vpython.rate
+
+
+RENDERERS = {
+    'vpython': VPythonRenderer,
+    'headless': HeadlessRenderer
+}
+
+DEFAULT_RENDERER = 'vpython'
+
+
+def create_renderer(renderer=None):
+    """Restituisce un backend dato il nome ('vpython', 'headless'), oppure il backend stesso se già creato"""
+    if renderer is None:
+        renderer = DEFAULT_RENDERER
+    if not isinstance(renderer, str):
+        return renderer
+    if renderer not in RENDERERS:
+        raise ValueError(f"Backend di disegno sconosciuto: {renderer} (disponibili: {', '.join(RENDERERS)})")
+    return RENDERERS[renderer]()
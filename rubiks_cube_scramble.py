@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Generatore di Stati Casuali del Cubo di Rubik
+Estrae stati uniformi sull'intero gruppo del cubo (non brevi passeggiate
+casuali): permutazioni e orientamenti di angoli e spigoli sono estratti a
+caso, l'ultimo orientamento chiude le somme e, se le parità di angoli e
+spigoli discordano, si scambiano gli ultimi due spigoli. Lo scambio è una
+biiezione fra permutazioni pari e dispari, quindi la distribuzione resta
+uniforme sugli stati legali.
+
+Uso da riga di comando:
+    python rubiks_cube_scramble.py generate QUANTI --out FILE [--format text|binary|cubie] [--seed SEME]
+    python rubiks_cube_scramble.py check [--count QUANTI] [--seed SEME]
+"""
+
+import argparse
+import random
+import sys
+from math import erfc, factorial, sqrt
+
+import numpy as np
+
+from rubiks_cube_arrays import parity_rows
+from rubiks_cube_cubie import (
+    CubieCube, CORNER_FACELETS, EDGE_FACELETS, CORNER_FACES, EDGE_FACES, N_CORNERS, N_EDGES, N_TWIST, N_FLIP
+)
+from rubiks_cube_moves import FACE_NAMES, SOLVED_FACE_COLORS, SOLVED_STATE
+
+# Numero di stati legali del cubo
+CUBE_GROUP_ORDER = factorial(8) * 3 ** 7 * factorial(12) * 2 ** 11 // 2
+
+# Stati generati per blocco nelle funzioni vettoriali
+SCRAMBLE_CHUNK = 65536
+
+# Soglia dei test statistici: sotto questo p-value la distribuzione è considerata non uniforme
+DEFAULT_ALPHA = 1e-3
+
+_COLORS = {name: ord(SOLVED_FACE_COLORS[name]) for name in FACE_NAMES}
+_CORNER_COLORS = np.array([[_COLORS[face] for face in faces] for faces in CORNER_FACES], dtype=np.uint8)
+_EDGE_COLORS = np.array([[_COLORS[face] for face in faces] for faces in EDGE_FACES], dtype=np.uint8)
+_CORNER_FACELETS = np.array(CORNER_FACELETS)
+_EDGE_FACELETS = np.array(EDGE_FACELETS)
+_SOLVED_ROW = np.frombuffer(SOLVED_STATE, dtype=np.uint8)
+
+
+# === Stati singoli ===
+
+def random_cubie(rng=None):
+    """CubieCube uniforme sugli stati legali; rng è un random.Random (predefinito: il modulo random)"""
+    rng = rng if rng is not None else random
+    cube = CubieCube()
+    cube.set_corners(rng.randrange(N_CORNERS))
+    cube.set_twist(rng.randrange(N_TWIST))
+    cube.set_edges(rng.randrange(N_EDGES))
+    cube.set_flip(rng.randrange(N_FLIP))
+    if cube.corner_parity() != cube.edge_parity():
+        cube.ep[10], cube.ep[11] = cube.ep[11], cube.ep[10]
+    return cube
+
+
+def random_state(rng=None):
+    """54 facelet (bytes) di uno stato uniforme, pronte per RubiksCubeModel.set_state"""
+    return random_cubie(rng).to_facelets()
+
+
+# === Generazione vettoriale ===
+
+def random_cubie_arrays(count, generator=None):
+    """Permutazioni e orientamenti (cp, co, ep, eo) di count stati uniformi, come matrici NumPy.
+
+    generator è un numpy.random.Generator (o un seme per crearlo).
+    """
+    generator = np.random.default_rng(generator)
+    cp = generator.permuted(np.tile(np.arange(8, dtype=np.int8), (count, 1)), axis=1)
+    ep = generator.permuted(np.tile(np.arange(12, dtype=np.int8), (count, 1)), axis=1)
+    mismatch = parity_rows(cp) != parity_rows(ep)
+    ep[mismatch, 10], ep[mismatch, 11] = ep[mismatch, 11], ep[mismatch, 10]
+    co = generator.integers(0, 3, size=(count, 8), dtype=np.int8)
+    co[:, 7] = -co[:, :7].sum(axis=1) % 3
+    eo = generator.integers(0, 2, size=(count, 12), dtype=np.int8)
+    eo[:, 11] = eo[:, :11].sum(axis=1) % 2
+    return cp, co, ep, eo
+
+
+def arrays_to_facelets(cp, co, ep, eo):
+    """Converte le matrici di cubetti nella matrice (N, 54) di facelet usata da BatchCube"""
+    states = np.tile(_SOLVED_ROW, (cp.shape[0], 1))
+    for position, facelets in enumerate(_CORNER_FACELETS):
+        for slot, facelet in enumerate(facelets):
+            # Come in CubieCube.to_facelets: la facelet slot mostra il colore (slot - torsione) % 3
+            states[:, facelet] = _CORNER_COLORS[cp[:, position], (slot - co[:, position]) % 3]
+    for position, facelets in enumerate(_EDGE_FACELETS):
+        for slot, facelet in enumerate(facelets):
+            states[:, facelet] = _EDGE_COLORS[ep[:, position], (slot - eo[:, position]) % 2]
+    return states
+
+
+def random_facelet_array(count, generator=None):
+    """Matrice (count, 54) di facelet di stati uniformi"""
+    generator = np.random.default_rng(generator)
+    blocks = [arrays_to_facelets(*random_cubie_arrays(min(SCRAMBLE_CHUNK, count - start), generator))
+              for start in range(0, count, SCRAMBLE_CHUNK)]
+    return np.concatenate(blocks) if blocks else np.empty((0, 54), dtype=np.uint8)
+
+
+def random_batch(count, generator=None):
+    """BatchCube di count stati uniformi"""
+    from rubiks_cube_batch import BatchCube
+    return BatchCube(states=random_facelet_array(count, generator))
+
+
+def scrambles(count=None, seed=None):
+    """Generatore di stati uniformi (54 facelet in bytes), infinito se count è None.
+
+    Gli stati sono prodotti a blocchi vettoriali e restituiti uno alla volta.
+    """
+    generator = np.random.default_rng(seed)
+    produced = 0
+    while count is None or produced < count:
+        size = SCRAMBLE_CHUNK if count is None else min(SCRAMBLE_CHUNK, count - produced)
+        block = arrays_to_facelets(*random_cubie_arrays(size, generator))
+        produced += size
+        yield from (row.tobytes() for row in block)
+
+
+def write_scrambles(path, count, seed=None, file_format='text'):
+    """Scrive count stati uniformi su file.
+
+    'text' scrive una riga di 54 lettere per stato; 'binary' scrive record
+    consecutivi di 54 byte, leggibili con numpy.fromfile(path, numpy.uint8).reshape(-1, 54);
+    'cubie' scrive un file di stati da 9 byte per stato (vedi rubiks_cube_codec.py).
+    """
+    if file_format not in ('text', 'binary', 'cubie'):
+        raise ValueError(f"Formato non supportato: {file_format}")
+    generator = np.random.default_rng(seed)
+    if file_format == 'cubie':
+        from rubiks_cube_codec import StateFileWriter
+        with StateFileWriter(path, 'cubie') as writer:
+            for start in range(0, count, SCRAMBLE_CHUNK):
+                writer.write_cubies(*random_cubie_arrays(min(SCRAMBLE_CHUNK, count - start), generator))
+        return
+    with open(path, 'wb') as file:
+        _write_facelet_blocks(file, count, generator, file_format)
+
+
+def _write_facelet_blocks(file, count, generator, file_format):
+    """Scrive su un file binario aperto count stati nei formati 'text' o 'binary'"""
+    newline = np.uint8(ord('\n'))
+    for start in range(0, count, SCRAMBLE_CHUNK):
+        block = arrays_to_facelets(*random_cubie_arrays(min(SCRAMBLE_CHUNK, count - start), generator))
+        if file_format == 'text':
+            block = np.hstack((block, np.full((block.shape[0], 1), newline)))
+        file.write(block.tobytes())
+
+
+# === Verifica statistica ===
+
+def _chi_square_p_value(statistic, dof):
+    """p-value del chi quadro (approssimazione di Wilson-Hilferty)"""
+    if dof <= 0:
+        return 1.0
+    z = ((statistic / dof) ** (1 / 3) - (1 - 2 / (9 * dof))) / sqrt(2 / (9 * dof))
+    return 0.5 * erfc(z / sqrt(2))
+
+
+def _chi_square(observed, expected):
+    """Statistica e gradi di libertà, unendo le classi finali con meno di 5 osservazioni attese"""
+    observed, expected = list(observed), list(expected)
+    while len(expected) > 1 and expected[-1] < 5:
+        last_expected, last_observed = expected.pop(), observed.pop()
+        expected[-1] += last_expected
+        observed[-1] += last_observed
+    statistic = sum((o - e) ** 2 / e for o, e in zip(observed, expected) if e > 0)
+    return float(statistic), len(expected) - 1
+
+
+def _stirling_first_kind(n):
+    """Numero di permutazioni di n elementi con k cicli, per k = 0..n"""
+    row = [1]
+    for m in range(n):
+        row = [(row[k - 1] if k else 0) + (m * row[k] if k < len(row) else 0) for k in range(m + 2)]
+    return row
+
+
+def _cycle_counts(permutations):
+    """Numero di cicli di ogni riga di una matrice di permutazioni"""
+    count, size = permutations.shape
+    visited = np.zeros((count, size), dtype=bool)
+    cycles = np.zeros(count, dtype=np.int64)
+    rows = np.arange(count)
+    for start in range(size):
+        new = ~visited[:, start]
+        cycles += new
+        position = np.full(count, start)
+        # Percorre il ciclo che parte da start (solo nelle righe in cui è nuovo)
+        for _ in range(size):
+            visited[rows[new], position[new]] = True
+            position = permutations[rows, position].astype(np.int64)
+    return cycles
+
+
+def _cycle_test(permutations):
+    size = permutations.shape[1]
+    observed = np.bincount(_cycle_counts(permutations), minlength=size + 1)
+    stirling = _stirling_first_kind(size)
+    total = permutations.shape[0]
+    expected = [total * stirling[k] / factorial(size) for k in range(1, size + 1)]
+    return _chi_square(observed[1:], expected)
+
+
+def _placement_test(permutations, orientations, modulus):
+    """Posizione e orientamento di ogni cubetto, uniformi su posizioni * orientamenti celle.
+
+    Un test per cubetto; il p-value è corretto con Bonferroni sul numero di cubetti.
+    """
+    count, size = permutations.shape
+    cells = size * modulus
+    worst = (0.0, cells - 1, 1.0)
+    for piece in range(size):
+        position = np.argmax(permutations == piece, axis=1)
+        orientation = orientations[np.arange(count), position]
+        observed = np.bincount(position * modulus + orientation, minlength=cells)
+        statistic, dof = _chi_square(observed, [count / cells] * cells)
+        p_value = _chi_square_p_value(statistic, dof)
+        if p_value < worst[2]:
+            worst = (statistic, dof, p_value)
+    statistic, dof, p_value = worst
+    return statistic, dof, min(1.0, p_value * size)
+
+
+def _facelet_color_test(states):
+    """Ogni facelet non centrale mostra ognuno dei 6 colori con probabilità 1/6 (Bonferroni su 48 facelet)"""
+    count = states.shape[0]
+    colors = np.frombuffer(bytes(_COLORS.values()), dtype=np.uint8)
+    worst = (0.0, 5, 1.0)
+    facelets = [index for index in range(54) if index % 9 != 4]
+    for facelet in facelets:
+        observed = [(states[:, facelet] == color).sum() for color in colors]
+        statistic, dof = _chi_square(observed, [count / 6] * 6)
+        p_value = _chi_square_p_value(statistic, dof)
+        if p_value < worst[2]:
+            worst = (statistic, dof, p_value)
+    statistic, dof, p_value = worst
+    return statistic, dof, min(1.0, p_value * len(facelets))
+
+
+def uniformity_report(cp, co, ep, eo, states=None):
+    """Test del chi quadro sugli stati generati, confrontati con i conteggi attesi per il gruppo del cubo.
+
+    Restituisce una lista di (nome, statistica, gradi di libertà, p-value):
+    numero di cicli delle permutazioni (numeri di Stirling di prima specie),
+    parità, coordinate di orientamento, posizione e orientamento di ogni
+    cubetto e, se ci sono le facelet, colore di ogni facelet.
+    """
+    count = cp.shape[0]
+    report = []
+    for name, permutations in (('cicli angoli', cp), ('cicli spigoli', ep)):
+        statistic, dof = _cycle_test(permutations)
+        report.append((name, statistic, dof, _chi_square_p_value(statistic, dof)))
+
+    statistic, dof = _chi_square(np.bincount(parity_rows(cp), minlength=2), [count / 2] * 2)
+    report.append(('parità', statistic, dof, _chi_square_p_value(statistic, dof)))
+
+    twist = (co[:, :7].astype(np.int64) * 3 ** np.arange(6, -1, -1)).sum(axis=1)
+    flip = (eo[:, :11].astype(np.int64) << np.arange(10, -1, -1)).sum(axis=1)
+    for name, values, size in (('torsione', twist, N_TWIST), ('inversione', flip, N_FLIP)):
+        statistic, dof = _chi_square(np.bincount(values, minlength=size), [count / size] * size)
+        report.append((name, statistic, dof, _chi_square_p_value(statistic, dof)))
+
+    report.append(('posizioni angoli', *_placement_test(cp, co, 3)))
+    report.append(('posizioni spigoli', *_placement_test(ep, eo, 2)))
+    if states is not None:
+        report.append(('colori facelet', *_facelet_color_test(states)))
+    return report
+
+
+def check_uniformity(count=200000, seed=None, alpha=DEFAULT_ALPHA, verbose=True):
+    """Genera count stati e ne verifica l'uniformità; True se tutti i test superano la soglia alpha"""
+    arrays = random_cubie_arrays(count, seed)
+    report = uniformity_report(*arrays, states=arrays_to_facelets(*arrays))
+    passed = all(p_value >= alpha for _, _, _, p_value in report)
+    if verbose:
+        for name, statistic, dof, p_value in report:
+            outcome = "OK" if p_value >= alpha else "NON UNIFORME"
+            print(f"{name:18} chi2 = {statistic:12.2f}  gdl = {dof:5}  p = {p_value:.4f}  {outcome}")
+    return passed
+
+
+def main(argv=None):
+    """Punto d'ingresso da riga di comando: genera stati su file o ne verifica l'uniformità"""
+    parser = argparse.ArgumentParser(description="Stati casuali uniformi del Cubo di Rubik")
+    commands = parser.add_subparsers(dest='command', required=True)
+    generate = commands.add_parser('generate', help="Scrive stati casuali su file")
+    generate.add_argument('count', type=int)
+    generate.add_argument('--out', required=True, help="File di destinazione ('-' per lo standard output)")
+    generate.add_argument('--format', choices=('text', 'binary', 'cubie'), default='text')
+    generate.add_argument('--seed', type=int)
+    check = commands.add_parser('check', help="Verifica statistica dell'uniformità")
+    check.add_argument('--count', type=int, default=200000)
+    check.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    if args.command == 'generate':
+        if args.out == '-':
+            # Un file di stati aggiorna l'intestazione alla chiusura: serve un file vero
+            if args.format == 'cubie':
+                generate.error("il formato cubie richiede un file (--out FILE), non lo standard output")
+            sys.stdout.flush()
+            _write_facelet_blocks(sys.stdout.buffer, args.count, np.random.default_rng(args.seed), args.format)
+            sys.stdout.buffer.flush()
+        else:
+            write_scrambles(args.out, args.count, args.seed, args.format)
+        return 0
+    return 0 if check_uniformity(args.count, args.seed) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
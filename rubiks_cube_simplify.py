@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Semplificazione in Flusso delle Sequenze di Mosse
+Le mosse consecutive sullo stesso asse commutano fra loro: un gruppo di
+mosse parallele si riduce ai quarti di giro netti di ciascuno dei tre
+strati, e da questi si ricava la sequenza più corta equivalente in ordine
+canonico (U prima di D, ecc.). Così "U U'" sparisce, "U U U" diventa "U'"
+e "U D U'" diventa "D". Se un gruppo si annulla, il gruppo precedente
+torna aperto e può fondersi con le mosse successive ("R U U' R'" sparisce).
+
+Il semplificatore lavora a flusso: riceve una mossa alla volta e restituisce
+le mosse ormai definitive, trattenendo al più window gruppi ancora
+modificabili. Il risultato è sempre equivalente alla sequenza d'ingresso,
+compresi gli spostamenti dei centri.
+
+Uso da riga di comando:
+    python rubiks_cube_simplify.py "R U U' R' D"
+"""
+
+import argparse
+import sys
+from itertools import combinations, product
+
+from rubiks_cube_moves import BASE_MOVES, MOVE_PERMUTATIONS, MOVE_SUFFIXES, move_geometry, parse_algorithm
+
+# Gruppi ancora modificabili trattenuti dal semplificatore
+DEFAULT_WINDOW = 8
+
+_LAYERS = (-1, 0, 1)
+
+
+def _move_kind(name):
+    """Preferenza fra mosse equivalenti: facce esterne, strati centrali, mosse larghe, rotazioni"""
+    layers = BASE_MOVES[name][1]
+    if len(layers) == 3:
+        return 3
+    if len(layers) == 2:
+        return 2
+    return 1 if layers == (0,) else 0
+
+
+def _build_reductions():
+    """Per ogni asse e ogni vettore di quarti di giro netti (strati -1, 0, 1): la sequenza canonica più corta"""
+    reductions = {}
+    for axis in 'xyz':
+        bases = [name for name, (move_axis, _, _) in BASE_MOVES.items() if move_axis == axis]
+        best = {(0, 0, 0): ((0, 0), ())}
+        for count in range(1, 4):
+            for chosen in combinations(bases, count):
+                for suffixes in product(MOVE_SUFFIXES, repeat=count):
+                    moves = tuple(name + suffix for name, suffix in zip(chosen, suffixes))
+                    vector = [0, 0, 0]
+                    for move in moves:
+                        _, layers, quarter_turns = move_geometry(move)
+                        for layer in layers:
+                            vector[layer + 1] = (vector[layer + 1] + quarter_turns) % 4
+                    cost = (count, sum(_move_kind(name) for name in chosen))
+                    if tuple(vector) not in best or cost < best[tuple(vector)][0]:
+                        best[tuple(vector)] = (cost, moves)
+        reductions[axis] = {vector: moves for vector, (_, moves) in best.items()}
+    return reductions
+
+
+# _REDUCTIONS[asse][(q-1, q0, q1)]: mosse canoniche che girano ogni strato di q quarti (mod 4)
+_REDUCTIONS = _build_reductions()
+
+# Contributo di ogni mossa al vettore del suo asse
+_MOVE_VECTORS = {}
+for _move in MOVE_PERMUTATIONS:
+    _axis, _layers, _quarter_turns = move_geometry(_move)
+    _MOVE_VECTORS[_move] = (_axis, tuple(_quarter_turns % 4 if layer in _layers else 0 for layer in _LAYERS))
+
+
+class MoveSimplifier:
+    def __init__(self, window=DEFAULT_WINDOW):
+        """Semplificatore a flusso; moves_in, moves_out e removed contano le mosse elaborate"""
+        self.window = max(1, window)
+        self.moves_in = 0
+        self.moves_out = 0
+        self._groups = []   # Coppie [asse, vettore] non ancora emesse, dalla più vecchia
+
+    @property
+    def removed(self):
+        """Mosse eliminate finora (quelle ancora trattenute non sono contate)"""
+        return self.moves_in - self.moves_out - self.pending
+
+    @property
+    def pending(self):
+        """Mosse che i gruppi trattenuti produrrebbero se il flusso finisse ora"""
+        return sum(len(_REDUCTIONS[axis][vector]) for axis, vector in self._groups)
+
+    def push(self, move):
+        """Aggiunge una mossa (nome canonico o notazione) e restituisce la lista delle mosse definitive"""
+        if move in _MOVE_VECTORS:
+            moves = (move,)
+        else:
+            moves = parse_algorithm(move)
+        for name in moves:
+            self.moves_in += 1
+            axis, vector = _MOVE_VECTORS[name]
+            if self._groups and self._groups[-1][0] == axis:
+                group = self._groups[-1]
+                group[1] = tuple((a + b) % 4 for a, b in zip(group[1], vector))
+                if group[1] == (0, 0, 0):
+                    # Gruppo annullato: il precedente torna a ricevere mosse
+                    self._groups.pop()
+            else:
+                self._groups.append([axis, vector])
+        ready = []
+        while len(self._groups) > self.window:
+            ready.extend(self._emit(self._groups.pop(0)))
+        return ready
+
+    def flush(self):
+        """Restituisce tutte le mosse trattenute (fine del flusso o pausa dell'ingresso)"""
+        ready = []
+        for group in self._groups:
+            ready.extend(self._emit(group))
+        self._groups = []
+        return ready
+
+    def _emit(self, group):
+        moves = _REDUCTIONS[group[0]][group[1]]
+        self.moves_out += len(moves)
+        return list(moves)
+
+
+def simplify_moves(moves, window=DEFAULT_WINDOW, simplifier=None):
+    """Generatore delle mosse semplificate di un flusso di mosse.
+
+    moves può essere una stringa in notazione standard o un iterabile di mosse.
+    Per conoscere il numero di mosse eliminate si passa un MoveSimplifier e se
+    ne legge removed alla fine del flusso.
+    """
+    if isinstance(moves, str):
+        moves = parse_algorithm(moves)
+    simplifier = simplifier if simplifier is not None else MoveSimplifier(window)
+    for move in moves:
+        yield from simplifier.push(move)
+    yield from simplifier.flush()
+
+
+def simplify_algorithm(moves):
+    """Semplifica un intero algoritmo: restituisce (tupla di mosse, mosse eliminate)"""
+    simplifier = MoveSimplifier()
+    result = tuple(simplify_moves(moves, simplifier=simplifier))
+    return result, simplifier.removed
+
+
+def main(argv=None):
+    """Punto d'ingresso da riga di comando"""
+    parser = argparse.ArgumentParser(description="Semplifica una sequenza di mosse del Cubo di Rubik")
+    parser.add_argument('algorithm', help="Sequenza di mosse in notazione standard")
+    args = parser.parse_args(argv)
+    try:
+        moves, removed = simplify_algorithm(args.algorithm)
+    except ValueError as error:
+        print(error)
+        return 1
+    print(' '.join(moves) if moves else "(nessuna mossa)")
+    print(f"Mosse eliminate: {removed}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
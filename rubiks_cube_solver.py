@@ -0,0 +1,600 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Risolutore a Due Fasi del Cubo di Rubik (algoritmo di Kociemba)
+La fase 1 porta il cubo nel sottogruppo G1 = <U, D, R2, L2, F2, B2>, dove
+orientamenti e fascia centrale sono a posto; la fase 2 lo risolve restando in
+G1. Entrambe le fasi sono ricerche IDA* guidate da tabelle delle mosse sulle
+coordinate e da tabelle di potatura con la distanza minima dalla meta.
+"""
+
+import multiprocessing
+import os
+import time
+from itertools import permutations
+from math import comb
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from rubiks_cube_arrays import rank_rows
+from rubiks_cube_cubie import (
+    CubieCube, CUBIE_MOVES, N_TWIST, N_FLIP, N_SLICE, N_SLICE_SORTED, N_CORNERS, N_UD_EDGES, to_cubie
+)
+from rubiks_cube_moves import FACE_MOVES
+from rubiks_cube_tables import UNKNOWN_NIBBLE, TableStore, pack_nibbles, unpack_nibbles, nibble_at
+
+N_MOVES = len(FACE_MOVES)
+
+# Mosse consentite in fase 2 (indici in FACE_MOVES): U, D in ogni verso e mezzi giri di R, F, L, B
+PHASE2_MOVES = tuple(FACE_MOVES.index(move) for move in
+                     ('U', 'U2', "U'", 'R2', 'F2', 'D', 'D2', "D'", 'L2', 'B2'))
+N_PHASE2_MOVES = len(PHASE2_MOVES)
+
+# Profondità massime delle due fasi (diametri noti dei rispettivi problemi)
+MAX_PHASE1_DEPTH = 12
+MAX_PHASE2_DEPTH = 18
+
+# Limite della fase 2 nella prima passata: le ricerche di fase 2 lunghe costano molto
+# e conviene provare un'altra soluzione di fase 1; senza risultati si ripete con MAX_PHASE2_DEPTH
+PHASE2_SEARCH_LIMIT = 11
+
+# Secondi dedicati ad accorciare la soluzione dopo averne trovata una
+DEFAULT_IMPROVE_TIME = 0.25
+
+# Coefficienti binomiali per la codifica vettoriale della fascia centrale
+_BINOMIAL = np.array([[comb(n, k) for k in range(5)] for n in range(12)], dtype=np.int64)
+
+
+# === Tabelle delle mosse sulle coordinate (calcolo vettoriale con NumPy) ===
+
+def _rank_slice_sorted(ep):
+    """Coordinata slice_sorted di ogni riga di una matrice di permutazioni degli spigoli (K, 12)"""
+    is_slice = ep >= 8
+    # Spigoli della fascia centrale nelle posizioni successive a ciascuna posizione
+    found_after = np.cumsum(is_slice[:, ::-1], axis=1)[:, ::-1] - is_slice
+    positions = np.arange(12)
+    binomials = _BINOMIAL[11 - positions, np.minimum(found_after + 1, 4)]
+    combination = (binomials * is_slice).sum(axis=1)
+    slice_edges = ep[is_slice].reshape(-1, 4) - 8
+    return combination * 24 + rank_rows(slice_edges)
+
+
+def _decode_all(setter, count, attribute):
+    """Matrice con il vettore attribute di ogni valore di una coordinata"""
+    rows = []
+    cube = CubieCube()
+    for index in range(count):
+        getattr(cube, setter)(index)
+        rows.append(list(getattr(cube, attribute)))
+    return np.array(rows, dtype=np.int64)
+
+
+def _move_arrays(move_index):
+    """Permutazioni e orientamenti di una mossa di faccia come array NumPy"""
+    move = CUBIE_MOVES[FACE_MOVES[move_index]]
+    return np.array(move.cp), np.array(move.co), np.array(move.ep), np.array(move.eo)
+
+
+def build_twist_move_table():
+    """Tabella (N_TWIST, 18) dell'orientamento degli angoli dopo ogni mossa"""
+    co = _decode_all('set_twist', N_TWIST, 'co')
+    weights = 3 ** np.arange(6, -1, -1)
+    table = np.empty((N_TWIST, N_MOVES), dtype=np.uint16)
+    for m in range(N_MOVES):
+        cp, twist, _, _ = _move_arrays(m)
+        table[:, m] = (((co[:, cp] + twist) % 3)[:, :7] * weights).sum(axis=1)
+    return table
+
+
+def build_flip_move_table():
+    """Tabella (N_FLIP, 18) dell'orientamento degli spigoli dopo ogni mossa"""
+    eo = _decode_all('set_flip', N_FLIP, 'eo')
+    weights = 2 ** np.arange(10, -1, -1)
+    table = np.empty((N_FLIP, N_MOVES), dtype=np.uint16)
+    for m in range(N_MOVES):
+        _, _, ep, flip = _move_arrays(m)
+        table[:, m] = (((eo[:, ep] + flip) % 2)[:, :11] * weights).sum(axis=1)
+    return table
+
+
+def build_slice_sorted_move_table():
+    """Tabella (N_SLICE_SORTED, 18) di posizioni e ordine della fascia centrale dopo ogni mossa"""
+    edges = _decode_all('set_slice_sorted', N_SLICE_SORTED, 'ep')
+    table = np.empty((N_SLICE_SORTED, N_MOVES), dtype=np.uint16)
+    for m in range(N_MOVES):
+        _, _, ep, _ = _move_arrays(m)
+        table[:, m] = _rank_slice_sorted(edges[:, ep])
+    return table
+
+
+def build_corners_move_table():
+    """Tabella (N_CORNERS, 18) della permutazione degli angoli dopo ogni mossa"""
+    # permutations() elenca le permutazioni proprio in ordine di rango lessicografico
+    corners = np.array(list(permutations(range(8))), dtype=np.int64)
+    table = np.empty((N_CORNERS, N_MOVES), dtype=np.uint16)
+    for m in range(N_MOVES):
+        cp, _, _, _ = _move_arrays(m)
+        table[:, m] = rank_rows(corners[:, cp])
+    return table
+
+
+def build_ud_edges_move_table():
+    """Tabella (N_UD_EDGES, 10) della permutazione degli spigoli U/D dopo ogni mossa di fase 2"""
+    edges = np.array(list(permutations(range(8))), dtype=np.int64)
+    table = np.empty((N_UD_EDGES, N_PHASE2_MOVES), dtype=np.uint16)
+    for column, m in enumerate(PHASE2_MOVES):
+        _, _, ep, _ = _move_arrays(m)
+        # In fase 2 gli spigoli U/D restano nelle prime 8 posizioni
+        table[:, column] = rank_rows(edges[:, ep[:8]])
+    return table
+
+
+# === Tabelle di potatura ===
+
+# Voci esaminate per blocco durante le visite: la memoria resta limitata anche sulle tabelle più grandi
+BFS_CHUNK = 1 << 22
+
+# Sotto questa dimensione la visita resta nel processo corrente: avviare i processi costerebbe di più
+PARALLEL_MIN_SIZE = 1 << 24
+
+# Le tabelle parallele sono a 4 bit e 15 indica gli stati non ancora raggiunti
+MAX_PARALLEL_DEPTH = UNKNOWN_NIBBLE - 1
+
+
+def breadth_first_depths(size, neighbours, columns, start=0, workers=None, progress=None):
+    """Distanza minima da start per ogni indice 0..size-1 di uno spazio di coordinate.
+
+    neighbours(indices, column) restituisce gli indici raggiunti con la mossa
+    della colonna indicata. Quando la frontiera supera gli stati ancora ignoti
+    la visita procede all'indietro: l'insieme di mosse è chiuso per inversione,
+    quindi uno stato ignoto è al livello successivo se almeno un suo vicino è
+    nella frontiera. Gli stati sono esaminati a blocchi di BFS_CHUNK.
+
+    Con più di un processo (workers, predefinito: numero di processori) le
+    tabelle grandi sono visitate in parallelo; neighbours deve allora poter
+    essere serializzato con pickle. progress(depth, count, reached) è chiamata
+    alla fine di ogni livello con gli stati trovati a quella profondità e il
+    totale raggiunto.
+    """
+    columns = tuple(columns)
+    workers = workers if workers is not None else os.cpu_count() or 1
+    if workers > 1 and size >= PARALLEL_MIN_SIZE:
+        return _parallel_breadth_first_depths(size, neighbours, columns, start, workers, progress)
+
+    depths = np.full(size, -1, dtype=np.int8)
+    depths[start] = 0
+    depth = 0
+    frontier_size, unknown_size = 1, size - 1
+    if progress is not None:
+        progress(0, 1, 1)
+    while frontier_size:
+        backward = frontier_size > unknown_size
+        for first in range(0, size, BFS_CHUNK):
+            block = depths[first:first + BFS_CHUNK]
+            if backward:
+                indices = np.flatnonzero(block < 0) + first
+                for column in columns:
+                    if not indices.size:
+                        break
+                    found = depths[neighbours(indices, column)] == depth
+                    depths[indices[found]] = depth + 1
+                    indices = indices[~found]
+            else:
+                indices = np.flatnonzero(block == depth) + first
+                for column in columns:
+                    reached = neighbours(indices, column)
+                    depths[reached[depths[reached] < 0]] = depth + 1
+        depth += 1
+        frontier_size = int(np.count_nonzero(depths == depth))
+        unknown_size -= frontier_size
+        if progress is not None and frontier_size:
+            progress(depth, frontier_size, size - unknown_size)
+    return depths
+
+
+# === Visita parallela su memoria condivisa ===
+#
+# La tabella in costruzione è un unico buffer multiprocessing.shared_memory
+# impacchettato a 4 bit, visibile a tutti i processi senza copie. Ogni compito
+# riguarda un intervallo di BFS_CHUNK voci (numero pari: nessun byte è diviso
+# fra due intervalli) e scrive solo nel proprio intervallo:
+# - all'indietro, il processo cerca fra i propri stati ignoti quelli con un
+#   vicino nella frontiera;
+# - in avanti, i vicini della frontiera sono segnati in un secondo buffer
+#   condiviso di un byte per stato (scritture concorrenti innocue, tutte a 1),
+#   poi ogni intervallo trasferisce i propri segni nella tabella.
+
+_bfs_worker = {}
+
+
+def _bfs_attach(table_name, marks_name, size, neighbours, columns):
+    """Inizializzazione di un processo della visita: collega i buffer condivisi"""
+    table_memory = shared_memory.SharedMemory(name=table_name)
+    marks_memory = shared_memory.SharedMemory(name=marks_name)
+    _bfs_worker.update(
+        memories=(table_memory, marks_memory),
+        table=np.ndarray((size + 1) // 2, dtype=np.uint8, buffer=table_memory.buf),
+        marks=np.ndarray(size, dtype=np.uint8, buffer=marks_memory.buf),
+        neighbours=neighbours,
+        columns=columns
+    )
+
+
+def _read_nibbles(table, first, last):
+    """Voci first..last-1 (first pari) di una tabella a 4 bit come array uint8"""
+    return unpack_nibbles(table[first >> 1:(last + 1) >> 1], last - first)
+
+
+def _write_nibbles(table, first, values):
+    """Scrive le voci a partire da first (pari) in una tabella a 4 bit"""
+    packed = np.frombuffer(pack_nibbles(values), dtype=np.uint8)
+    table[first >> 1:(first >> 1) + packed.size] = packed
+
+
+def _bfs_forward(first, last, depth):
+    """Segna i vicini degli stati dell'intervallo che si trovano a profondità depth"""
+    values = _read_nibbles(_bfs_worker['table'], first, last)
+    indices = np.flatnonzero(values == depth) + first
+    marks, neighbours = _bfs_worker['marks'], _bfs_worker['neighbours']
+    for column in _bfs_worker['columns']:
+        marks[neighbours(indices, column)] = 1
+
+
+def _bfs_collect(first, last, depth):
+    """Assegna profondità depth + 1 agli stati ignoti segnati dell'intervallo; restituisce quanti sono"""
+    table, marks = _bfs_worker['table'], _bfs_worker['marks']
+    values = _read_nibbles(table, first, last)
+    found = (marks[first:last] != 0) & (values == UNKNOWN_NIBBLE)
+    marks[first:last] = 0
+    count = int(np.count_nonzero(found))
+    if count:
+        values[found] = depth + 1
+        _write_nibbles(table, first, values)
+    return count
+
+
+def _bfs_backward(first, last, depth):
+    """Assegna profondità depth + 1 agli stati ignoti dell'intervallo con un vicino a profondità depth"""
+    table, neighbours = _bfs_worker['table'], _bfs_worker['neighbours']
+    values = _read_nibbles(table, first, last)
+    indices = np.flatnonzero(values == UNKNOWN_NIBBLE) + first
+    count = 0
+    for column in _bfs_worker['columns']:
+        if not indices.size:
+            break
+        reached = neighbours(indices, column)
+        found = (table[reached >> 1] >> ((reached & 1) << 2) & 15) == depth
+        values[indices[found] - first] = depth + 1
+        count += int(np.count_nonzero(found))
+        indices = indices[~found]
+    if count:
+        _write_nibbles(table, first, values)
+    return count
+
+
+def _parallel_breadth_first_depths(size, neighbours, columns, start, workers, progress):
+    """Versione di breadth_first_depths che divide ogni livello fra un gruppo di processi"""
+    table_memory = shared_memory.SharedMemory(create=True, size=(size + 1) // 2)
+    marks_memory = shared_memory.SharedMemory(create=True, size=size)
+    try:
+        table = np.ndarray((size + 1) // 2, dtype=np.uint8, buffer=table_memory.buf)
+        table[:] = 0xFF
+        table[start >> 1] &= ~(UNKNOWN_NIBBLE << ((start & 1) << 2)) & 0xFF
+        np.ndarray(size, dtype=np.uint8, buffer=marks_memory.buf)[:] = 0
+
+        ranges = [(first, min(first + BFS_CHUNK, size)) for first in range(0, size, BFS_CHUNK)]
+        depth = 0
+        frontier_size, unknown_size = 1, size - 1
+        if progress is not None:
+            progress(0, 1, 1)
+        with multiprocessing.Pool(workers, initializer=_bfs_attach, initargs=(
+                table_memory.name, marks_memory.name, size, neighbours, columns)) as pool:
+            while frontier_size:
+                if depth >= MAX_PARALLEL_DEPTH:
+                    raise ValueError(f"Profondità oltre {MAX_PARALLEL_DEPTH}: non rappresentabile a 4 bit")
+                tasks = [(first, last, depth) for first, last in ranges]
+                if frontier_size <= unknown_size:
+                    pool.starmap(_bfs_forward, tasks)
+                    frontier_size = sum(pool.starmap(_bfs_collect, tasks))
+                else:
+                    frontier_size = sum(pool.starmap(_bfs_backward, tasks))
+                depth += 1
+                unknown_size -= frontier_size
+                if progress is not None and frontier_size:
+                    progress(depth, frontier_size, size - unknown_size)
+
+        depths = unpack_nibbles(table, size).astype(np.int8)
+        depths[depths == UNKNOWN_NIBBLE] = -1
+        del table
+        return depths
+    finally:
+        table_memory.close()
+        table_memory.unlink()
+        marks_memory.close()
+        marks_memory.unlink()
+
+
+class CoordinatePairNeighbours:
+    def __init__(self, move_a, move_b, size_b):
+        """Vicini nello spazio delle coppie (a, b) con indice a * size_b + b (serializzabile per i processi)"""
+        self.move_a = move_a
+        self.move_b = move_b
+        self.size_b = size_b
+
+    def __call__(self, indices, column):
+        a, b = np.divmod(indices, self.size_b)
+        return self.move_a[a, column].astype(np.int64) * self.size_b + self.move_b[b, column]
+
+
+def build_pruning_table(move_a, move_b, size_b, moves, workers=None, progress=None):
+    """Distanza minima dalla meta per ogni coppia di coordinate (a, b), con indice a * size_b + b.
+
+    Visita in ampiezza dallo stato risolto (indice 0); move_a e move_b hanno una
+    colonna per ogni mossa di moves (nello stesso ordine).
+    """
+    return breadth_first_depths(move_a.shape[0] * size_b, CoordinatePairNeighbours(move_a, move_b, size_b),
+                                range(len(moves)), workers=workers, progress=progress)
+
+
+def named_progress(progress, name):
+    """Adatta una funzione progress(name, depth, count, reached) alla visita di una tabella"""
+    if progress is None:
+        return None
+    return lambda depth, count, reached: progress(name, depth, count, reached)
+
+
+def print_progress(name, depth, count, reached):
+    """Funzione di avanzamento predefinita in modalità verbose"""
+    print(f"    {name}: profondità {depth:2}, {count} stati ({reached} raggiunti)")
+
+
+def _table_specs(move_array, workers=None, progress=None):
+    """Nome, bit per voce e funzione generatrice di ogni tabella, in ordine di dipendenza.
+
+    move_array(name, columns) restituisce come array NumPy una tabella delle mosse già pronta.
+    """
+    def pruning_table(name, move_a, move_b, size_b, moves):
+        return lambda: build_pruning_table(move_a(), move_b(), size_b, moves, workers,
+                                           named_progress(progress, name))
+
+    def phase2_slice_move():
+        return move_array('slice_sorted_move', N_MOVES)[:24][:, PHASE2_MOVES]
+
+    return (
+        ('twist_move', 16, build_twist_move_table),
+        ('flip_move', 16, build_flip_move_table),
+        ('slice_sorted_move', 16, build_slice_sorted_move_table),
+        # Coordinata slice (senza ordine) ricavata da slice_sorted
+        ('slice_move', 16, lambda: move_array('slice_sorted_move', N_MOVES)[::24] // 24),
+        ('corners_move', 16, build_corners_move_table),
+        ('ud_edges_move', 16, build_ud_edges_move_table),
+        ('twist_slice_prune', 4, pruning_table(
+            'twist_slice_prune', lambda: move_array('twist_move', N_MOVES),
+            lambda: move_array('slice_move', N_MOVES), N_SLICE, range(N_MOVES))),
+        ('flip_slice_prune', 4, pruning_table(
+            'flip_slice_prune', lambda: move_array('flip_move', N_MOVES),
+            lambda: move_array('slice_move', N_MOVES), N_SLICE, range(N_MOVES))),
+        ('corners_slice_prune', 4, pruning_table(
+            'corners_slice_prune', lambda: move_array('corners_move', N_MOVES)[:, PHASE2_MOVES],
+            phase2_slice_move, 24, PHASE2_MOVES)),
+        ('ud_edges_slice_prune', 4, pruning_table(
+            'ud_edges_slice_prune', lambda: move_array('ud_edges_move', N_PHASE2_MOVES),
+            phase2_slice_move, 24, PHASE2_MOVES))
+    )
+
+
+# Versione delle tabelle: va incrementata se cambiano coordinate o generatori
+TABLE_VERSION = 1
+TABLE_PREFIX = 'twophase_'
+
+
+class TwoPhaseTables:
+    def __init__(self, twist_move, flip_move, slice_move, slice_sorted_move, corners_move, ud_edges_move,
+                 twist_slice_prune, flip_slice_prune, corners_slice_prune, ud_edges_slice_prune):
+        """Tabelle del risolutore: mosse come sequenze piatte di interi (coordinata * colonne + mossa),
+        potatura impacchettata a 4 bit per voce"""
+        self.twist_move = twist_move
+        self.flip_move = flip_move
+        self.slice_move = slice_move
+        self.slice_sorted_move = slice_sorted_move
+        self.corners_move = corners_move
+        self.ud_edges_move = ud_edges_move
+        self.twist_slice_prune = twist_slice_prune
+        self.flip_slice_prune = flip_slice_prune
+        self.corners_slice_prune = corners_slice_prune
+        self.ud_edges_slice_prune = ud_edges_slice_prune
+
+    @classmethod
+    def build(cls, verbose=False, workers=None, progress=None):
+        """Genera tutte le tabelle in memoria, senza passare dal disco.
+
+        workers e progress(name, depth, count, reached) sono passati alle
+        visite in ampiezza delle tabelle di potatura.
+        """
+        start = time.perf_counter()
+        arrays = {}
+        tables = {}
+        progress = progress if progress is not None or not verbose else print_progress
+        for name, bits, builder in _table_specs(lambda name, columns: arrays[name].reshape(-1, columns),
+                                                workers, progress):
+            arrays[name] = np.asarray(builder())
+            tables[name] = pack_nibbles(arrays[name]) if bits == 4 else memoryview(
+                np.ascontiguousarray(arrays[name], dtype=np.uint16).ravel())
+            if verbose:
+                print(f"[{time.perf_counter() - start:6.2f}s] Tabella {name} generata")
+        return cls(**tables)
+
+    @classmethod
+    def load(cls, store=None, rebuild=False, verbose=False, workers=None, progress=None):
+        """Apre le tabelle dall'archivio su disco (mmap), generando e salvando quelle mancanti"""
+        store = store if store is not None else TableStore()
+        start = time.perf_counter()
+        loaded = {}
+        progress = progress if progress is not None or not verbose else print_progress
+        for name, bits, builder in _table_specs(
+                lambda name, columns: loaded[name].to_numpy().reshape(-1, columns), workers, progress):
+            loaded[name] = store.load(TABLE_PREFIX + name, TABLE_VERSION, bits, builder, rebuild)
+            if verbose:
+                print(f"[{time.perf_counter() - start:6.2f}s] Tabella {name} pronta")
+        return cls(**{name: table.data for name, table in loaded.items()})
+
+
+class TwoPhaseSolver:
+    def __init__(self, tables=None):
+        """Crea il risolutore; senza tabelle usa quelle condivise, generate al primo utilizzo"""
+        self.tables = tables if tables is not None else get_tables()
+
+    def solve(self, cube, max_length=22, timeout=10.0, improve_time=DEFAULT_IMPROVE_TIME):
+        """Restituisce una soluzione di al più max_length mosse come lista in notazione standard.
+
+        Trovata la prima soluzione, la ricerca continua con il limite sulla
+        lunghezza totale stretto alla migliore meno uno, finché la profondità
+        di fase 1 raggiunge la lunghezza della migliore (nessuna soluzione più
+        corta è possibile da qui) o finché scadono improve_time secondi (None:
+        nessun limite oltre timeout); si restituisce la più corta trovata.
+        La lista può essere animata direttamente con RubiksCube3D.rotate_move.
+        Solleva ValueError se lo stato non è legale e TimeoutError se entro
+        timeout secondi non si trova nessuna soluzione abbastanza corta.
+        """
+        cubie = to_cubie(cube)
+        cubie.verify()
+        if cubie.is_solved():
+            return []
+
+        self._cubie = cubie
+        self._max_length = max_length
+        self._improve_time = improve_time
+        self._deadline = time.perf_counter() + timeout if timeout is not None else None
+        self._path = []
+        self._best = None
+
+        twist = cubie.get_twist()
+        flip = cubie.get_flip()
+        slice_sorted = cubie.get_slice_sorted()
+        corners = cubie.get_corners()
+        try:
+            for phase2_limit in (PHASE2_SEARCH_LIMIT, MAX_PHASE2_DEPTH):
+                self._phase2_limit = phase2_limit
+                depth = 0
+                while depth <= min(self._max_length, MAX_PHASE1_DEPTH):
+                    self._phase1(twist, flip, slice_sorted // 24, corners, slice_sorted, depth, -1)
+                    depth += 1
+                if self._best is not None:
+                    break
+        except TimeoutError:
+            if self._best is None:
+                raise TimeoutError(f"Nessuna soluzione entro {timeout} secondi")
+        if self._best is None:
+            raise ValueError(f"Nessuna soluzione di al più {max_length} mosse")
+        return [FACE_MOVES[move] for move in self._best]
+
+    def _phase1(self, twist, flip, slice_, corners, slice_sorted, togo, last_face):
+        """Ricerca in profondità limitata verso G1; ogni soluzione completa stringe il limite sulla lunghezza"""
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise TimeoutError("Tempo esaurito durante la ricerca")
+        if togo == 0:
+            if twist or flip or slice_:
+                return
+            # In G1: se l'ultima mossa era già di fase 2 questa soluzione è stata vista a profondità minore
+            if self._path and self._path[-1] in PHASE2_MOVES:
+                return
+            self._start_phase2(corners, slice_sorted, last_face)
+            return
+
+        tables = self.tables
+        twist_move, flip_move, slice_move = tables.twist_move, tables.flip_move, tables.slice_move
+        twist_prune, flip_prune = tables.twist_slice_prune, tables.flip_slice_prune
+        for move in range(N_MOVES):
+            face = move // 3
+            # Mai due mosse della stessa faccia; facce opposte in un solo ordine
+            if face == last_face or face == last_face - 3:
+                continue
+            new_twist = twist_move[twist * 18 + move]
+            new_flip = flip_move[flip * 18 + move]
+            new_slice = slice_move[slice_ * 18 + move]
+            index = new_twist * N_SLICE + new_slice
+            if twist_prune[index >> 1] >> ((index & 1) << 2) & 15 >= togo:
+                continue
+            index = new_flip * N_SLICE + new_slice
+            if flip_prune[index >> 1] >> ((index & 1) << 2) & 15 >= togo:
+                continue
+            self._path.append(move)
+            self._phase1(new_twist, new_flip, new_slice,
+                         tables.corners_move[corners * 18 + move],
+                         tables.slice_sorted_move[slice_sorted * 18 + move],
+                         togo - 1, face)
+            self._path.pop()
+
+    def _start_phase2(self, corners, slice_sorted, last_face):
+        """Prova a completare con la fase 2 la soluzione di fase 1 corrente entro il limite attuale"""
+        tables = self.tables
+        max_depth = min(self._max_length - len(self._path), self._phase2_limit)
+        # Controllo economico prima di calcolare la permutazione degli spigoli U/D
+        corners_distance = nibble_at(tables.corners_slice_prune, corners * 24 + slice_sorted)
+        if corners_distance > max_depth:
+            return
+
+        cube = self._cubie.copy()
+        for move in self._path:
+            cube.apply_move(FACE_MOVES[move])
+        ud_edges = cube.get_ud_edges()
+        heuristic = max(corners_distance, nibble_at(tables.ud_edges_slice_prune, ud_edges * 24 + slice_sorted))
+        phase1_length = len(self._path)
+        for depth in range(heuristic, max_depth + 1):
+            found = self._phase2(corners, ud_edges, slice_sorted, depth, last_face)
+            if found:
+                if self._best is None and self._improve_time is not None:
+                    # Da qui in poi si cerca solo di accorciare, per un tempo limitato
+                    improve_deadline = time.perf_counter() + self._improve_time
+                    self._deadline = (improve_deadline if self._deadline is None
+                                      else min(self._deadline, improve_deadline))
+                self._best = list(self._path)
+                self._max_length = len(self._best) - 1
+            del self._path[phase1_length:]
+            if found:
+                return
+
+    def _phase2(self, corners, ud_edges, slice_sorted, togo, last_face):
+        """Ricerca in profondità limitata da G1 allo stato risolto"""
+        if togo == 0:
+            return corners == 0 and ud_edges == 0 and slice_sorted == 0
+
+        tables = self.tables
+        corners_move, ud_edges_move = tables.corners_move, tables.ud_edges_move
+        slice_sorted_move = tables.slice_sorted_move
+        corners_prune, edges_prune = tables.corners_slice_prune, tables.ud_edges_slice_prune
+        for column, move in enumerate(PHASE2_MOVES):
+            face = move // 3
+            if face == last_face or face == last_face - 3:
+                continue
+            new_corners = corners_move[corners * 18 + move]
+            new_ud_edges = ud_edges_move[ud_edges * N_PHASE2_MOVES + column]
+            new_slice_sorted = slice_sorted_move[slice_sorted * 18 + move]
+            index = new_corners * 24 + new_slice_sorted
+            if corners_prune[index >> 1] >> ((index & 1) << 2) & 15 >= togo:
+                continue
+            index = new_ud_edges * 24 + new_slice_sorted
+            if edges_prune[index >> 1] >> ((index & 1) << 2) & 15 >= togo:
+                continue
+            self._path.append(move)
+            if self._phase2(new_corners, new_ud_edges, new_slice_sorted, togo - 1, face):
+                return True
+            self._path.pop()
+        return False
+
+
+_default_tables = None
+
+
+def get_tables():
+    """Tabelle condivise del risolutore, aperte dall'archivio su disco (e generate al primo utilizzo)"""
+    global _default_tables
+    if _default_tables is None:
+        _default_tables = TwoPhaseTables.load()
+    return _default_tables
+
+
+def solve(cube, max_length=22, timeout=10.0, improve_time=DEFAULT_IMPROVE_TIME):
+    """Risolve un cubo (modello, stato, facelet o CubieCube) con l'algoritmo a due fasi"""
+    return TwoPhaseSolver().solve(cube, max_length=max_length, timeout=timeout, improve_time=improve_time)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stato Immutabile del Cubo di Rubik
+Stato congelato e hashabile, adatto come chiave di dizionari e insiemi, con
+hash di Zobrist a 64 bit aggiornato in modo incrementale a ogni mossa.
+"""
+
+import random
+from functools import lru_cache
+from operator import itemgetter
+
+from rubiks_cube_moves import SOLVED_STATE, MOVE_PERMUTATIONS, MOVE_GATHERS, compile_algorithm
+
+# Seme fisso: lo stesso stato ha lo stesso hash in ogni processo e in ogni esecuzione
+ZOBRIST_SEED = 0x5EED_C0BE
+
+_COLOR_LETTERS = b'WYBGRO'
+
+
+def _build_zobrist_table():
+    """Un numero casuale a 64 bit per ogni coppia (posizione, colore), indicizzato per byte del colore"""
+    generator = random.Random(ZOBRIST_SEED)
+    table = []
+    for _ in range(54):
+        row = [0] * 256
+        for color in _COLOR_LETTERS:
+            row[color] = generator.getrandbits(64)
+        table.append(row)
+    return tuple(table)
+
+
+ZOBRIST_TABLE = _build_zobrist_table()
+
+
+def zobrist_hash(facelets):
+    """Calcola da zero l'hash di Zobrist di 54 facelet"""
+    value = 0
+    for row, color in zip(ZOBRIST_TABLE, facelets):
+        value ^= row[color]
+    return value
+
+
+def _touched(permutation):
+    """Posizioni che una permutazione cambia (le sole che contribuiscono all'aggiornamento dell'hash):
+    restituisce un itemgetter che le estrae e le righe di Zobrist corrispondenti"""
+    positions = [index for index, source in enumerate(permutation) if source != index]
+    if not positions:
+        return (lambda facelets: ()), ()
+    # Con una sola posizione itemgetter restituirebbe un valore invece di una tupla
+    getter = itemgetter(*positions, positions[0])
+    return getter, tuple(ZOBRIST_TABLE[index] for index in positions) + ((0,) * 256,)
+
+
+@lru_cache(maxsize=1024)
+def _algorithm_touched(permutation):
+    """Posizioni toccate da un algoritmo compilato (memoizzate)"""
+    return _touched(permutation)
+
+
+# Per ogni mossa le facelet toccate, con le righe della tabella di Zobrist già estratte
+MOVE_TOUCHED = {move: _touched(permutation) for move, permutation in MOVE_PERMUTATIONS.items()}
+
+
+class CubeState:
+    __slots__ = ('facelets', 'hash64')
+
+    def __init__(self, facelets=SOLVED_STATE, hash64=None):
+        """Crea uno stato immutabile da 54 facelet; hash64 può essere fornito se già noto"""
+        if isinstance(facelets, str):
+            facelets = facelets.encode('ascii')
+        facelets = bytes(facelets)
+        if len(facelets) != 54:
+            raise ValueError(f"Lo stato deve avere 54 facelet, ricevute {len(facelets)}")
+        object.__setattr__(self, 'facelets', facelets)
+        object.__setattr__(self, 'hash64', zobrist_hash(facelets) if hash64 is None else hash64)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CubeState è immutabile")
+
+    def __delattr__(self, name):
+        raise AttributeError("CubeState è immutabile")
+
+    def __hash__(self):
+        return self.hash64
+
+    def __eq__(self, other):
+        if not isinstance(other, CubeState):
+            return NotImplemented
+        return self.hash64 == other.hash64 and self.facelets == other.facelets
+
+    def __repr__(self):
+        return f"CubeState({self.facelets.decode('ascii')!r})"
+
+    def __reduce__(self):
+        return (CubeState, (self.facelets, self.hash64))
+
+    @classmethod
+    def from_model(cls, model):
+        """Congela lo stato corrente di un RubiksCubeModel"""
+        return cls(model.get_state())
+
+    def to_model(self):
+        """Restituisce un RubiksCubeModel modificabile con questo stato"""
+        from rubiks_cube_model import RubiksCubeModel
+        model = RubiksCubeModel()
+        model.set_state(self.facelets)
+        return model
+
+    def _transformed(self, facelets, touched):
+        """Nuovo stato con l'hash aggiornato solo sulle posizioni toccate"""
+        getter, rows = touched
+        value = self.hash64
+        for row, old, new in zip(rows, getter(self.facelets), getter(facelets)):
+            value ^= row[old] ^ row[new]
+        # Costruzione diretta: facelet e hash sono già validi, si salta il controllo di __init__
+        state = object.__new__(CubeState)
+        object.__setattr__(state, 'facelets', facelets)
+        object.__setattr__(state, 'hash64', value)
+        return state
+
+    def apply_move(self, move):
+        """Restituisce lo stato dopo la mossa, aggiornando l'hash in modo incrementale"""
+        return self._transformed(bytes(MOVE_GATHERS[move](self.facelets)), MOVE_TOUCHED[move])
+
+    def apply_algorithm(self, moves):
+        """Restituisce lo stato dopo un intero algoritmo compilato"""
+        compiled = compile_algorithm(moves)
+        return self._transformed(compiled.apply(self.facelets), _algorithm_touched(compiled.permutation))
+
+    def canonical(self):
+        """Rappresentante canonico sotto le 48 simmetrie del cubo e simmetria usata, come (CubeState, indice)"""
+        from rubiks_cube_symmetry import canonical
+        facelets, symmetry = canonical(self.facelets)
+        return CubeState(facelets), symmetry
+
+    def is_solved(self):
+        """Controlla se ogni faccia ha un colore uniforme"""
+        facelets = self.facelets
+        return all(facelets[start:start + 9] == facelets[start:start + 1] * 9 for start in range(0, 54, 9))
+
+
+SOLVED_CUBE_STATE = CubeState()
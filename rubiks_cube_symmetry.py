@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Simmetrie del Cubo di Rubik
+Le 48 simmetrie del cubo (24 rotazioni, ciascuna con o senza riflessione)
+agiscono sugli stati per coniugazione: il cubo viene ruotato o specchiato
+e i colori rinominati in modo che i centri restino al loro posto. Stati
+simmetrici sono equivalenti per ogni risolutore: basta conservarne uno,
+il rappresentante canonico (le facelet minime in ordine lessicografico),
+e riportare la soluzione allo stato originale coniugandone le mosse.
+I colori sono rinominati secondo lo schema standard (SOLVED_FACE_COLORS):
+così la coniugazione rispetta ogni mossa, comprese quelle che spostano i
+centri.
+"""
+
+from itertools import permutations, product
+from operator import itemgetter
+
+import numpy as np
+
+from rubiks_cube_cubie import cube_facelets
+from rubiks_cube_moves import (
+    FACE_NAMES, FACELET_BY_GEOMETRY, FACELET_GEOMETRY, MOVE_PERMUTATIONS, SOLVED_FACE_COLORS,
+    compose_permutations, transform
+)
+
+N_SYMMETRIES = 48
+
+_CENTERS = tuple(index * 9 + 4 for index in range(6))
+_FACE_NORMALS = tuple(FACELET_GEOMETRY[center][1] for center in _CENTERS)
+
+
+def _build_matrices():
+    """Le 48 matrici ortogonali intere (permutazioni degli assi con segni); la prima è l'identità"""
+    matrices = []
+    for axes in permutations(range(3)):
+        for signs in product((1, -1), repeat=3):
+            matrices.append(tuple(
+                tuple(signs[row] if column == axes[row] else 0 for column in range(3)) for row in range(3)
+            ))
+    return tuple(matrices)
+
+
+def _determinant(matrix):
+    (a, b, c), (d, e, f), (g, h, i) = matrix
+    return a * (e * i - f * h) - b * (d * i - f * g) + c * (d * h - e * g)
+
+
+SYMMETRY_MATRICES = _build_matrices()
+
+# True per le 24 simmetrie che includono una riflessione (determinante -1)
+SYMMETRY_IS_REFLECTION = tuple(_determinant(matrix) < 0 for matrix in SYMMETRY_MATRICES)
+ROTATION_SYMMETRIES = tuple(index for index, reflection in enumerate(SYMMETRY_IS_REFLECTION) if not reflection)
+
+
+def _build_facelet_tables():
+    """Per ogni simmetria: permutazione (gather) delle facelet e faccia di arrivo di ogni faccia"""
+    gathers, face_maps = [], []
+    for matrix in SYMMETRY_MATRICES:
+        gather = [0] * 54
+        for source, (position, normal) in enumerate(FACELET_GEOMETRY):
+            gather[FACELET_BY_GEOMETRY[(transform(matrix, position), transform(matrix, normal))]] = source
+        gathers.append(tuple(gather))
+        face_maps.append(tuple(_FACE_NORMALS.index(transform(matrix, normal)) for normal in _FACE_NORMALS))
+    return tuple(gathers), tuple(face_maps)
+
+
+# SYMMETRY_PERMUTATIONS[s][i]: facelet che finisce nella posizione i; SYMMETRY_FACE_MAPS[s][f]: faccia immagine di f
+SYMMETRY_PERMUTATIONS, SYMMETRY_FACE_MAPS = _build_facelet_tables()
+SYMMETRY_GATHERS = tuple(itemgetter(*permutation) for permutation in SYMMETRY_PERMUTATIONS)
+
+# Ricolorazione di ogni simmetria: colore della faccia f -> colore della faccia immagine di f
+_SCHEME = bytes(ord(SOLVED_FACE_COLORS[name]) for name in FACE_NAMES)
+SYMMETRY_RECOLOR = tuple(bytes.maketrans(_SCHEME, bytes(_SCHEME[face] for face in face_map))
+                         for face_map in SYMMETRY_FACE_MAPS)
+_RECOLOR_ARRAY = np.frombuffer(b''.join(SYMMETRY_RECOLOR), dtype=np.uint8).reshape(N_SYMMETRIES, 256)
+_PERMUTATION_ARRAY = np.array(SYMMETRY_PERMUTATIONS, dtype=np.intp)
+_ALL_SYMMETRIES = np.arange(N_SYMMETRIES)
+
+# Simmetria inversa di ognuna
+SYMMETRY_INVERSE = tuple(
+    next(other for other in range(N_SYMMETRIES)
+         if compose_permutations(SYMMETRY_PERMUTATIONS[index], SYMMETRY_PERMUTATIONS[other]) == tuple(range(54)))
+    for index in range(N_SYMMETRIES)
+)
+
+
+def _build_move_conjugates():
+    """MOVE_CONJUGATES[s][mossa]: la mossa m' con S(stato · mossa) = S(stato) · m' per ogni stato"""
+    by_permutation = {}
+    for move, permutation in MOVE_PERMUTATIONS.items():
+        by_permutation.setdefault(permutation, move)
+    table = []
+    for symmetry in range(N_SYMMETRIES):
+        forward = SYMMETRY_PERMUTATIONS[symmetry]
+        backward = SYMMETRY_PERMUTATIONS[SYMMETRY_INVERSE[symmetry]]
+        table.append({
+            move: by_permutation[compose_permutations(compose_permutations(backward, permutation), forward)]
+            for move, permutation in MOVE_PERMUTATIONS.items()
+        })
+    return tuple(table)
+
+
+MOVE_CONJUGATES = _build_move_conjugates()
+
+
+def apply_symmetry(state, symmetry):
+    """Coniuga uno stato con una simmetria; i centri nella posizione standard restano al loro posto"""
+    return bytes(SYMMETRY_GATHERS[symmetry](cube_facelets(state))).translate(SYMMETRY_RECOLOR[symmetry])
+
+
+def _row_keys(rows):
+    """Righe (K, 54) di uint8 come stringhe di byte: il confronto diventa lessicografico"""
+    return np.ascontiguousarray(rows).view('S54').ravel()
+
+
+def canonical(state, symmetries=None):
+    """Rappresentante canonico della classe di simmetria: (facelet minime, simmetria usata).
+
+    state può essere 54 facelet (bytes o str) o un oggetto con get_state()
+    o facelets. Vale apply_symmetry(state, simmetria) == rappresentante; per
+    ridurre solo rispetto alle rotazioni si passa symmetries=ROTATION_SYMMETRIES.
+    """
+    facelets = np.frombuffer(cube_facelets(state), dtype=np.uint8)
+    indices = _ALL_SYMMETRIES if symmetries is None else np.asarray(symmetries)
+    # Le 48 immagini con un'unica raccolta, poi la minima in ordine lessicografico
+    candidates = _RECOLOR_ARRAY[indices[:, None], facelets[_PERMUTATION_ARRAY[indices]]]
+    best = int(_row_keys(candidates).argmin())
+    return candidates[best].tobytes(), int(indices[best])
+
+
+def canonical_batch(states, symmetries=None):
+    """Versione vettoriale di canonical per una matrice (N, 54): (rappresentanti, simmetrie usate)"""
+    states = np.asarray(states, dtype=np.uint8)
+    indices = _ALL_SYMMETRIES if symmetries is None else np.asarray(symmetries)
+    best = _RECOLOR_ARRAY[indices[0]][states[:, _PERMUTATION_ARRAY[indices[0]]]]
+    best_symmetry = np.full(states.shape[0], indices[0])
+    best_keys = _row_keys(best)
+    for symmetry in indices[1:]:
+        candidate = _RECOLOR_ARRAY[symmetry][states[:, _PERMUTATION_ARRAY[symmetry]]]
+        candidate_keys = _row_keys(candidate)
+        smaller = candidate_keys < best_keys
+        best_keys[smaller] = candidate_keys[smaller]
+        best[smaller] = candidate[smaller]
+        best_symmetry[smaller] = symmetry
+    return best, best_symmetry
+
+
+def conjugate_moves(moves, symmetry):
+    """Coniuga una sequenza di mosse (in notazione standard) con una simmetria"""
+    if isinstance(moves, str):
+        moves = moves.split()
+    table = MOVE_CONJUGATES[symmetry]
+    return [table[move] for move in moves]
+
+
+def solution_from_canonical(moves, symmetry):
+    """Riporta allo stato originale la soluzione trovata per il suo rappresentante canonico"""
+    return conjugate_moves(moves, SYMMETRY_INVERSE[symmetry])
+
+
+def symmetry_stabilizer(state):
+    """Simmetrie che lasciano lo stato invariato (solo l'identità per quasi tutti gli stati)"""
+    facelets = cube_facelets(state)
+    return tuple(symmetry for symmetry in range(N_SYMMETRIES) if apply_symmetry(facelets, symmetry) == facelets)
+
+
+def face_after_symmetry(face_name, symmetry):
+    """Nome della faccia in cui una simmetria porta la faccia indicata"""
+    return FACE_NAMES[SYMMETRY_FACE_MAPS[symmetry][FACE_NAMES.index(face_name)]]
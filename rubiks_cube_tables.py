@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Archivio su Disco delle Tabelle del Cubo di Rubik
+Ogni tabella è un file binario versionato: un'intestazione fissa con nome,
+versione, numero di voci, bit per voce e checksum CRC32, seguita dai dati
+(a 4 bit per voce per le tabelle di potatura, a 16 o 32 bit per quelle delle mosse).
+I file sono aperti con mmap in sola lettura: più processi condividono le
+stesse pagine fisiche e l'apertura non legge i dati, così l'avvio resta
+quasi istantaneo. Una tabella mancante o di versione diversa viene generata
+al primo utilizzo.
+
+Uso da riga di comando:
+    python rubiks_cube_tables.py build [--dir CARTELLA] [--force] [--optimal htm|qtm]
+    python rubiks_cube_tables.py verify [--dir CARTELLA]
+    python rubiks_cube_tables.py info [--dir CARTELLA]
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+import numpy as np
+
+MAGIC = b'RCTB'
+FORMAT_VERSION = 1
+
+# magic, versione del formato, bit per voce, versione della tabella, voci, crc32, nome
+_HEADER = struct.Struct('<4sHHIQI32s')
+HEADER_SIZE = 64   # L'intestazione è completata a 64 byte per allineare i dati
+
+# Valore delle voci non raggiunte nelle tabelle a 4 bit
+UNKNOWN_NIBBLE = 0xF
+
+# Tipo delle voci (NumPy, memoryview) per ogni larghezza diversa da 4 bit
+_ENTRY_TYPES = {8: ('<u1', 'B'), 16: ('<u2', 'H'), 32: ('<u4', 'I')}
+
+# Cartella predefinita: variabile d'ambiente oppure 'tables' accanto ai sorgenti
+TABLES_DIR_ENV = 'RUBIKS_CUBE_TABLES_DIR'
+DEFAULT_TABLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tables')
+
+
+def pack_nibbles(values):
+    """Impacchetta valori 0..15 due per byte (voce pari nel nibble basso); i negativi diventano 15"""
+    values = np.asarray(values)
+    nibbles = np.where(values < 0, UNKNOWN_NIBBLE, values).astype(np.uint8)
+    if nibbles.size % 2:
+        nibbles = np.append(nibbles, np.uint8(UNKNOWN_NIBBLE))
+    return (nibbles[0::2] | (nibbles[1::2] << 4)).tobytes()
+
+
+def unpack_nibbles(buffer, count):
+    """Espande una tabella a 4 bit in un array uint8 di count voci"""
+    packed = np.frombuffer(buffer, dtype=np.uint8)
+    values = np.empty(packed.size * 2, dtype=np.uint8)
+    values[0::2] = packed & 0x0F
+    values[1::2] = packed >> 4
+    return values[:count]
+
+
+def nibble_at(buffer, index):
+    """Legge la voce index da una tabella a 4 bit"""
+    return buffer[index >> 1] >> ((index & 1) << 2) & 15
+
+
+def _reopen(directory, name, version, bits):
+    """Riapre una tabella in un altro processo (usata per la serializzazione con pickle)"""
+    table = TableStore(directory).open(name, version, bits)
+    if table is None:
+        raise ValueError(f"Tabella {name} non più disponibile in {directory}")
+    return table
+
+
+class StoredTable:
+    def __init__(self, name, version, bits, entries, checksum, data, handle=None, directory=None):
+        """Tabella aperta: data è una memoryview sui dati (byte impacchettati o voci a 8, 16 o 32 bit)"""
+        self.name = name
+        self.version = version
+        self.bits = bits
+        self.entries = entries
+        self.checksum = checksum
+        self.data = data
+        self.directory = directory
+        self._handle = handle   # mmap da tenere aperto finché la tabella è in uso
+
+    def __reduce__(self):
+        # Un altro processo riapre il file con mmap: le pagine fisiche restano condivise, niente copie
+        return (_reopen, (self.directory, self.name, self.version, self.bits))
+
+    def __len__(self):
+        return self.entries
+
+    def __getitem__(self, index):
+        if self.bits == 4:
+            return nibble_at(self.data, index)
+        return self.data[index]
+
+    def to_numpy(self):
+        """Vista NumPy dei dati, senza copia (voci a 8, 16 o 32 bit) o espansa (voci a 4 bit)"""
+        if self.bits == 4:
+            return unpack_nibbles(self.data, self.entries)
+        return np.frombuffer(self.data, dtype=_ENTRY_TYPES[self.bits][0])
+
+    def verify(self):
+        """Ricalcola il CRC32 dei dati e lo confronta con quello dell'intestazione"""
+        return zlib.crc32(self.data.cast('B')) == self.checksum
+
+
+def _payload(values, bits):
+    """Converte i valori di una tabella nei byte da scrivere su disco"""
+    if bits == 4:
+        return pack_nibbles(values)
+    if bits in _ENTRY_TYPES:
+        return np.ascontiguousarray(values, dtype=_ENTRY_TYPES[bits][0]).tobytes()
+    raise ValueError(f"Bit per voce non supportati: {bits}")
+
+
+class TableStore:
+    def __init__(self, directory=None):
+        """Archivio delle tabelle in una cartella (predefinita: $RUBIKS_CUBE_TABLES_DIR o ./tables)"""
+        self.directory = directory or os.environ.get(TABLES_DIR_ENV) or DEFAULT_TABLES_DIR
+        self._open_tables = {}
+
+    def path(self, name):
+        """Percorso del file di una tabella"""
+        return os.path.join(self.directory, f"{name}.tbl")
+
+    def save(self, name, version, bits, values):
+        """Scrive una tabella su disco in modo atomico (file temporaneo e rinomina)"""
+        payload = _payload(values, bits)
+        entries = int(np.asarray(values).size)
+        header = _HEADER.pack(MAGIC, FORMAT_VERSION, bits, version, entries,
+                              zlib.crc32(payload), name.encode('ascii')[:32])
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(name)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'wb') as file:
+            file.write(header.ljust(HEADER_SIZE, b'\0'))
+            file.write(payload)
+        os.replace(temporary, path)
+        self._open_tables.pop(name, None)
+
+    def open(self, name, version=None, bits=None):
+        """Apre con mmap una tabella salvata; None se manca o se versione e formato non corrispondono"""
+        if name in self._open_tables:
+            table = self._open_tables[name]
+            if (version is None or table.version == version) and (bits is None or table.bits == bits):
+                return table
+        try:
+            with open(self.path(name), 'rb') as file:
+                if os.fstat(file.fileno()).st_size < HEADER_SIZE:
+                    return None
+                handle = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+
+        magic, format_version, stored_bits, stored_version, entries, checksum, stored_name = \
+            _HEADER.unpack_from(handle, 0)
+        expected_size = HEADER_SIZE + ((entries + 1) // 2 if stored_bits == 4 else entries * stored_bits // 8)
+        if (magic != MAGIC or format_version != FORMAT_VERSION
+                or stored_name.rstrip(b'\0').decode('ascii') != name
+                or (version is not None and stored_version != version)
+                or (bits is not None and stored_bits != bits)
+                or len(handle) != expected_size):
+            handle.close()
+            return None
+
+        data = memoryview(handle)[HEADER_SIZE:]
+        if stored_bits in _ENTRY_TYPES:
+            data = data.cast(_ENTRY_TYPES[stored_bits][1])
+        table = StoredTable(name, stored_version, stored_bits, entries, checksum, data, handle, self.directory)
+        self._open_tables[name] = table
+        return table
+
+    def load(self, name, version, bits, builder, rebuild=False):
+        """Apre una tabella, generandola con builder() e salvandola se manca o è di un'altra versione"""
+        table = None if rebuild else self.open(name, version, bits)
+        if table is None:
+            self.save(name, version, bits, builder())
+            table = self.open(name, version, bits)
+        return table
+
+    def list_tables(self):
+        """Tabelle presenti nella cartella dell'archivio"""
+        if not os.path.isdir(self.directory):
+            return []
+        names = sorted(entry[:-4] for entry in os.listdir(self.directory) if entry.endswith('.tbl'))
+        return [table for table in (self.open(name) for name in names) if table is not None]
+
+
+def main(argv=None):
+    """Punto d'ingresso da riga di comando: genera, verifica o elenca le tabelle"""
+    parser = argparse.ArgumentParser(description="Gestione delle tabelle precalcolate del Cubo di Rubik")
+    parser.add_argument('command', choices=('build', 'verify', 'info'))
+    parser.add_argument('--dir', help="Cartella delle tabelle")
+    parser.add_argument('--force', action='store_true', help="Rigenera anche le tabelle già presenti")
+    parser.add_argument('--workers', type=int, help="Processi per la generazione (predefinito: uno per processore)")
+    parser.add_argument('--optimal', action='append', choices=('htm', 'qtm'), default=[],
+                        help="Genera anche i database di pattern del risolutore ottimo per la metrica")
+    args = parser.parse_args(argv)
+
+    store = TableStore(args.dir)
+    if args.command == 'build':
+        import rubiks_cube_solver
+        rubiks_cube_solver.TwoPhaseTables.load(store, rebuild=args.force, verbose=True, workers=args.workers)
+        if args.optimal:
+            import rubiks_cube_optimal
+            for metric in args.optimal:
+                rubiks_cube_optimal.OptimalTables.load(metric, store, rebuild=args.force, verbose=True,
+                                                       workers=args.workers)
+        print(f"Tabelle pronte in {store.directory}")
+        return 0
+
+    tables = store.list_tables()
+    if not tables:
+        print(f"Nessuna tabella in {store.directory}")
+        return 1
+    failures = 0
+    for table in tables:
+        line = f"{table.name:30} v{table.version:<3} {table.bits:2} bit {table.entries:>12} voci"
+        if args.command == 'verify':
+            valid = table.verify()
+            failures += not valid
+            line += "  OK" if valid else "  CHECKSUM ERRATO"
+        print(line)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""I moduli del progetto stanno nella cartella principale: la si rende importabile dai test"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
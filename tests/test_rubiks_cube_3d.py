@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""Test del cubo 3D sul backend senza finestra, con l'orologio virtuale dei benchmark"""
+
+import contextlib
+import io
+import random
+
+import pytest
+
+from benchmarks.headless import load_renderer
+from rubiks_cube_model import RubiksCubeModel
+from rubiks_cube_moves import FACELET_GEOMETRY, MOVE_PERMUTATIONS
+
+
+@pytest.fixture
+def cube():
+    module, _ = load_renderer()
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield module.RubiksCube3D(renderer='headless')
+
+
+def _scene_matches_model(cube):
+    """Ogni facelet ha lo sticker giusto nella posizione giusta, con il colore del modello"""
+    spacing = cube.cube_size + cube.gap
+    offset = (cube.cube_size + 0.02) / 2
+    for index, (position, normal) in enumerate(FACELET_GEOMETRY):
+        sticker = cube.stickers[cube.sticker_at[index]]
+        expected = [p * spacing + n * offset for p, n in zip(position, normal)]
+        actual = (sticker.pos.x, sticker.pos.y, sticker.pos.z)
+        if max(abs(a - b) for a, b in zip(expected, actual)) > 1e-6:
+            return False
+        if sticker.color is not cube._palette[cube.model.facelets[index]]:
+            return False
+    return True
+
+
+def test_animated_moves_keep_live_objects_constant(cube):
+    live = cube.renderer.live_objects
+    reference = RubiksCubeModel()
+    rng = random.Random(3)
+    for _ in range(60):
+        move = rng.choice(list(MOVE_PERMUTATIONS))
+        cube._animate_rotation(move)
+        reference.apply_move(move)
+    assert cube.renderer.live_objects == live
+    assert bytes(cube.model.facelets) == bytes(reference.facelets)
+    assert _scene_matches_model(cube)
+
+
+def test_reset_reuses_scene_objects(cube):
+    created = cube.renderer.objects_created
+    for _ in range(50):
+        cube.apply_algorithm("R U F' L2 D B'")
+        cube.reset()
+    assert cube.renderer.objects_created == created
+    assert cube.model.is_solved()
+    assert _scene_matches_model(cube)
+
+
+def test_apply_algorithm_reports_queued_moves(cube):
+    done = []
+    assert cube.apply_algorithm("R U", lambda: done.append('now')) is True
+    assert done == ['now']
+    # Con un'animazione in corso le mosse aspettano la coda
+    cube.is_animating = True
+    assert cube.apply_algorithm("F' L2", lambda: done.append('queued')) is False
+    assert done == ['now']
+    cube._run_move_queue()
+    assert done == ['now', 'queued']
+    reference = RubiksCubeModel()
+    reference.apply_algorithm("R U F' L2")
+    assert bytes(cube.model.facelets) == bytes(reference.facelets)
+    assert _scene_matches_model(cube)
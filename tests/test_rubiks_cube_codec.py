@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""Test della codifica binaria: andata e ritorno, e rifiuto degli stati non codificabili"""
+
+import numpy as np
+import pytest
+
+from rubiks_cube_codec import (
+    decode_cubie, decode_states, encode_cubie, encode_cubie_arrays, encode_states, facelets_to_arrays
+)
+from rubiks_cube_cubie import CubieCube, EDGE_FACELETS
+from rubiks_cube_model import RubiksCubeModel
+from rubiks_cube_moves import SOLVED_STATE
+from rubiks_cube_scramble import random_facelet_array
+
+
+def _model(algorithm):
+    model = RubiksCubeModel()
+    model.apply_algorithm(algorithm)
+    return model
+
+
+def _swapped_edges():
+    """Stato risolto con gli spigoli UR e UF scambiati: parità degli spigoli diversa da quella degli angoli"""
+    facelets = bytearray(SOLVED_STATE)
+    (a, b), (c, d) = EDGE_FACELETS[0], EDGE_FACELETS[1]
+    facelets[a], facelets[b], facelets[c], facelets[d] = facelets[c], facelets[d], facelets[a], facelets[b]
+    return bytes(facelets)
+
+
+@pytest.mark.parametrize('kind', ['cubie', 'facelet3', 'facelet'])
+def test_states_round_trip(kind):
+    states = random_facelet_array(2000, 7)
+    assert np.array_equal(decode_states(encode_states(states, kind), kind), states)
+
+
+@pytest.mark.parametrize('algorithm', ["", "R U", "R U R' U' F2 D' L B2", "R2 U2 F2"])
+def test_cubie_round_trip(algorithm):
+    model = _model(algorithm)
+    assert decode_cubie(encode_cubie(model)).to_facelets() == bytes(model.facelets)
+
+
+@pytest.mark.parametrize('algorithm', ["M", "x", "R E'", "S2 U"])
+def test_moved_centers_are_rejected(algorithm):
+    model = _model(algorithm)
+    with pytest.raises(ValueError):
+        encode_cubie(model)
+    with pytest.raises(ValueError):
+        encode_states(np.frombuffer(bytes(model.facelets), dtype=np.uint8), 'cubie')
+
+
+def test_parity_mismatch_is_rejected():
+    state = _swapped_edges()
+    with pytest.raises(ValueError):
+        encode_cubie(state)
+    with pytest.raises(ValueError):
+        facelets_to_arrays(np.frombuffer(state, dtype=np.uint8)[None, :])
+    with pytest.raises(ValueError):
+        encode_states(np.frombuffer(state, dtype=np.uint8), 'cubie')
+
+
+def test_parity_mismatch_arrays_are_rejected():
+    cube = CubieCube()
+    cube.ep[0], cube.ep[1] = cube.ep[1], cube.ep[0]
+    arrays = [np.array([values], dtype=np.int8) for values in (cube.cp, cube.co, cube.ep, cube.eo)]
+    with pytest.raises(ValueError):
+        encode_cubie_arrays(*arrays)
+    with pytest.raises(ValueError):
+        encode_cubie(cube)
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""Test delle viste sullo stato del modello"""
+
+import pytest
+
+from rubiks_cube_model import RubiksCubeModel
+
+
+def test_state_view_follows_moves():
+    model = RubiksCubeModel()
+    view = model.state_view()
+    facelets = model.facelets
+    model.apply_move('R')
+    assert bytes(view) == bytes(facelets) == model.get_state()
+    model.apply_algorithm("U F2 L'")
+    assert bytes(view) == model.get_state()
+    model.reset()
+    assert bytes(view) == model.get_state()
+
+
+def test_facelets_are_read_only():
+    model = RubiksCubeModel(debug=True)
+    model.apply_move('R')
+    with pytest.raises(TypeError):
+        model.facelets[0] = ord('Y')
+    assert not model.is_solved()
+    model.apply_move("R'")
+    assert model.is_solved()
+
+
+def test_facelets_setter_rejects_wrong_length():
+    model = RubiksCubeModel()
+    with pytest.raises(ValueError):
+        model.facelets = b'W' * 53
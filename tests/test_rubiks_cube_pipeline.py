@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Test della lettura dell'ingresso e della pipeline di risoluzione"""
+
+import json
+
+import pytest
+
+import rubiks_cube_pipeline
+from rubiks_cube_model import RubiksCubeModel
+from rubiks_cube_pipeline import _solve_item, read_jsonl, solve_stream
+from rubiks_cube_solver import TABLE_PREFIX, TABLE_VERSION, _table_specs
+from rubiks_cube_tables import TableStore
+
+LINES = [
+    json.dumps({'id': 'a', 'scramble': "R U"}),
+    json.dumps({'id': 'b', 'state': None}),
+    json.dumps({'id': 'c', 'scramble': 5}),
+    json.dumps({'id': 'd', 'state': ['R', 'U']}),
+    '42',
+    'null',
+    json.dumps({'id': 'e', 'scramble': "F2"}),
+]
+
+
+def _tables_present():
+    store = TableStore()
+    return all(store.open(TABLE_PREFIX + name, TABLE_VERSION, bits) is not None
+               for name, bits, _ in _table_specs(None))
+
+
+def test_invalid_states_become_errors_in_order():
+    items = list(read_jsonl(LINES))
+    assert [item_id for item_id, _ in items] == ['a', 'b', 'c', 'd', 4, 5, 'e']
+    states = [state for _, state in items]
+    assert all(isinstance(state, ValueError) for state in states[1:6])
+    model = RubiksCubeModel()
+    model.apply_algorithm("R U")
+    assert states[0] == model.get_state()
+    assert isinstance(states[6], bytes)
+
+
+@pytest.mark.skipif(not _tables_present(), reason="tabelle a due fasi assenti (python rubiks_cube_tables.py build)")
+def test_solve_stream_reports_errors_in_input_order():
+    results = list(solve_stream(read_jsonl(LINES), workers=1, timeout=30.0))
+    assert [result['index'] for result in results] == list(range(len(LINES)))
+    assert [result['id'] for result in results] == ['a', 'b', 'c', 'd', 4, 5, 'e']
+    assert [result['error'] is None for result in results] == [True, False, False, False, False, False, True]
+    assert results[0]['solution'] == ["U'", "R'"]
+
+
+class _BrokenSolver:
+    def solve(self, state, **options):
+        raise IndexError("indice fuori intervallo")
+
+
+def test_unexpected_solver_errors_become_error_strings(monkeypatch):
+    monkeypatch.setattr(rubiks_cube_pipeline, '_worker_solver', _BrokenSolver())
+    solution, error, _ = _solve_item(b'\xff' * 54, None, 1.0)
+    assert solution is None
+    assert error == "IndexError: indice fuori intervallo"
@@ -1,7 +1,6 @@
 # Importazione delle librerie necessarie per li calcoli matematici e per la rappresentazione vettoriale
 # Come lo savio geometra che misura con somma diligenza, così noi qui invochiamo gli strumenti dell'arte matematica
 import math
-from vpython import vector
 
 # Funzione che converte un asse e un angolo in un quaternione, secondo l'arte della geometria spaziale
 # Come Euclide nelle sue dottrine insegnava, così qui trasformiamo lo movimento rotatorio in numeri quaternali
@@ -17,6 +16,8 @@ def quaternion_from_axis_angle(axis, angle):
 # Funzione che dalla quaternale rappresentazione ritorna all'asse e all'angolo
 # Come l'alchimista che dalla materia composta ritorna agli elementi primi
 def quaternion_to_axis_angle(q):
+    # Lo vettore di VPython si chiama solo al bisogno, ché importarlo desta il server del browser
+    from vpython import vector
     # Ricaviamo l'angolo dal coseno presente nella quarta parte del quaternione
     # E lo raddoppiamo, ché prima l'avevamo dimezzato
     angle = 2 * math.acos(q[3])
@@ -87,4 +88,22 @@ def normalize(q):
     length = math.sqrt(q[0]**2 + q[1]**2 + q[2]**2 + q[3]**2)
     # Dividiamo ciascuna componente per la lunghezza, ottenendo un quaternione unitario
     # Come l'orafo che purifica l'oro fino alla massima caratura
-    return (q[0]/length, q[1]/length, q[2]/length, q[3]/length)
\ No newline at end of file
+    return (q[0]/length, q[1]/length, q[2]/length, q[3]/length)
+
+# Funzione che ruota un vettore secondo un quaternione unitario, senza passare per le matrici
+# Come il cartografo che riporta un punto della sfera celeste dopo il moto del firmamento
+def rotate_by_quaternion(q, v):
+    # Separiamo la parte vettoriale dalla parte scalare del quaternione
+    ux, uy, uz, w = q
+    # Primo prodotto vettoriale, raddoppiato: t = 2 (u × v)
+    # Come il doppio passo del geometra che misura due volte per non errare
+    tx = 2 * (uy * v[2] - uz * v[1])
+    ty = 2 * (uz * v[0] - ux * v[2])
+    tz = 2 * (ux * v[1] - uy * v[0])
+    # Il vettore ruotato è v + w t + u × t, secondo la regola di Rodrigues
+    # Come il moto composto di due cerchi negli epicicli di Tolomeo
+    return (
+        v[0] + w * tx + (uy * tz - uz * ty),
+        v[1] + w * ty + (uz * tx - ux * tz),
+        v[2] + w * tz + (ux * ty - uy * tx)
+    )